@@ -1,9 +1,33 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
 from datetime import datetime, timedelta
-import sqlite3
-from database import DatabaseManager
+import time
+from database import acquire_database, release_database
+from change_watcher import ChangeWatcher
+from db_executor import BackgroundExecutor
 from Admin_System import AdminLoginWindow
+
+# Number of orders fetched per page as the orders table is scrolled
+ORDERS_PAGE_SIZE = 50
+
+# Row background for each order status
+STATUS_COLORS = {
+    "pending": "#fff9c4",
+    "preparing": "#e3f2fd",
+    "ready": "#e8f5e9",
+    "delivered": "#f1f8e9",
+    "cancelled": "#ffebee",
+}
+
+# Orders table columns that can be sorted by clicking their heading
+SORTABLE_ORDER_COLUMNS = ("order_id", "customer", "total_amount", "order_date", "status")
+
+# Milliseconds between refreshes of the diagnostics panel
+DIAGNOSTICS_INTERVAL = 1000
+
+# Number of refreshes the diagnostics rates and latencies are averaged over
+DIAGNOSTICS_WINDOW = 10
+
 class AdminPortal:
     def __init__(self, root, admin_data, db_manager):
         """Initialize the Admin Portal with the admin's data and database connection."""
@@ -11,6 +35,27 @@ class AdminPortal:
         self.admin_data = admin_data
         self.db = db_manager
         
+        # Run queries off the Tk thread
+        self.executor = BackgroundExecutor(self.root, db=self.db)
+        
+        # Paging state of the orders table
+        self.order_sort = ("order_date", True)
+        self.order_filters = {}
+        self.orders_after = None
+        self.orders_exhausted = True
+        self.orders_page_pending = False
+        self.orders_high_water_mark = None
+        self.order_keys = {}
+        
+        # The admin's restaurant, set once load_restaurant_data() has read it
+        self.restaurants = []
+        self.current_restaurant = None
+        
+        # Diagnostics panel, built the first time it is shown
+        self.diagnostics_visible = tk.BooleanVar(value=False)
+        self.diagnostics_frame = None
+        self.diagnostics_after_id = None
+        
         # Configure the main window
         self.root.title(f"Admin Portal - {admin_data['username']}")
         self.root.geometry("1200x700")
@@ -29,9 +74,12 @@ class AdminPortal:
         # Orders section
         self.create_orders_section()
         
-        # Load initial data
+        # Pick up orders placed or changed from other windows and processes
+        self.watcher = ChangeWatcher(self.root, self.db, self.executor)
+        self.watcher.subscribe(["orders", "order_items"], self.on_orders_changed)
+        
+        # Load initial data; the orders and the watcher follow once the restaurant is known
         self.load_restaurant_data()
-        self.load_orders()
 
     def create_header(self):
         """Create the header section with admin info and logout button."""
@@ -59,6 +107,18 @@ class AdminPortal:
         )
         settings_btn.pack(side="right", padx=(10, 0))
 
+        # Diagnostics button
+        diagnostics_btn = tk.Button(
+            header_frame, 
+            text="Diagnostics", 
+            bg="#607D8B", 
+            fg="white", 
+            font=("Arial", 12),
+            padx=15,
+            command=self.toggle_diagnostics
+        )
+        diagnostics_btn.pack(side="right", padx=(10, 0))
+
         # Logout button
         logout_btn = tk.Button(
             header_frame, 
@@ -83,80 +143,100 @@ class AdminPortal:
         
     def load_restaurant_settings(self, parent_window):
         """Load and display restaurant settings."""
-        # Get restaurant data
+        if self.current_restaurant is None:
+            messagebox.showinfo("Info", "Restaurant data not found.")
+            return
         restaurant_id = self.current_restaurant['restaurant_id']
         
-        try:
-            self.cursor.execute("SELECT * FROM restaurants WHERE restaurant_id = ?", (restaurant_id,))
-            restaurant_data = self.cursor.fetchone()
-            
-            if not restaurant_data:
-                messagebox.showinfo("Info", "Restaurant data not found.")
-                return
-            
-            # Create settings UI
-            settings_frame = tk.LabelFrame(parent_window, text="Restaurant Settings", padx=20, pady=10, bg="#ffffff")
-            settings_frame.pack(fill="both", expand=True, padx=20, pady=20)
-            
-            # Restaurant name
-            tk.Label(settings_frame, text="Restaurant Name:", font=("Arial", 12, "bold"), bg="#ffffff").grid(row=0, column=0, sticky="w", pady=10)
-            name_var = tk.StringVar(value=restaurant_data[1])
-            name_entry = tk.Entry(settings_frame, textvariable=name_var, font=("Arial", 12), width=30)
-            name_entry.grid(row=0, column=1, padx=10, pady=10)
-            
-            # Restaurant description
-            tk.Label(settings_frame, text="Description:", font=("Arial", 12, "bold"), bg="#ffffff").grid(row=1, column=0, sticky="w", pady=10)
-            desc_var = tk.StringVar(value=restaurant_data[2])
-            desc_entry = tk.Entry(settings_frame, textvariable=desc_var, font=("Arial", 12), width=30)
-            desc_entry.grid(row=1, column=1, padx=10, pady=10)
-            
-            # Update button
-            update_btn = tk.Button(
-                settings_frame, 
-                text="Update Settings", 
-                bg="#4CAF50", 
-                fg="white",
-                command=lambda: self.update_restaurant_settings(
-                    restaurant_id, 
-                    name_var.get(), 
-                    desc_var.get(),
-                    parent_window
-                )
-            )
-            update_btn.grid(row=2, column=0, columnspan=2, pady=20)
-            
-            # Close button
-            close_btn = tk.Button(
-                settings_frame, 
-                text="Close", 
-                bg="#f44336", 
-                fg="white",
-                command=parent_window.destroy
+        # Create the frame now so it keeps its place above the other sections
+        settings_frame = tk.LabelFrame(parent_window, text="Restaurant Settings", padx=20, pady=10, bg="#ffffff")
+        settings_frame.pack(fill="both", expand=True, padx=20, pady=20)
+        
+        # Get restaurant data
+        def fetch_restaurant():
+            cursor = self.db.execute("SELECT * FROM restaurants WHERE restaurant_id = ?", (restaurant_id,))
+            return cursor.fetchone()
+        
+        self.executor.submit(
+            fetch_restaurant,
+            on_success=lambda restaurant_data: self.show_restaurant_settings(
+                parent_window, settings_frame, restaurant_id, restaurant_data
+            ),
+            on_error=lambda e: messagebox.showerror("Database Error", f"Failed to load restaurant settings: {e}")
+        )
+    
+    def show_restaurant_settings(self, parent_window, settings_frame, restaurant_id, restaurant_data):
+        """Fill the settings frame with the restaurant data fetched by load_restaurant_settings()."""
+        if not settings_frame.winfo_exists():
+            return
+        
+        if not restaurant_data:
+            settings_frame.destroy()
+            messagebox.showinfo("Info", "Restaurant data not found.")
+            return
+        
+        # Restaurant name
+        tk.Label(settings_frame, text="Restaurant Name:", font=("Arial", 12, "bold"), bg="#ffffff").grid(row=0, column=0, sticky="w", pady=10)
+        name_var = tk.StringVar(value=restaurant_data[1])
+        name_entry = tk.Entry(settings_frame, textvariable=name_var, font=("Arial", 12), width=30)
+        name_entry.grid(row=0, column=1, padx=10, pady=10)
+        
+        # Restaurant description
+        tk.Label(settings_frame, text="Description:", font=("Arial", 12, "bold"), bg="#ffffff").grid(row=1, column=0, sticky="w", pady=10)
+        desc_var = tk.StringVar(value=restaurant_data[2])
+        desc_entry = tk.Entry(settings_frame, textvariable=desc_var, font=("Arial", 12), width=30)
+        desc_entry.grid(row=1, column=1, padx=10, pady=10)
+        
+        # Update button
+        update_btn = tk.Button(
+            settings_frame, 
+            text="Update Settings", 
+            bg="#4CAF50", 
+            fg="white",
+            command=lambda: self.update_restaurant_settings(
+                restaurant_id, 
+                name_var.get(), 
+                desc_var.get(),
+                parent_window
             )
-            close_btn.grid(row=3, column=0, columnspan=2, pady=10)
-            
-        except sqlite3.Error as e:
-            messagebox.showerror("Database Error", f"Failed to load restaurant settings: {e}")
+        )
+        update_btn.grid(row=2, column=0, columnspan=2, pady=20)
+        
+        # Close button
+        close_btn = tk.Button(
+            settings_frame, 
+            text="Close", 
+            bg="#f44336", 
+            fg="white",
+            command=parent_window.destroy
+        )
+        close_btn.grid(row=3, column=0, columnspan=2, pady=10)
 
     def update_restaurant_settings(self, restaurant_id, name, description, window):
         """Update restaurant settings in the database."""
-        try:
-            self.cursor.execute(
-                "UPDATE restaurants SET name = ?, description = ? WHERE restaurant_id = ?",
-                (name, description, restaurant_id)
-            )
-            self.db.conn.commit()
-            
+        def save_settings():
+            with self.db.transaction():
+                self.db.execute(
+                    "UPDATE restaurants SET name = ?, description = ? WHERE restaurant_id = ?",
+                    (name, description, restaurant_id)
+                )
+            self.db.bump_table_versions("restaurants")
+        
+        def settings_saved(result):
             messagebox.showinfo("Success", "Restaurant settings updated successfully!")
             
             # Refresh the admin portal title with the new restaurant name
             self.root.title(f"Admin Portal - {name}")
             
             # Close the settings window
-            window.destroy()
-            
-        except sqlite3.Error as e:
-            messagebox.showerror("Error", f"Failed to update restaurant settings: {e}")
+            if window.winfo_exists():
+                window.destroy()
+        
+        self.executor.submit(
+            save_settings,
+            on_success=settings_saved,
+            on_error=lambda e: messagebox.showerror("Error", f"Failed to update restaurant settings: {e}")
+        )
             
     def show_settings(self):
         """Show restaurant settings, password reset, and theme toggle in a new window."""
@@ -227,23 +307,30 @@ class AdminPortal:
             messagebox.showerror("Error", "Password must be at least 8 characters long!")
             return
             
-        try:
-            # Verify current password (this is a simplified check)
-            # In a real application, you would hash the password and compare with the stored hash
-            admin_id = self.admin_data['admin_id']
-            self.cursor.execute("SELECT password FROM admins WHERE admin_id = ?", (admin_id,))
-            stored_password = self.cursor.fetchone()[0]
-            
-            if stored_password != current_pass:
+        admin_id = self.admin_data['admin_id']
+        
+        def save_password():
+            # Returns False when the current password is wrong
+            with self.db.transaction():
+                # Verify current password (this is a simplified check)
+                # In a real application, you would hash the password and compare with the stored hash
+                cursor = self.db.execute("SELECT password FROM admins WHERE admin_id = ?", (admin_id,))
+                stored_password = cursor.fetchone()[0]
+                
+                if stored_password != current_pass:
+                    return False
+                    
+                # Update password in database
+                self.db.execute(
+                    "UPDATE admins SET password = ? WHERE admin_id = ?",
+                    (new_pass, admin_id)
+                )
+            return True
+        
+        def password_saved(updated):
+            if not updated:
                 messagebox.showerror("Error", "Current password is incorrect!")
                 return
-                
-            # Update password in database
-            self.cursor.execute(
-                "UPDATE admins SET password = ? WHERE admin_id = ?",
-                (new_pass, admin_id)
-            )
-            self.db.conn.commit()
             
             messagebox.showinfo("Success", "Password updated successfully!")
             
@@ -251,9 +338,12 @@ class AdminPortal:
             self.current_pass_var.set("")
             self.new_pass_var.set("")
             self.confirm_pass_var.set("")
-            
-        except sqlite3.Error as e:
-            messagebox.showerror("Database Error", f"Failed to update password: {e}")
+        
+        self.executor.submit(
+            save_password,
+            on_success=password_saved,
+            on_error=lambda e: messagebox.showerror("Database Error", f"Failed to update password: {e}")
+        )
 
     def create_theme_toggle_section(self, parent_window):
         """Create the theme toggle section in settings."""
@@ -271,6 +361,17 @@ class AdminPortal:
             command=self.toggle_dark_mode
         )
         theme_toggle.grid(row=0, column=0, sticky="w", pady=10)
+        
+        # Diagnostics panel toggle, shares its state with the header button
+        diagnostics_toggle = tk.Checkbutton(
+            theme_frame,
+            text="Show Diagnostics Panel",
+            variable=self.diagnostics_visible,
+            font=("Arial", 12),
+            bg="#ffffff",
+            command=self.show_or_hide_diagnostics
+        )
+        diagnostics_toggle.grid(row=1, column=0, sticky="w", pady=10)
 
     def toggle_dark_mode(self):
         """Toggle between light and dark modes."""
@@ -329,6 +430,92 @@ class AdminPortal:
                 foreground="black",
                 headingbackground="#f5f5")
 
+    def toggle_diagnostics(self):
+        """Show the diagnostics panel if it is hidden, hide it otherwise."""
+        self.diagnostics_visible.set(not self.diagnostics_visible.get())
+        self.show_or_hide_diagnostics()
+
+    def show_or_hide_diagnostics(self):
+        """Show or hide the diagnostics panel to match diagnostics_visible."""
+        if self.diagnostics_visible.get():
+            if self.diagnostics_frame is None:
+                self.create_diagnostics_panel()
+            self.diagnostics_frame.pack(fill="x", pady=(0, 20), before=self.dashboard_frame)
+            if self.diagnostics_after_id is None:
+                self.diagnostics_samples = []
+                self.sample_diagnostics()
+        else:
+            if self.diagnostics_frame is not None:
+                self.diagnostics_frame.pack_forget()
+            if self.diagnostics_after_id is not None:
+                self.root.after_cancel(self.diagnostics_after_id)
+                self.diagnostics_after_id = None
+
+    def create_diagnostics_panel(self):
+        """Create the diagnostics panel with the runtime counters operators watch during peak hours."""
+        self.diagnostics_frame = tk.LabelFrame(
+            self.main_frame, 
+            text="Diagnostics", 
+            font=("Arial", 14, "bold"),
+            bg="#ffffff", 
+            padx=20, 
+            pady=10
+        )
+        
+        self.diagnostics_labels = {}
+        titles = ["Queries/s", "p50 Latency", "p95 Latency", "Event Loop Lag", "Connections In Use",
+                  "Connections Open", "Queued Requests", "Cache Hit Ratio"]
+        for column, title in enumerate(titles):
+            tk.Label(self.diagnostics_frame, text=title, font=("Arial", 10), bg="#ffffff").grid(row=0, column=column, padx=15)
+            value_label = tk.Label(self.diagnostics_frame, text="-", font=("Arial", 14, "bold"), bg="#ffffff")
+            value_label.grid(row=1, column=column, padx=15)
+            self.diagnostics_labels[title] = value_label
+
+    def sample_diagnostics(self):
+        """Read the runtime counters, update the panel and schedule the next refresh."""
+        now = time.perf_counter()
+        stats = self.db.query_stats
+        sample = {
+            "time": now,
+            "calls": stats.calls if stats else 0,
+            "histogram": stats.histogram_copy() if stats else None,
+            # How late this refresh ran compared to when it was scheduled
+            "lag": max(0.0, now - self.diagnostics_due) if self.diagnostics_after_id else 0.0,
+        }
+        self.diagnostics_samples.append(sample)
+        del self.diagnostics_samples[:-DIAGNOSTICS_WINDOW - 1]
+        oldest = self.diagnostics_samples[0]
+        
+        labels = self.diagnostics_labels
+        if stats is None:
+            for title in ("Queries/s", "p50 Latency", "p95 Latency"):
+                labels[title].config(text="off")
+        else:
+            elapsed = now - oldest["time"]
+            rate = (sample["calls"] - oldest["calls"]) / elapsed if elapsed else 0.0
+            labels["Queries/s"].config(text=f"{rate:.1f}")
+            since = oldest["histogram"] if len(self.diagnostics_samples) > 1 else None
+            labels["p50 Latency"].config(text=self.format_latency(stats.percentile(0.5, since)))
+            labels["p95 Latency"].config(text=self.format_latency(stats.percentile(0.95, since)))
+        
+        lag_ms = max(recent["lag"] for recent in self.diagnostics_samples) * 1000
+        labels["Event Loop Lag"].config(text=f"{lag_ms:.0f} ms", fg="#d32f2f" if lag_ms >= 100 else "black")
+        # In use: borrowed by a request right now; open: every connection the pool holds, idle ones included
+        labels["Connections In Use"].config(text=str(self.db.pool.checked_out if self.db.pool else 0))
+        labels["Connections Open"].config(text=str(self.db.pool.open_connections if self.db.pool else 0))
+        labels["Queued Requests"].config(text=str(self.executor.outstanding))
+        hit_ratio = self.db.catalog.hit_ratio()
+        labels["Cache Hit Ratio"].config(text="-" if hit_ratio is None else f"{hit_ratio:.0%}")
+        
+        self.diagnostics_due = time.perf_counter() + DIAGNOSTICS_INTERVAL / 1000
+        self.diagnostics_after_id = self.root.after(DIAGNOSTICS_INTERVAL, self.sample_diagnostics)
+
+    def format_latency(self, latency_ms):
+        """Format a percentile bucket bound for the diagnostics panel."""
+        if latency_ms == float("inf"):
+            return "> 1 s"
+        return f"≤ {latency_ms:g} ms"
+
     def create_dashboard(self):
         """Create the dashboard with summary statistics."""
         self.dashboard_frame = tk.LabelFrame(
@@ -411,7 +598,7 @@ class AdminPortal:
             text="Refresh", 
             bg="#4CAF50", 
             fg="white",
-            command=self.load_orders
+            command=self.refresh_orders
         )
         refresh_btn.pack(side="right")
         
@@ -427,6 +614,7 @@ class AdminPortal:
         # Add scrollbar
         scrollbar_y = tk.Scrollbar(table_frame)
         scrollbar_y.pack(side="right", fill="y")
+        self.orders_scrollbar = scrollbar_y
         
         scrollbar_x = tk.Scrollbar(table_frame, orient="horizontal")
         scrollbar_x.pack(side="bottom", fill="x")
@@ -440,7 +628,7 @@ class AdminPortal:
             table_frame,
             columns=columns,
             show="headings",
-            yscrollcommand=scrollbar_y.set,
+            yscrollcommand=self.on_orders_scroll,
             xscrollcommand=scrollbar_x.set
         )
         
@@ -450,27 +638,43 @@ class AdminPortal:
         
         # Define column headings and widths
         for col, width in zip(columns, column_widths):
-            self.orders_tree.heading(col, text=col.replace("_", " ").title())
+            if col in SORTABLE_ORDER_COLUMNS:
+                self.orders_tree.heading(
+                    col,
+                    text=col.replace("_", " ").title(),
+                    command=lambda c=col: self.sort_orders(c)
+                )
+            else:
+                self.orders_tree.heading(col, text=col.replace("_", " ").title())
             self.orders_tree.column(col, width=width, minwidth=width)
         
+        # Configure row tags for status colors
+        for status, color in STATUS_COLORS.items():
+            self.orders_tree.tag_configure(status, background=color)
+        
         self.orders_tree.pack(fill="both", expand=True)
         
         # Bind click event for order details
         self.orders_tree.bind("<Double-1>", self.show_order_details)
 
     def load_restaurant_data(self):
-        """Load the admin's restaurant data."""
+        """Load the admin's restaurant data, then its orders."""
         # Get the admin's restaurant(s)
         admin_id = self.admin_data['admin_id']
-        self.cursor = self.db.conn.cursor()
-        self.cursor.execute("SELECT * FROM restaurants WHERE admin_id = ?", (admin_id,))
-        self.restaurants = []
         
-        for row in self.cursor.fetchall():
-            restaurant_dict = {}
-            for idx, col in enumerate(self.cursor.description):
-                restaurant_dict[col[0]] = row[idx]
-            self.restaurants.append(restaurant_dict)
+        def fetch_restaurants():
+            cursor = self.db.execute("SELECT * FROM restaurants WHERE admin_id = ?", (admin_id,))
+            return [dict(row) for row in cursor.fetchall()]
+        
+        self.executor.submit(
+            fetch_restaurants,
+            on_success=self.show_restaurant_data,
+            on_error=lambda e: messagebox.showerror("Database Error", f"Failed to load restaurant data: {e}")
+        )
+
+    def show_restaurant_data(self, restaurants):
+        """Use the restaurants fetched by load_restaurant_data() and load the first one's orders."""
+        self.restaurants = restaurants
         
         if not self.restaurants:
             messagebox.showinfo("Info", "No restaurants found for this admin account.")
@@ -482,108 +686,251 @@ class AdminPortal:
         
         # Update window title with restaurant name
         self.root.title(f"Admin Portal - {self.current_restaurant['name']}")
+        
+        self.load_orders()
+        self.watcher.start()
 
     def load_orders(self):
         """Load and display orders for the admin's restaurant."""
+        self.update_dashboard()
+        self.reload_orders()
+
+    def update_dashboard(self):
+        """Refresh the dashboard statistics from the daily order rollup."""
+        # Nothing to show until load_restaurant_data() has found the restaurant
+        if self.current_restaurant is None:
+            return
+        
+        self.executor.submit(
+            self.db.get_dashboard_stats,
+            self.current_restaurant['restaurant_id'],
+            on_success=self.show_dashboard_stats,
+            key="dashboard"
+        )
+
+    def show_dashboard_stats(self, stats):
+        """Show dashboard statistics fetched by update_dashboard()."""
+        if stats is None:
+            return
+        
+        # Update dashboard labels
+        self.total_orders_label.config(text=str(stats['total_orders']))
+        self.pending_orders_label.config(text=str(stats['pending_orders']))
+        self.completed_orders_label.config(text=str(stats['completed_orders']))
+        self.today_revenue_label.config(text=f"₹{stats['day_revenue']:.2f}")
+
+    def reload_orders(self):
+        """Clear the orders table and load the first page with the current filters and sort order."""
+        if self.current_restaurant is None:
+            return
+        
+        self.order_filters = self.get_order_filters()
+        self.orders_after = None
+        self.orders_exhausted = False
+        self.orders_page_pending = True
+        self.orders_high_water_mark = None
+        self.order_keys = {}
+        
         # Clear existing orders
-        for item in self.orders_tree.get_children():
-            self.orders_tree.delete(item)
+        self.orders_tree.delete(*self.orders_tree.get_children())
         
         restaurant_id = self.current_restaurant['restaurant_id']
+        sort_by, descending = self.order_sort
+        filters = self.order_filters
+        
+        def fetch_first_page():
+            # Read the mark first so changes made while the page loads are refreshed later
+            high_water_mark = self.db.get_orders_high_water_mark(restaurant_id)
+            orders = self.db.get_restaurant_orders(
+                restaurant_id,
+                limit=ORDERS_PAGE_SIZE,
+                sort_by=sort_by,
+                descending=descending,
+                **filters
+            )
+            return high_water_mark, orders
+        
+        self.executor.cancel("orders_refresh")
+        self.executor.submit(
+            fetch_first_page,
+            on_success=self.show_first_orders_page,
+            on_error=self.show_orders_error,
+            key="orders_page"
+        )
+
+    def show_first_orders_page(self, result):
+        """Show the first page fetched by reload_orders()."""
+        self.orders_high_water_mark, orders = result
+        self.append_orders_page(orders)
+
+    def load_next_orders_page(self):
+        """Fetch the next page of orders for the orders table."""
+        if self.orders_exhausted:
+            self.orders_page_pending = False
+            return
         
-        # Get orders for this restaurant
-        try:
-            self.cursor.execute("""
-                SELECT o.*, u.username as customer_name, u.email as customer_email, u.phone_number
-                FROM orders o
-                JOIN users u ON o.user_id = u.user_id
-                WHERE o.restaurant_id = ?
-                ORDER BY o.order_date DESC
-            """, (restaurant_id,))
-            
-            orders = []
-            for row in self.cursor.fetchall():
-                order_dict = {}
-                for idx, col in enumerate(self.cursor.description):
-                    order_dict[col[0]] = row[idx]
-                orders.append(order_dict)
-            
-            # Update dashboard statistics
-            total_orders = len(orders)
-            pending_orders = sum(1 for order in orders if order['status'] == 'pending')
-            completed_orders = sum(1 for order in orders if order['status'] == 'delivered')
+        sort_by, descending = self.order_sort
+        self.executor.submit(
+            self.db.get_restaurant_orders,
+            self.current_restaurant['restaurant_id'],
+            limit=ORDERS_PAGE_SIZE,
+            sort_by=sort_by,
+            descending=descending,
+            after=self.orders_after,
+            on_success=self.append_orders_page,
+            on_error=self.show_orders_error,
+            key="orders_page",
+            **self.order_filters
+        )
+
+    def append_orders_page(self, orders):
+        """Append a fetched page of orders to the orders table."""
+        self.orders_page_pending = False
+        
+        # Populate the orders table
+        for order in orders:
+            # A refresh may already have inserted it
+            if not self.orders_tree.exists(str(order['order_id'])):
+                self.insert_order_row(order, "end")
+        
+        if orders:
+            self.orders_after = (orders[-1]['sort_key'], orders[-1]['order_id'])
+        if len(orders) < ORDERS_PAGE_SIZE:
+            self.orders_exhausted = True
+
+    def show_orders_error(self, error):
+        """Report a failed orders query and stop paging."""
+        self.orders_page_pending = False
+        self.orders_exhausted = True
+        messagebox.showerror("Database Error", f"Failed to load orders: {error}")
+
+    def order_row_values(self, order):
+        """Column values of an order's row in the orders table."""
+        # Create a button for actions
+        actions_text = "Update Status"
+        
+        return (
+            order['order_id'],
+            f"{order['customer_name']}\n{order['customer_email']}",
+            order['items_summary'],
+            f"₹{order['total_amount']:.2f}",
+            order['order_date'],
+            order['status'],
+            actions_text
+        )
+
+    def insert_order_row(self, order, index):
+        """Insert an order into the orders table at the given position."""
+        self.orders_tree.insert(
+            "", index,
+            iid=str(order['order_id']),
+            values=self.order_row_values(order),
+            tags=(order['status'],)
+        )
+        self.order_keys[str(order['order_id'])] = (order['sort_key'], order['order_id'])
+
+    def refresh_orders(self):
+        """
+        Patch orders created or changed since the last load into the orders table.
+
+        Only orders stamped at or after the high-water mark are fetched. Rows
+        that changed are updated in place, rows that no longer match the
+        filters are removed and new matching rows are inserted where the
+        current sort order puts them, so the table does not flicker.
+        """
+        if self.current_restaurant is None:
+            return
+        
+        self.update_dashboard()
+        # Only before the first page has loaded (or after it failed) is there no mark to refresh from
+        if self.orders_high_water_mark is None:
+            self.reload_orders()
+            return
+        
+        sort_by, descending = self.order_sort
+        self.executor.submit(
+            self.db.get_restaurant_orders,
+            self.current_restaurant['restaurant_id'],
+            sort_by=sort_by,
+            descending=descending,
+            changed_since=self.orders_high_water_mark,
+            on_success=self.apply_order_changes,
+            on_error=lambda e: messagebox.showerror("Database Error", f"Failed to refresh orders: {e}"),
+            key="orders_refresh"
+        )
+
+    def apply_order_changes(self, changed_orders):
+        """Patch orders fetched by refresh_orders() into the orders table."""
+        for order in changed_orders:
+            if order['updated_at'] > self.orders_high_water_mark:
+                self.orders_high_water_mark = order['updated_at']
             
-            # Calculate today's revenue
-            today = datetime.now().strftime('%Y-%m-%d')
-            today_revenue = sum(order['total_amount'] for order in orders 
-                                if str(order['order_date']).startswith(today))
+            iid = str(order['order_id'])
+            key = (order['sort_key'], order['order_id'])
+            matches = self.order_matches_filters(order)
             
-            # Update dashboard labels
-            self.total_orders_label.config(text=str(total_orders))
-            self.pending_orders_label.config(text=str(pending_orders))
-            self.completed_orders_label.config(text=str(completed_orders))
-            self.today_revenue_label.config(text=f"₹{today_revenue:.2f}")
+            if self.orders_tree.exists(iid):
+                if matches and self.order_keys[iid] == key:
+                    # Same position, just refresh the values
+                    self.orders_tree.item(iid, values=self.order_row_values(order), tags=(order['status'],))
+                    continue
+                self.orders_tree.delete(iid)
+                del self.order_keys[iid]
             
-            # Populate the orders table
-            for order in orders:
-                # Get order items
-                self.cursor.execute("""
-                    SELECT oi.*, mi.name as item_name
-                    FROM order_items oi
-                    JOIN menu_items mi ON oi.item_id = mi.item_id
-                    WHERE oi.order_id = ?
-                """, (order['order_id'],))
-                
-                order_items = []
-                for row in self.cursor.fetchall():
-                    item_dict = {}
-                    for idx, col in enumerate(self.cursor.description):
-                        item_dict[col[0]] = row[idx]
-                    order_items.append(item_dict)
-                
-                # Create a summary of items
-                items_summary = ", ".join([f"{item['item_name']} (x{item['quantity']})" 
-                                         for item in order_items[:2]])
-                
-                if len(order_items) > 2:
-                    items_summary += f" and {len(order_items) - 2} more"
-                
-                # Create a button for actions
-                actions_text = "Update Status"
-                
-                # Insert into treeview
-                self.orders_tree.insert(
-                    "", "end",
-                    values=(
-                        order['order_id'],
-                        f"{order['customer_name']}\n{order['customer_email']}",
-                        items_summary,
-                        f"₹{order['total_amount']:.2f}",
-                        order['order_date'],
-                        order['status'],
-                        actions_text
-                    ),
-                    tags=(str(order['order_id']),)
-                )
-            
-            # Configure row tags for status colors
-            for order in orders:
-                status = order['status']
-                order_id = str(order['order_id'])
-                
-                if status == 'pending':
-                    self.orders_tree.tag_configure(order_id, background="#fff9c4")
-                elif status == 'preparing':
-                    self.orders_tree.tag_configure(order_id, background="#e3f2fd")
-                elif status == 'ready':
-                    self.orders_tree.tag_configure(order_id, background="#e8f5e9")
-                elif status == 'delivered':
-                    self.orders_tree.tag_configure(order_id, background="#f1f8e9")
-                elif status == 'cancelled':
-                    self.orders_tree.tag_configure(order_id, background="#ffebee")
-                    
-        except sqlite3.Error as e:
-            messagebox.showerror("Database Error", f"Failed to load orders: {e}")
+            # Rows past the last loaded page arrive with the page they belong to
+            if matches and (self.orders_exhausted or self.order_sorts_before(key, self.orders_after)):
+                self.insert_order_row(order, self.order_row_index(key))
+
+    def on_orders_changed(self, changes):
+        """Apply order changes reported by the change watcher to the dashboard and orders table."""
+        for change in changes:
+            iid = str(change['row_id'])
+            if change['table_name'] == 'orders' and change['operation'] == 'delete' and self.orders_tree.exists(iid):
+                self.orders_tree.delete(iid)
+                del self.order_keys[iid]
+        self.refresh_orders()
+
+    def order_matches_filters(self, order):
+        """Check an order against the filters the table was loaded with."""
+        filters = self.order_filters
+        order_day = str(order['order_date'])[:10]
+        if 'status' in filters and order['status'] != filters['status']:
+            return False
+        if 'date_from' in filters and order_day < filters['date_from']:
+            return False
+        if 'date_to' in filters and order_day > filters['date_to']:
+            return False
+        return True
+
+    def order_sorts_before(self, key, other_key):
+        """Check whether an order key comes before another in the current sort order."""
+        if other_key is None:
+            return True
+        descending = self.order_sort[1]
+        return key > other_key if descending else key < other_key
+
+    def order_row_index(self, key):
+        """Position in the orders table where an order with this key belongs."""
+        for index, iid in enumerate(self.orders_tree.get_children()):
+            if self.order_sorts_before(key, self.order_keys[iid]):
+                return index
+        return "end"
+
+    def on_orders_scroll(self, first, last):
+        """Update the scrollbar and fetch the next page once the end of the loaded rows comes into view."""
+        self.orders_scrollbar.set(first, last)
+        if float(last) >= 0.9 and not self.orders_exhausted and not self.orders_page_pending:
+            self.orders_page_pending = True
+            self.root.after_idle(self.load_next_orders_page)
+
+    def sort_orders(self, sort_by):
+        """Sort the orders table by a column, toggling the direction when it is already the sort column."""
+        current_sort, descending = self.order_sort
+        if sort_by == current_sort:
+            self.order_sort = (sort_by, not descending)
+        else:
+            self.order_sort = (sort_by, sort_by in ("order_date", "order_id", "total_amount"))
+        self.reload_orders()
 
     def show_order_details(self, event):
         """Show detailed information about a selected order."""
@@ -601,38 +948,44 @@ class AdminPortal:
         details_window.geometry("800x600")
         details_window.configure(bg="#ffffff")
         
-        # Get order details
-        self.cursor.execute("""
-            SELECT o.*, u.username, u.email, u.phone_number
-            FROM orders o
-            JOIN users u ON o.user_id = u.user_id
-            WHERE o.order_id = ?
-        """, (order_id,))
+        def fetch_order_details():
+            # Get order details
+            cursor = self.db.execute("""
+                SELECT o.*, u.username, u.email, u.phone_number
+                FROM orders o
+                JOIN users u ON o.user_id = u.user_id
+                WHERE o.order_id = ?
+            """, (order_id,))
+            
+            order_row = cursor.fetchone()
+            if not order_row:
+                return None, []
+            
+            # Get order items
+            cursor = self.db.execute("""
+                SELECT oi.*, mi.name as item_name, mi.description
+                FROM order_items oi
+                JOIN menu_items mi ON oi.item_id = mi.item_id
+                WHERE oi.order_id = ?
+            """, (order_id,))
+            
+            return dict(order_row), [dict(row) for row in cursor.fetchall()]
         
-        order_row = self.cursor.fetchone()
-        if not order_row:
+        self.executor.submit(
+            fetch_order_details,
+            on_success=lambda details: self.display_order_details(details_window, order_id, *details),
+            on_error=lambda e: messagebox.showerror("Database Error", f"Failed to load order details: {e}")
+        )
+
+    def display_order_details(self, details_window, order_id, order, order_items):
+        """Fill the order details window with the fetched order and its items."""
+        if not details_window.winfo_exists():
+            return
+        
+        if not order:
             messagebox.showerror("Error", "Order not found")
             details_window.destroy()
             return
-            
-        order = {}
-        for idx, col in enumerate(self.cursor.description):
-            order[col[0]] = order_row[idx]
-        
-        # Get order items
-        self.cursor.execute("""
-            SELECT oi.*, mi.name as item_name, mi.description
-            FROM order_items oi
-            JOIN menu_items mi ON oi.item_id = mi.item_id
-            WHERE oi.order_id = ?
-        """, (order_id,))
-        
-        order_items = []
-        for row in self.cursor.fetchall():
-            item_dict = {}
-            for idx, col in enumerate(self.cursor.description):
-                item_dict[col[0]] = row[idx]
-            order_items.append(item_dict)
         
         # Create details UI
         # Order info section
@@ -716,147 +1069,65 @@ class AdminPortal:
 
     def update_order_status(self, order_id, new_status, details_window=None):
         """Update the status of an order."""
-        # Update order status in database
-        try:
-            self.cursor.execute(
-                "UPDATE orders SET status = ? WHERE order_id = ?",
-                (new_status, order_id)
-            )
-            self.db.conn.commit()
+        def on_saved(updated):
+            if not updated:
+                messagebox.showerror("Error", f"Failed to update the status of order #{order_id}")
+                return
             
             messagebox.showinfo("Success", f"Order #{order_id} status updated to {new_status}")
             
             # Refresh orders list
-            self.load_orders()
+            self.refresh_orders()
             
             # Close details window if it exists
-            if details_window:
+            if details_window and details_window.winfo_exists():
                 details_window.destroy()
-                
-        except sqlite3.Error as e:
-            messagebox.showerror("Error", f"Failed to update order status: {e}")
+        
+        # Update order status in database
+        self.executor.submit(
+            self.db.update_order_status,
+            order_id,
+            new_status,
+            on_success=on_saved,
+            on_error=lambda e: messagebox.showerror("Error", f"Failed to update order status: {e}")
+        )
 
     def filter_orders(self, event=None):
         """Filter orders based on status and date."""
-        # Implementation of filter functionality
+        self.reload_orders()
+
+    def get_order_filters(self):
+        """Translate the status and date dropdowns into get_restaurant_orders() arguments."""
         status_filter = self.status_var.get()
         date_filter = self.date_var.get()
-        
-        # Clear existing orders
-        for item in self.orders_tree.get_children():
-            self.orders_tree.delete(item)
-        
-        restaurant_id = self.current_restaurant['restaurant_id']
-        
-        # Build query based on filters
-        query = """
-            SELECT o.*, u.username as customer_name, u.email as customer_email, u.phone_number
-            FROM orders o
-            JOIN users u ON o.user_id = u.user_id
-            WHERE o.restaurant_id = ?
-        """
-        params = [restaurant_id]
+        filters = {}
         
         # Add status filter
         if status_filter != "All":
-            query += " AND o.status = ?"
-            params.append(status_filter)
+            filters['status'] = status_filter
         
         # Add date filter
-        if date_filter != "All Time":
-            today = datetime.now().strftime('%Y-%m-%d')
-            
-            if date_filter == "Today":
-                query += " AND date(o.order_date) = ?"
-                params.append(today)
-            elif date_filter == "Yesterday":
-                yesterday = (datetime.now() - timedelta(days=1)).strftime('%Y-%m-%d')
-                query += " AND date(o.order_date) = ?"
-                params.append(yesterday)
-            elif date_filter == "This Week":
-                # Get the start of the week (Monday)
-                today_date = datetime.now()
-                start_of_week = (today_date - timedelta(days=today_date.weekday())).strftime('%Y-%m-%d')
-                query += " AND date(o.order_date) >= ?"
-                params.append(start_of_week)
-            elif date_filter == "This Month":
-                start_of_month = datetime.now().strftime('%Y-%m-01')
-                query += " AND date(o.order_date) >= ?"
-                params.append(start_of_month)
-        
-        query += " ORDER BY o.order_date DESC"
-        
-        try:
-            # Execute query
-            self.cursor.execute(query, params)
-            
-            orders = []
-            for row in self.cursor.fetchall():
-                order_dict = {}
-                for idx, col in enumerate(self.cursor.description):
-                    order_dict[col[0]] = row[idx]
-                orders.append(order_dict)
-            
-            # Populate the orders table (similar to load_orders method)
-            for order in orders:
-                # Get order items
-                self.cursor.execute("""
-                    SELECT oi.*, mi.name as item_name
-                    FROM order_items oi
-                    JOIN menu_items mi ON oi.item_id = mi.item_id
-                    WHERE oi.order_id = ?
-                """, (order['order_id'],))
-                
-                order_items = []
-                for row in self.cursor.fetchall():
-                    item_dict = {}
-                    for idx, col in enumerate(self.cursor.description):
-                        item_dict[col[0]] = row[idx]
-                    order_items.append(item_dict)
-                
-                # Create a summary of items
-                items_summary = ", ".join([f"{item['item_name']} (x{item['quantity']})" 
-                                         for item in order_items[:2]])
-                
-                if len(order_items) > 2:
-                    items_summary += f" and {len(order_items) - 2} more"
-                
-                # Insert into treeview
-                self.orders_tree.insert(
-                    "", "end",
-                    values=(
-                        order['order_id'],
-                        f"{order['customer_name']}\n{order['customer_email']}",
-                        items_summary,
-                        f"₹{order['total_amount']:.2f}",
-                        order['order_date'],
-                        order['status'],
-                        "Update Status"
-                    ),
-                    tags=(str(order['order_id']),)
-                )
-            
-            # Configure row tags for status colors
-            for order in orders:
-                status = order['status']
-                order_id = str(order['order_id'])
-                
-                if status == 'pending':
-                    self.orders_tree.tag_configure(order_id, background="#fff9c4")
-                elif status == 'preparing':
-                    self.orders_tree.tag_configure(order_id, background="#e3f2fd")
-                elif status == 'ready':
-                    self.orders_tree.tag_configure(order_id, background="#e8f5e9")
-                elif status == 'delivered':
-                    self.orders_tree.tag_configure(order_id, background="#f1f8e9")
-                elif status == 'cancelled':
-                    self.orders_tree.tag_configure(order_id, background="#ffebee")
-                    
-        except sqlite3.Error as e:
-            messagebox.showerror("Database Error", f"Failed to filter orders: {e}")
+        today = datetime.now().strftime('%Y-%m-%d')
+        if date_filter == "Today":
+            filters['date_from'] = filters['date_to'] = today
+        elif date_filter == "Yesterday":
+            yesterday = (datetime.now() - timedelta(days=1)).strftime('%Y-%m-%d')
+            filters['date_from'] = filters['date_to'] = yesterday
+        elif date_filter == "This Week":
+            # Get the start of the week (Monday)
+            today_date = datetime.now()
+            filters['date_from'] = (today_date - timedelta(days=today_date.weekday())).strftime('%Y-%m-%d')
+        elif date_filter == "This Month":
+            filters['date_from'] = datetime.now().strftime('%Y-%m-01')
+        
+        return filters
 
     def logout(self):
         """Log out of the admin portal."""
+        if self.diagnostics_after_id is not None:
+            self.root.after_cancel(self.diagnostics_after_id)
+        self.watcher.stop()
+        self.executor.shutdown()
         self.root.destroy()
 
 
@@ -868,8 +1139,8 @@ if __name__ == "__main__":
     # Create a root window
     root = tk.Tk()
     
-    # Initialize a dummy database manager (replace with actual implementation)
-    db_manager = DatabaseManager()  # Ensure this is properly implemented
+    # Shared database manager for the login window and the portal
+    db_manager = acquire_database()
     
     # Simulate the login process
     login_window = AdminLoginWindow(root, db_manager)
@@ -892,3 +1163,4 @@ if __name__ == "__main__":
     login_window.on_login_success = on_login_success
     
     root.mainloop()
+    release_database(db_manager)
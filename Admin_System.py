@@ -3,7 +3,8 @@ from tkinter import messagebox, font
 from PIL import Image, ImageTk
 import os
 import time
-from database import DatabaseManager  # Import DatabaseManager
+from gradient import GradientBackground
+from database import acquire_database, release_database, shared_database
 
 class AdminLoginWindow:
     def __init__(self, root, user_login_root=None, width=600, height=400):
@@ -11,24 +12,23 @@ class AdminLoginWindow:
         self.user_login_root = user_login_root
         self.root.title("Admin Login")
 
-        # Initialize database connection
-        self.db = DatabaseManager()
+        # Initialize database connection (shared with the other windows)
+        self.db = acquire_database()
+        self.root.bind("<Destroy>", self.on_destroy, add="+")
 
         # Set an initial size to avoid sudden expansion
         self.root.geometry(f"{width}x{height}")  # Adjust as needed
         self.root.resizable(True, True)
 
-        # Create canvas for the gradient background
+        # Create canvas for the gradient background, redrawn once a resize settles
         self.canvas = tk.Canvas(self.root, highlightthickness=0)
         self.canvas.pack(fill="both", expand=True)
+        self.background = GradientBackground(self.canvas)
 
         # Create login frame
         self.login_frame = tk.Frame(self.canvas, bg="white", bd=5, relief="flat")
         self.login_frame.place(relx=0.5, rely=0.5, anchor="center")
 
-        # Bind resize event
-        self.root.bind("<Configure>", self.on_resize)
-
         # Load icons and background image
         self.load_resources()
 
@@ -108,11 +108,6 @@ class AdminLoginWindow:
         self.back_button = tk.Button(self.login_frame, text="Back to User Login", font=("Arial", 10), bg="#ddd", width=15, command=self.back_to_user_login)
         self.back_button.grid(row=7, column=0, columnspan=2, pady=10)
 
-    def on_resize(self, event):
-        # Update the gradient on window resize
-        self.create_gradient()
-        self.login_frame.place(relx=0.5, rely=0.5, anchor="center")
-    
     def clear_placeholder(self, entry, placeholder):
         if entry.get() == placeholder:
             entry.delete(0, tk.END)
@@ -135,6 +130,11 @@ class AdminLoginWindow:
         else:
             messagebox.showerror("Error", f"Admin login failed for email: {email}. {result}")
     
+    def on_destroy(self, event):
+        """Release the shared database when the admin login window closes."""
+        if event.widget is self.root:
+            release_database(self.db)
+
     def back_to_user_login(self):
         if self.user_login_root:
             # Destroy the admin login window
@@ -145,43 +145,8 @@ class AdminLoginWindow:
             print("User login window reference not set")
 
     def create_gradient(self):
-        """Creates a gradient background canvas."""
-        width = self.root.winfo_width()
-        height = self.root.winfo_height()
-        
-        self.canvas.delete("all")
-        
-        # Create gradient (blue to red)
-        colors = [
-            (0, 0, 255),      # Blue
-            (75, 0, 230),     # Blue-purple
-            (150, 0, 180),    # Purple
-            (200, 0, 130),    # Purple-red
-            (255, 0, 0)       # Red
-        ]
-        
-        segments = len(colors) - 1
-        segment_width = width / segments
-        
-        for i in range(segments):
-            start_color = colors[i]
-            end_color = colors[i+1]
-            
-            for j in range(int(segment_width)):
-                # Position within this segment (0 to 1)
-                pos = j / segment_width
-                
-                # Calculate color for this position
-                r = int(start_color[0] + (end_color[0] - start_color[0]) * pos)
-                g = int(start_color[1] + (end_color[1] - start_color[1]) * pos)
-                b = int(start_color[2] + (end_color[2] - start_color[2]) * pos)
-                
-                # Calculate the x position
-                x = int(i * segment_width + j)
-                
-                # Draw the vertical line
-                color = f'#{r:02x}{g:02x}{b:02x}'
-                self.canvas.create_line(x, 0, x, height, fill=color)
+        """Draws the gradient background at the current window size."""
+        self.background.draw(self.root.winfo_width(), self.root.winfo_height())
 
     def show_forgot_password(self, event):
         """Displays the password forgot screen."""
@@ -384,6 +349,8 @@ class AdminLoginWindow:
 
 
 if __name__ == "__main__":
-    root = tk.Tk()
-    app = AdminLoginWindow(root)
-    root.mainloop()
\ No newline at end of file
+    # Keep the shared database open while moving between the admin windows
+    with shared_database():
+        root = tk.Tk()
+        app = AdminLoginWindow(root)
+        root.mainloop()
\ No newline at end of file
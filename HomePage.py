@@ -3,14 +3,21 @@ from tkinter import ttk, messagebox
 import datetime
 import random
 import sqlite3
-from database import DatabaseManager
+from database import acquire_database, release_database, shared_database
+from change_watcher import ChangeWatcher
+from db_executor import BackgroundExecutor
+from widget_pool import CardPool, VirtualCardList
 
 class FoodOrderingSystem:
     def __init__(self, root, user_email=None):
         self.root = root
         self.user_email = user_email
         print(f"Initializing with user email: {user_email}")  # Debug print
-        self.db = DatabaseManager()
+        # Shared with the other windows of this process
+        self.db = acquire_database()
+        self.root.bind("<Destroy>", self.on_destroy, add="+")
+        # Run slow queries off the Tk thread
+        self.executor = BackgroundExecutor(self.root, db=self.db)
         self.cart_items = []
         # Store the user email for cart operations
         self.current_user_email = user_email
@@ -31,6 +38,26 @@ class FoodOrderingSystem:
         # Display restaurants when app starts
         self.display_restaurants_in_main_window()
 
+        # Keep ratings and tracked orders current when other windows change them
+        self.watcher = ChangeWatcher(self.root, self.db, self.executor)
+        self.watcher.subscribe(["restaurants", "menu_categories", "menu_items", "ratings"], self.on_catalog_changed)
+        self.watcher.start()
+
+    def on_catalog_changed(self, changes):
+        # Another window or process changed the catalog: drop what the cache holds for those tables
+        tables = {change['table_name'] for change in changes}
+        self.db.bump_table_versions(*tables)
+        if tables & {"restaurants", "ratings"}:
+            self.display_restaurants_in_main_window()
+
+    def on_destroy(self, event):
+        # Stop polling and the workers, then release the shared database when the home page closes
+        if event.widget is self.root:
+            if hasattr(self, "watcher"):
+                self.watcher.stop()
+            self.executor.shutdown()
+            release_database(self.db)
+
     def create_top_bar(self):
         # Top bar frame
         top_frame = tk.Frame(self.root, bg="white", height=80)
@@ -44,15 +71,18 @@ class FoodOrderingSystem:
         title = tk.Label(top_frame, text="FoodExpress", font=("Arial", 24, "bold"), fg="#FF6347", bg="white")
         title.pack(side="left", padx=10, pady=20)
 
-        # User greeting
-        user_name = "User"
-        if self.user_email:
-            success, user_data = self.db.verify_user_login(self.user_email, "")
-            if success and user_data:
-                user_name = user_data.get('username', "User")
-        username = tk.Label(top_frame, text=f"{greeting}, {user_name}", font=("Arial", 14), bg="white")
+        # User greeting; the user's name replaces "User" once it has been looked up
+        username = tk.Label(top_frame, text=f"{greeting}, User", font=("Arial", 14), bg="white")
         username.pack(side="left", padx=20, pady=20)
 
+        def show_user_name(result):
+            success, user_data = result
+            if success and user_data and username.winfo_exists():
+                username.config(text=f"{greeting}, {user_data.get('username', 'User')}")
+
+        if self.user_email:
+            self.executor.submit(self.db.verify_user_login, self.user_email, "", on_success=show_user_name)
+
         # Search bar
         search_var = tk.StringVar()
         search_frame = tk.Frame(top_frame, bg="#f0f0f0", height=30, width=300)
@@ -180,109 +210,52 @@ class FoodOrderingSystem:
         scrollbar = ttk.Scrollbar(self.main_content, orient="vertical", command=self.canvas.yview)
         scrollbar.pack(side="right", fill="y")
 
-        self.canvas.configure(yscrollcommand=scrollbar.set)
-        self.canvas.bind('<Configure>', lambda e: self.canvas.configure(scrollregion=self.canvas.bbox("all")))
+        # Only the restaurants in view get a card; more are read from the database while scrolling
+        self.restaurant_list = VirtualCardList(self.canvas, scrollbar, self.build_restaurant_card,
+                                               self.fill_restaurant_card, self.load_restaurants_page,
+                                               self.executor)
 
-        # Create another frame inside the canvas for the restaurant cards
-        self.restaurants_frame = tk.Frame(self.canvas, bg="white")
-        self.canvas.create_window((0, 0), window=self.restaurants_frame, anchor="nw")
-
-    def create_restaurant_card(self, parent, restaurant_id, name, rating):
+    def build_restaurant_card(self, parent):
         card = tk.Frame(parent, bg="white", bd=1, relief="solid", padx=10, pady=10)
-        card.pack(pady=8, fill="x")
-        name_label = tk.Label(card, text=name, font=("Arial", 16, "bold"), bg="white")
+        name_label = tk.Label(card, font=("Arial", 16, "bold"), bg="white")
         name_label.pack(anchor="w")
-        info = f"⭐ {rating}"
-        info_label = tk.Label(card, text=info, font=("Arial", 12), bg="white", fg="#555")
+        info_label = tk.Label(card, font=("Arial", 12), bg="white", fg="#555")
         info_label.pack(anchor="w")
 
         # Add a view menu button
         view_menu_btn = tk.Button(card, text="View Menu", bg="#FF6347", fg="white",
-                                 font=("Arial", 10), relief="flat", padx=5, pady=2,
-                                 command=lambda r_id=restaurant_id, r_name=name:
-                                 self.display_restaurant_menu(r_id, r_name))
+                                 font=("Arial", 10), relief="flat", padx=5, pady=2)
         view_menu_btn.pack(anchor="e", pady=5)
 
         # Add a rate restaurant button
         rate_btn = tk.Button(card, text="Rate Restaurant", bg="#4CAF50", fg="white",
-                            font=("Arial", 10), relief="flat", padx=5, pady=2,
-                            command=lambda r_id=restaurant_id, r_name=name:
-                            self.show_rating_dialog(r_id, r_name))
+                            font=("Arial", 10), relief="flat", padx=5, pady=2)
         rate_btn.pack(anchor="e", pady=5)
 
-        # Make the entire card clickable
-        card.bind("<Button-1>", lambda event, r_id=restaurant_id, r_name=name:
-                 self.display_restaurant_menu(r_id, r_name))
-        name_label.bind("<Button-1>", lambda event, r_id=restaurant_id, r_name=name:
-                       self.display_restaurant_menu(r_id, r_name))
-        info_label.bind("<Button-1>", lambda event, r_id=restaurant_id, r_name=name:
-                       self.display_restaurant_menu(r_id, r_name))
+        return {'frame': card, 'name': name_label, 'info': info_label,
+                'view_menu': view_menu_btn, 'rate': rate_btn}
 
-    def display_restaurants_in_main_window(self):
-        # Clear existing content
-        for widget in self.restaurants_frame.winfo_children():
-            widget.destroy()
-
-        # Fetch restaurant data from the database
-        restaurants = self.db.get_all_restaurants()
-
-        # Display each restaurant in a card
-        for restaurant in restaurants:
-            self.create_restaurant_card(
-                self.restaurants_frame,
-                restaurant['restaurant_id'],
-                restaurant['name'],
-                restaurant['rating']
-            )
+    def fill_restaurant_card(self, card, restaurant):
+        r_id, r_name = restaurant['restaurant_id'], restaurant['name']
+        card['name'].config(text=r_name)
+        card['info'].config(text=f"⭐ {restaurant['rating']}")
+        card['view_menu'].config(command=lambda: self.display_restaurant_menu(r_id, r_name))
+        card['rate'].config(command=lambda: self.show_rating_dialog(r_id, r_name))
 
-        # Update the scroll region
-        self.restaurants_frame.update_idletasks()
-        self.canvas.configure(scrollregion=self.canvas.bbox("all"))
+        # Make the entire card clickable
+        for widget in (card['frame'], card['name'], card['info']):
+            widget.bind("<Button-1>", lambda event: self.display_restaurant_menu(r_id, r_name))
 
-    def debug_database_content(self, restaurant_id):
-        """Print all categories and menu items for a restaurant"""
-        try:
-            print(f"\n=== Database Debug for Restaurant ID: {restaurant_id} ===")
-            
-            # Print all categories for this restaurant
-            self.db.cursor.execute("""
-                SELECT * FROM menu_categories 
-                WHERE restaurant_id = ?
-            """, (restaurant_id,))
-            categories = self.db.cursor.fetchall()
-            print(f"Categories for restaurant {restaurant_id}:")
-            for cat in categories:
-                print(f"  ID: {cat['category_id']}, Name: {cat['name']}")
-            
-            # Print all menu items for this restaurant
-            self.db.cursor.execute("""
-                SELECT * FROM menu_items 
-                WHERE restaurant_id = ?
-            """, (restaurant_id,))
-            items = self.db.cursor.fetchall()
-            print(f"Menu items for restaurant {restaurant_id}:")
-            for item in items:
-                print(f"  ID: {item['item_id']}, Name: {item['name']}, Category ID: {item['category_id']}")
-            
-            # Check specific categories
-            for cat in categories:
-                cat_id = cat['category_id']
-                self.db.cursor.execute("""
-                    SELECT COUNT(*) as count FROM menu_items 
-                    WHERE restaurant_id = ? AND category_id = ?
-                """, (restaurant_id, cat_id))
-                count_result = self.db.cursor.fetchone()
-                count = count_result['count'] if count_result else 0
-                print(f"  Category {cat['name']} (ID: {cat_id}) has {count} items")
-            
-            print("=== End Database Debug ===\n")
-        except Exception as e:
-            print(f"Error in debug_database_content: {e}")
+    def load_restaurants_page(self, last_restaurant, limit):
+        # Runs on a worker thread; pages are keyed on the last restaurant id and served from memory until they change
+        after_id = last_restaurant['restaurant_id'] if last_restaurant else None
+        return self.db.catalog.get_restaurants_page(after_id, limit)
+
+    def display_restaurants_in_main_window(self):
+        # Read the restaurants again, reusing the cards already on screen
+        self.restaurant_list.reload()
 
     def display_restaurant_menu(self, restaurant_id, restaurant_name):
-        # Debug database content first
-        self.debug_database_content(restaurant_id)
-        
         # Create a new window for the restaurant menu
         menu_window = tk.Toplevel(self.root)
         menu_window.title(f"{restaurant_name} - Menu")
@@ -306,36 +279,17 @@ class FoodOrderingSystem:
         tk.Label(category_frame, text="Select Category:",
                 font=("Arial", 14, "bold"), bg="white").pack(side="left", padx=5)
 
-        # Fetch unique categories for this restaurant
-        self.db.cursor.execute("""
-            SELECT category_id, name
-            FROM menu_categories
-            WHERE restaurant_id = ?
-            GROUP BY name  -- This ensures we get unique category names
-            ORDER BY category_id
-        """, (restaurant_id,))
-        categories = self.db.cursor.fetchall()
-
         # Create a StringVar for the selected category
         category_var = tk.StringVar()
 
-        # Create the dropdown with category names
-        category_names = [category['name'] for category in categories]
-        
-        # Create a dictionary to map category names to IDs - FIX: Use the actual category_id from database
-        self.category_map = {}
-        for category in categories:
-            self.category_map[category['name']] = category['category_id']
-            print(f"Adding to category map: {category['name']} -> {category['category_id']}")
-
-        # Create the combobox
+        # Create the combobox; its categories are filled in once the menu is loaded
         category_dropdown = ttk.Combobox(category_frame, textvariable=category_var,
-                                        values=category_names, width=30, state="readonly")
+                                        values=[], width=30, state="readonly")
         category_dropdown.pack(side="left", padx=10)
 
-        # Set the default value to the first category if available
-        if category_names:
-            category_dropdown.current(0)
+        # The menu tree of this window, and its category names mapped to IDs
+        loaded_menu = []
+        category_map = {}
 
         # Create a frame for menu items with scrollbar
         items_frame_container = tk.Frame(main_frame, bg="white")
@@ -353,126 +307,120 @@ class FoodOrderingSystem:
         canvas.bind('<Configure>', lambda e: canvas.configure(scrollregion=canvas.bbox("all")))
 
         # Create a frame inside the canvas for the menu items
-        self.menu_items_frame = tk.Frame(canvas, bg="white")
-        canvas.create_window((0, 0), window=self.menu_items_frame, anchor="nw")
+        menu_items_frame = tk.Frame(canvas, bg="white")
+        canvas.create_window((0, 0), window=menu_items_frame, anchor="nw")
+
+        # Menu item cards are reused when switching categories
+        menu_item_cards = CardPool(menu_items_frame, self.build_menu_item_card,
+                                   self.fill_menu_item_card, fill="x", pady=5, padx=10)
+
+        def load_menu():
+            # Load every category with its items in one round trip (from memory if unchanged);
+            # a newer load for this window supersedes this one
+            self.executor.submit(
+                self.db.catalog.get_menu, restaurant_id,
+                on_success=menu_loaded,
+                on_error=show_menu_error,
+                key=("menu", str(menu_window))
+            )
+
+        def menu_loaded(menu):
+            if not menu_window.winfo_exists():
+                return
+
+            loaded_menu[:] = menu
+            category_map.clear()
+            category_map.update({category['name']: category['category_id'] for category in menu})
+            category_names = list(category_map)
+            category_dropdown.config(values=category_names)
+
+            # Keep the selected category if it still exists, otherwise show the first one
+            if category_var.get() not in category_map:
+                category_var.set(category_names[0] if category_names else "")
+            show_category_items()
 
-        # Function to display menu items for the selected category
         def show_category_items(*args):
-            # Clear existing menu items
-            for widget in self.menu_items_frame.winfo_children():
-                widget.destroy()
+            # Clear messages left by the previous category
+            menu_item_cards.clear_messages()
             
             selected_category = category_var.get()
             if selected_category:
-                category_id = self.category_map[selected_category]
+                category_id = category_map[selected_category]
                 
-                # Debug print to verify the category_id
-                print(f"Selected category: {selected_category}, ID: {category_id}")
-                print(f"Restaurant ID: {restaurant_id}")
+                # Switch categories from the menu tree loaded for this window
+                menu_items = next(
+                    (category['items'] for category in loaded_menu if category['category_id'] == category_id), []
+                )
+                show_menu_items(selected_category, category_id, menu_items)
+
+        def show_menu_items(selected_category, category_id, menu_items):
+            # Display each menu item
+            menu_item_cards.show(menu_items)
+            if not menu_items:
+                # Display a message if no items in this category
+                no_items_label = tk.Label(menu_items_frame, text="No items in this category",
+                                         font=("Arial", 12), bg="white", fg="#555")
+                no_items_label.pack(pady=20)
                 
-                # Fetch menu items for this category with explicit column names
-                try:
-                    self.db.cursor.execute("""
-                        SELECT DISTINCT item_id, restaurant_id, category_id, name, description, price 
-                        FROM menu_items
-                        WHERE restaurant_id = ? AND category_id = ?
-                    """, (restaurant_id, category_id))
-                    
-                    menu_items = self.db.cursor.fetchall()
-                    
-                    # Debug output - check what we're getting from the database
-                    print(f"Query executed: SELECT * FROM menu_items WHERE restaurant_id = {restaurant_id} AND category_id = {category_id}")
-                    print(f"Found {len(menu_items)} items for category {selected_category}")
-                    if menu_items:
-                        for item in menu_items:
-                            print(f"  Item: {item['name']}, Category ID: {item['category_id']}")
-                    
-                    # Display each menu item
-                    if menu_items:
-                        for item in menu_items:
-                            self.create_menu_item_card(self.menu_items_frame, item, restaurant_id)
-                    else:
-                        # Display a message if no items in this category
-                        no_items_label = tk.Label(self.menu_items_frame, text="No items in this category",
-                                                 font=("Arial", 12), bg="white", fg="#555")
-                        no_items_label.pack(pady=20)
-                        
-                        # Add a button to add items to this category (for testing)
-                        add_test_item_btn = tk.Button(self.menu_items_frame, text="Add Test Item", 
-                                                     bg="#FF6347", fg="white",
-                                                     command=lambda: self.add_test_item(restaurant_id, category_id, selected_category))
-                        add_test_item_btn.pack(pady=10)
-                except Exception as e:
-                    print(f"Error fetching menu items: {e}")
-                    error_label = tk.Label(self.menu_items_frame, text=f"Error loading menu items: {str(e)}",
-                                          font=("Arial", 12), bg="white", fg="red")
-                    error_label.pack(pady=20)
+                # Add a button to add items to this category (for testing)
+                add_test_item_btn = tk.Button(menu_items_frame, text="Add Test Item", 
+                                             bg="#FF6347", fg="white",
+                                             command=lambda: self.add_test_item(restaurant_id, category_id, selected_category,
+                                                                                load_menu))
+                add_test_item_btn.pack(pady=10)
             
             # Update the scroll region
-            self.menu_items_frame.update_idletasks()
+            menu_items_frame.update_idletasks()
             canvas.configure(scrollregion=canvas.bbox("all"))
 
+        def show_menu_error(e):
+            if not menu_window.winfo_exists():
+                return
+            print(f"Error fetching menu items: {e}")
+            menu_item_cards.show([])
+            error_label = tk.Label(menu_items_frame, text=f"Error loading menu items: {str(e)}",
+                                  font=("Arial", 12), bg="white", fg="red")
+            error_label.pack(pady=20)
+
         # Bind the combobox selection to the show_category_items function
         category_dropdown.bind("<<ComboboxSelected>>", show_category_items)
         
-        # Also show items for the first category by default
-        if category_names:
-            # Set a small delay to ensure the UI is fully loaded
-            menu_window.after(100, show_category_items)
+        # Load the menu; the first category is shown once it arrives
+        load_menu()
 
-    def add_test_item(self, restaurant_id, category_id, category_name):
-        try:
+    def add_test_item(self, restaurant_id, category_id, category_name, reload_menu):
+        def insert_item():
             # Add a sample menu item for testing
             current_time = datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-            self.db.cursor.execute("""
-                INSERT INTO menu_items (restaurant_id, category_id, name, description, price, created_at)
-                VALUES (?, ?, ?, ?, ?, ?)
-            """, (restaurant_id, category_id, f"Test {category_name}", f"Test description for {category_name}", 99.00, current_time))
-            
-            self.db.conn.commit()
+            with self.db.transaction():
+                self.db.execute("""
+                    INSERT INTO menu_items (restaurant_id, category_id, name, description, price, created_at)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                """, (restaurant_id, category_id, f"Test {category_name}", f"Test description for {category_name}", 99.00, current_time))
+            self.db.bump_table_versions("menu_items")
+
+        def item_added(result):
             messagebox.showinfo("Success", "Test item added successfully")
-            
-            # Refresh the menu items display - modified to work without direct reference
-            for widget in self.menu_items_frame.winfo_children():
-                widget.destroy()
-                
-            # Re-fetch items for the current category
-            self.db.cursor.execute("""
-                SELECT * FROM menu_items
-                WHERE restaurant_id = ? AND category_id = ?
-            """, (restaurant_id, category_id))
-            
-            menu_items = self.db.cursor.fetchall()
-            
-            if menu_items:
-                for item in menu_items:
-                    self.create_menu_item_card(self.menu_items_frame, item, restaurant_id)
-            else:
-                no_items_label = tk.Label(self.menu_items_frame, text="No items in this category",
-                                        font=("Arial", 12), bg="white", fg="#555")
-                no_items_label.pack(pady=20)
-                
-                # Add the button again
-                add_test_item_btn = tk.Button(self.menu_items_frame, text="Add Test Item", 
-                                            bg="#FF6347", fg="white",
-                                            command=lambda: self.add_test_item(restaurant_id, category_id, category_name))
-                add_test_item_btn.pack(pady=10)
-        except Exception as e:
-            self.db.conn.rollback()
-            messagebox.showerror("Error", f"Failed to add test item: {e}")
+            # Refresh the menu window the item was added from
+            reload_menu()
 
-    def create_menu_item_card(self, parent, item, restaurant_id):
+        self.executor.submit(
+            insert_item,
+            on_success=item_added,
+            on_error=lambda e: messagebox.showerror("Error", f"Failed to add test item: {e}")
+        )
+
+    def build_menu_item_card(self, parent):
         item_frame = tk.Frame(parent, bg="white", bd=1, relief="solid", padx=15, pady=10)
-        item_frame.pack(fill="x", pady=5, padx=10)
 
         # Item details
-        name_label = tk.Label(item_frame, text=item['name'], font=("Arial", 14, "bold"), bg="white")
+        name_label = tk.Label(item_frame, font=("Arial", 14, "bold"), bg="white")
         name_label.grid(row=0, column=0, sticky="w")
 
-        price_label = tk.Label(item_frame, text=f"₹{item['price']:.2f}", font=("Arial", 14), bg="white", fg="#FF6347")
+        price_label = tk.Label(item_frame, font=("Arial", 14), bg="white", fg="#FF6347")
         price_label.grid(row=0, column=1, sticky="e", padx=(150, 0))
 
-        desc_label = tk.Label(item_frame, text=item['description'], font=("Arial", 12), bg="white", fg="#555",
+        desc_label = tk.Label(item_frame, font=("Arial", 12), bg="white", fg="#555",
                              wraplength=400, justify="left")
         desc_label.grid(row=1, column=0, columnspan=2, sticky="w", pady=5)
 
@@ -480,13 +428,14 @@ class FoodOrderingSystem:
         quantity_frame = tk.Frame(item_frame, bg="white")
         quantity_frame.grid(row=2, column=0, columnspan=2, sticky="e", pady=5)
 
+        # Quantity display
+        quantity_var = tk.StringVar(value="1")
+
         # Decrease quantity button
         decrease_btn = tk.Button(quantity_frame, text="-", font=("Arial", 12, "bold"), bg="#f0f0f0",
                                 command=lambda: self.update_quantity(quantity_var, -1))
         decrease_btn.grid(row=0, column=0, padx=2)
 
-        # Quantity display
-        quantity_var = tk.StringVar(value="1")
         quantity_label = tk.Label(quantity_frame, textvariable=quantity_var, font=("Arial", 12),
                                  width=2, bg="white")
         quantity_label.grid(row=0, column=1, padx=5)
@@ -498,10 +447,22 @@ class FoodOrderingSystem:
 
         # Add to cart button
         add_to_cart_btn = tk.Button(quantity_frame, text="Add to Cart", bg="#FF6347", fg="white",
-                                   font=("Arial", 10), relief="flat", padx=10, pady=2,
-                                   command=lambda: self.add_item_to_cart(item, restaurant_id, int(quantity_var.get())))
+                                   font=("Arial", 10), relief="flat", padx=10, pady=2)
         add_to_cart_btn.grid(row=0, column=3, padx=10)
 
+        return {'frame': item_frame, 'name': name_label, 'price': price_label, 'description': desc_label,
+                'quantity': quantity_var, 'add_to_cart': add_to_cart_btn}
+
+    def fill_menu_item_card(self, card, item):
+        card['name'].config(text=item['name'])
+        card['price'].config(text=f"₹{item['price']:.2f}")
+        card['description'].config(text=item['description'])
+        quantity_var = card['quantity']
+        quantity_var.set("1")
+        card['add_to_cart'].config(
+            command=lambda: self.add_item_to_cart(item, item['restaurant_id'], int(quantity_var.get()))
+        )
+
     def update_quantity(self, quantity_var, change):
         current = int(quantity_var.get())
         new_value = current + change
@@ -517,46 +478,53 @@ class FoodOrderingSystem:
             messagebox.showinfo("Login Required", "Please login to add items to cart")
             return
 
-        # Get user_id from email
-        self.db.cursor.execute("SELECT user_id FROM users WHERE email = ?", (user_email,))
-        user_data = self.db.cursor.fetchone()
-        if not user_data:
-            messagebox.showinfo("Error", "User not found")
-            return
+        def save_cart_item():
+            # Runs on a worker thread; returns False when the user does not exist
+            cursor = self.db.execute("SELECT user_id FROM users WHERE email = ?", (user_email,))
+            user_data = cursor.fetchone()
+            if not user_data:
+                return False
+
+            user_id = user_data['user_id']
+            item_id = item['item_id']
+
+            with self.db.transaction():
+                # Check if item already exists in cart
+                cursor = self.db.execute("""
+                    SELECT * FROM cart_items
+                    WHERE user_id = ? AND item_id = ? AND restaurant_id = ?
+                """, (user_id, item_id, restaurant_id))
+                existing_cart_item = cursor.fetchone()
+
+                if existing_cart_item:
+                    # Update quantity if item already in cart
+                    new_quantity = existing_cart_item['quantity'] + quantity
+                    self.db.execute("""
+                        UPDATE cart_items
+                        SET quantity = ?
+                        WHERE cart_item_id = ?
+                    """, (new_quantity, existing_cart_item['cart_item_id']))
+                else:
+                    # Add new item to cart
+                    current_time = datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+                    self.db.execute("""
+                        INSERT INTO cart_items
+                        (user_id, item_id, restaurant_id, quantity, created_at)
+                        VALUES (?, ?, ?, ?, ?)
+                    """, (user_id, item_id, restaurant_id, quantity, current_time))
+            return True
 
-        user_id = user_data['user_id']
-        item_id = item['item_id']
-
-        # Check if item already exists in cart
-        self.db.cursor.execute("""
-            SELECT * FROM cart_items
-            WHERE user_id = ? AND item_id = ? AND restaurant_id = ?
-        """, (user_id, item_id, restaurant_id))
-        existing_cart_item = self.db.cursor.fetchone()
-
-        try:
-            if existing_cart_item:
-                # Update quantity if item already in cart
-                new_quantity = existing_cart_item['quantity'] + quantity
-                self.db.cursor.execute("""
-                    UPDATE cart_items
-                    SET quantity = ?
-                    WHERE cart_item_id = ?
-                """, (new_quantity, existing_cart_item['cart_item_id']))
+        def cart_item_saved(saved):
+            if saved:
+                messagebox.showinfo("Success", f"{quantity} x {item['name']} added to cart")
             else:
-                # Add new item to cart
-                current_time = datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-                self.db.cursor.execute("""
-                    INSERT INTO cart_items
-                    (user_id, item_id, restaurant_id, quantity, created_at)
-                    VALUES (?, ?, ?, ?, ?)
-                """, (user_id, item_id, restaurant_id, quantity, current_time))
-
-            self.db.conn.commit()
-            messagebox.showinfo("Success", f"{quantity} x {item['name']} added to cart")
-        except Exception as e:
-            self.db.conn.rollback()
-            messagebox.showerror("Error", f"Failed to add item to cart: {e}")
+                messagebox.showinfo("Error", "User not found")
+
+        self.executor.submit(
+            save_cart_item,
+            on_success=cart_item_saved,
+            on_error=lambda e: messagebox.showerror("Error", f"Failed to add item to cart: {e}")
+        )
 
     def display_cart(self):
         # Create a new window for the cart
@@ -591,6 +559,14 @@ class FoodOrderingSystem:
         cart_frame = tk.Frame(canvas, bg="white")
         canvas.create_window((0, 0), window=cart_frame, anchor="nw")
 
+        # Cart item cards are reused when the cart is refreshed
+        self.cart_window = cart_window
+        self.cart_cards = CardPool(cart_frame, self.build_cart_item_card, self.fill_cart_item_card)
+        self.cart_total_frame = None
+
+        self.load_cart(cart_window, cart_frame)
+
+    def load_cart(self, cart_window, cart_frame):
         # Get the current user's ID
         user_email = self.current_user_email
         if not user_email:
@@ -599,30 +575,45 @@ class FoodOrderingSystem:
             empty_label.pack(pady=50)
             return
 
-        # Get user_id from email
-        self.db.cursor.execute("SELECT user_id FROM users WHERE email = ?", (user_email,))
-        user_data = self.db.cursor.fetchone()
-        if not user_data:
-            empty_label = tk.Label(cart_frame, text="User not found",
-                                  font=("Arial", 14), bg="white", fg="#555")
-            empty_label.pack(pady=50)
+        def fetch_cart():
+            # Get user_id from email
+            cursor = self.db.execute("SELECT user_id FROM users WHERE email = ?", (user_email,))
+            user_data = cursor.fetchone()
+            if not user_data:
+                return None, []
+
+            # Fetch cart items with menu item details
+            cursor = self.db.execute("""
+                SELECT ci.cart_item_id, ci.quantity, mi.name, mi.price, mi.item_id,
+                       r.name as restaurant_name, r.restaurant_id
+                FROM cart_items ci
+                JOIN menu_items mi ON ci.item_id = mi.item_id
+                JOIN restaurants r ON ci.restaurant_id = r.restaurant_id
+                WHERE ci.user_id = ?
+            """, (user_data['user_id'],))
+            return user_data['user_id'], cursor.fetchall()
+
+        # A newer refresh of the cart supersedes this one
+        self.executor.submit(
+            fetch_cart,
+            on_success=lambda result: self.show_cart_contents(cart_window, cart_frame, *result),
+            on_error=lambda e: messagebox.showerror("Error", f"Failed to load cart: {e}"),
+            key=("cart", str(cart_window))
+        )
+
+    def show_cart_contents(self, cart_window, cart_frame, user_id, cart_items):
+        if not cart_window.winfo_exists():
             return
 
-        user_id = user_data['user_id']
-
-        # Fetch cart items with menu item details
-        self.db.cursor.execute("""
-            SELECT ci.cart_item_id, ci.quantity, mi.name, mi.price, mi.item_id,
-                   r.name as restaurant_name, r.restaurant_id
-            FROM cart_items ci
-            JOIN menu_items mi ON ci.item_id = mi.item_id
-            JOIN restaurants r ON ci.restaurant_id = r.restaurant_id
-            WHERE ci.user_id = ?
-        """, (user_id,))
-        cart_items = self.db.cursor.fetchall()
-
-        if not cart_items:
-            empty_label = tk.Label(cart_frame, text="Your cart is empty",
+        # Clear messages and totals from the previous refresh; item cards are reused
+        self.cart_cards.clear_messages()
+        if self.cart_total_frame is not None:
+            self.cart_total_frame.destroy()
+            self.cart_total_frame = None
+
+        if user_id is None or not cart_items:
+            self.cart_cards.show([])
+            empty_label = tk.Label(cart_frame, text="User not found" if user_id is None else "Your cart is empty",
                                   font=("Arial", 14), bg="white", fg="#555")
             empty_label.pack(pady=50)
             return
@@ -638,24 +629,17 @@ class FoodOrderingSystem:
                 }
             restaurants[restaurant_id]['items'].append(item)
 
-        # Display items grouped by restaurant
+        # Display items grouped by restaurant; the first card of each group carries the restaurant header
         total_price = 0
+        rows = []
         for restaurant_id, restaurant_data in restaurants.items():
-            # Restaurant header
-            restaurant_frame = tk.Frame(cart_frame, bg="#f9f9f9", padx=10, pady=5)
-            restaurant_frame.pack(fill="x", pady=5)
-            restaurant_label = tk.Label(restaurant_frame, text=restaurant_data['name'],
-                                       font=("Arial", 14, "bold"), bg="#f9f9f9")
-            restaurant_label.pack(anchor="w")
-
-            # Display each cart item
-            for item in restaurant_data['items']:
-                item_price = item['price'] * item['quantity']
-                total_price += item_price
-                self.create_cart_item_card(cart_frame, item, self.update_cart_display)
+            for index, item in enumerate(restaurant_data['items']):
+                total_price += item['price'] * item['quantity']
+                rows.append((restaurant_data['name'] if index == 0 else None, item))
+        self.cart_cards.show(rows)
 
         # Total price display
-        total_frame = tk.Frame(cart_window, bg="white", height=100)
+        total_frame = self.cart_total_frame = tk.Frame(cart_window, bg="white", height=100)
         total_frame.pack(fill="x", side="bottom", padx=20, pady=10)
         ttk.Separator(total_frame, orient='horizontal').pack(fill='x', pady=5)
         total_label = tk.Label(total_frame, text=f"Total: ₹{total_price:.2f}",
@@ -674,16 +658,21 @@ class FoodOrderingSystem:
                             command=cart_window.destroy)
         back_btn.pack(side="right", padx=10, pady=10)
 
-    def create_cart_item_card(self, parent, item, callback):
-        item_frame = tk.Frame(parent, bg="white", bd=1, relief="solid", padx=10, pady=5)
+    def build_cart_item_card(self, parent):
+        card = tk.Frame(parent, bg="white")
+
+        # Restaurant header, shown on the first item of each restaurant
+        restaurant_frame = tk.Frame(card, bg="#f9f9f9", padx=10, pady=5)
+        restaurant_label = tk.Label(restaurant_frame, font=("Arial", 14, "bold"), bg="#f9f9f9")
+        restaurant_label.pack(anchor="w")
+
+        item_frame = tk.Frame(card, bg="white", bd=1, relief="solid", padx=10, pady=5)
         item_frame.pack(fill="x", pady=3, padx=10)
 
         # Item name and price
-        name_label = tk.Label(item_frame, text=item['name'], font=("Arial", 12, "bold"), bg="white")
+        name_label = tk.Label(item_frame, font=("Arial", 12, "bold"), bg="white")
         name_label.grid(row=0, column=0, sticky="w")
-        item_price = item['price'] * item['quantity']
-        price_label = tk.Label(item_frame, text=f"₹{item_price:.2f}", font=("Arial", 12),
-                              bg="white", fg="#FF6347")
+        price_label = tk.Label(item_frame, font=("Arial", 12), bg="white", fg="#FF6347")
         price_label.grid(row=0, column=2, sticky="e", padx=10)
 
         # Quantity controls
@@ -693,65 +682,86 @@ class FoodOrderingSystem:
         quantity_label.grid(row=0, column=0)
 
         # Decrease quantity button
-        decrease_btn = tk.Button(quantity_frame, text="-", font=("Arial", 10), bg="#f0f0f0",
-                                command=lambda: self.update_cart_item_quantity(item['cart_item_id'],
-                                                                             item['quantity'] - 1,
-                                                                             callback))
+        decrease_btn = tk.Button(quantity_frame, text="-", font=("Arial", 10), bg="#f0f0f0")
         decrease_btn.grid(row=0, column=1, padx=2)
 
         # Quantity display
-        quantity_var = tk.StringVar(value=str(item['quantity']))
-        quantity_display = tk.Label(quantity_frame, textvariable=quantity_var, font=("Arial", 10),
-                                   width=2, bg="white")
+        quantity_display = tk.Label(quantity_frame, font=("Arial", 10), width=2, bg="white")
         quantity_display.grid(row=0, column=2, padx=5)
 
         # Increase quantity button
-        increase_btn = tk.Button(quantity_frame, text="+", font=("Arial", 10), bg="#f0f0f0",
-                                command=lambda: self.update_cart_item_quantity(item['cart_item_id'],
-                                                                             item['quantity'] + 1,
-                                                                             callback))
+        increase_btn = tk.Button(quantity_frame, text="+", font=("Arial", 10), bg="#f0f0f0")
         increase_btn.grid(row=0, column=3, padx=2)
 
         # Remove button
-        remove_btn = tk.Button(item_frame, text="Remove", font=("Arial", 10), bg="#f0f0f0", fg="#FF6347",
-                              command=lambda: self.remove_cart_item(item['cart_item_id'], callback))
+        remove_btn = tk.Button(item_frame, text="Remove", font=("Arial", 10), bg="#f0f0f0", fg="#FF6347")
         remove_btn.grid(row=1, column=2, sticky="e", padx=10)
 
+        return {'frame': card, 'header': restaurant_frame, 'restaurant': restaurant_label, 'item': item_frame,
+                'name': name_label, 'price': price_label, 'quantity': quantity_display,
+                'decrease': decrease_btn, 'increase': increase_btn, 'remove': remove_btn}
+
+    def fill_cart_item_card(self, card, row):
+        restaurant_name, item = row
+        if restaurant_name is None:
+            card['header'].pack_forget()
+        else:
+            card['restaurant'].config(text=restaurant_name)
+            card['header'].pack(fill="x", pady=5, before=card['item'])
+
+        callback = self.update_cart_display
+        cart_item_id, quantity = item['cart_item_id'], item['quantity']
+        card['name'].config(text=item['name'])
+        card['price'].config(text=f"₹{item['price'] * quantity:.2f}")
+        card['quantity'].config(text=str(quantity))
+        card['decrease'].config(command=lambda: self.update_cart_item_quantity(cart_item_id, quantity - 1, callback))
+        card['increase'].config(command=lambda: self.update_cart_item_quantity(cart_item_id, quantity + 1, callback))
+        card['remove'].config(command=lambda: self.remove_cart_item(cart_item_id, callback))
+
     def update_cart_item_quantity(self, cart_item_id, new_quantity, callback):
-        try:
-            if new_quantity <= 0:
-                # If quantity is 0 or less, remove the item
-                self.db.cursor.execute("DELETE FROM cart_items WHERE cart_item_id = ?", (cart_item_id,))
-            else:
-                # Update the quantity
-                self.db.cursor.execute("""
-                    UPDATE cart_items
-                    SET quantity = ?
-                    WHERE cart_item_id = ?
-                """, (new_quantity, cart_item_id))
-
-            self.db.conn.commit()
-            # Refresh the cart display
-            callback()
-        except Exception as e:
-            self.db.conn.rollback()
-            messagebox.showerror("Error", f"Failed to update cart: {e}")
+        def save_quantity():
+            with self.db.transaction():
+                if new_quantity <= 0:
+                    # If quantity is 0 or less, remove the item
+                    self.db.execute("DELETE FROM cart_items WHERE cart_item_id = ?", (cart_item_id,))
+                else:
+                    # Update the quantity
+                    self.db.execute("""
+                        UPDATE cart_items
+                        SET quantity = ?
+                        WHERE cart_item_id = ?
+                    """, (new_quantity, cart_item_id))
+
+        # Refresh the cart display once the change is committed
+        self.executor.submit(
+            save_quantity,
+            on_success=lambda result: callback(),
+            on_error=lambda e: messagebox.showerror("Error", f"Failed to update cart: {e}")
+        )
 
     def remove_cart_item(self, cart_item_id, callback):
-        try:
-            self.db.cursor.execute("DELETE FROM cart_items WHERE cart_item_id = ?", (cart_item_id,))
-            self.db.conn.commit()
-            # Refresh the cart display
-            callback()
-        except Exception as e:
-            self.db.conn.rollback()
-            messagebox.showerror("Error", f"Failed to remove item: {e}")
+        def delete_item():
+            with self.db.transaction():
+                self.db.execute("DELETE FROM cart_items WHERE cart_item_id = ?", (cart_item_id,))
+
+        # Refresh the cart display once the item is gone
+        self.executor.submit(
+            delete_item,
+            on_success=lambda result: callback(),
+            on_error=lambda e: messagebox.showerror("Error", f"Failed to remove item: {e}")
+        )
 
     def update_cart_display(self):
-        # Close the current cart window and reopen it to refresh
-        for widget in self.root.winfo_toplevel().winfo_children():
-            if isinstance(widget, tk.Toplevel) and widget.title() == "Your Cart":
-                widget.destroy()
+        # Refresh the open cart window in place, reusing its item cards
+        cart_window = getattr(self, "cart_window", None)
+        if cart_window is not None and cart_window.winfo_exists():
+            self.load_cart(cart_window, self.cart_cards.parent)
+        else:
+            self.display_cart()
+
+    def reopen_cart(self, cart_window):
+        # The payment form replaced the cart's widgets, so build the cart window again
+        cart_window.destroy()
         self.display_cart()
 
     def show_payment_frame(self, cart_window, user_id, total_amount, restaurants):
@@ -817,7 +827,7 @@ class FoodOrderingSystem:
         # Back button
         back_btn = tk.Button(buttons_frame, text="Back to Cart", bg="#555", fg="white",
                             font=("Arial", 12), relief="flat", padx=15, pady=5,
-                            command=lambda: self.update_cart_display())
+                            command=lambda: self.reopen_cart(cart_window))
         back_btn.pack(side="left")
 
         # Confirm payment button
@@ -838,60 +848,55 @@ class FoodOrderingSystem:
         toggle_card_details()  # Initial state
 
     def process_payment(self, cart_window, user_id, total_amount, payment_method, restaurants):
-        try:
-            # Start a transaction
-            self.db.cursor.execute("BEGIN TRANSACTION")
-
-            # Insert an order for each restaurant
-            for restaurant_id, restaurant_data in restaurants.items():
-                # Calculate subtotal for this restaurant
-                restaurant_total = sum(item['price'] * item['quantity'] for item in restaurant_data['items'])
-
-                # Add shipping cost (fixed at 30 for this example)
-                shipping_cost = 30.0
-
-                # Insert order record
-                current_time = datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-                self.db.cursor.execute("""
-                    INSERT INTO orders
-                    (user_id, restaurant_id, total_amount, shipping_cost, status, order_type, created_at)
-                    VALUES (?, ?, ?, ?, ?, ?, ?)
-                """, (user_id, restaurant_id, restaurant_total, shipping_cost, 'pending', 'delivery', current_time))
-
-                # Get the order_id of the inserted order
-                order_id = self.db.cursor.lastrowid
-
-                # Insert order items
-                for item in restaurant_data['items']:
-                    self.db.cursor.execute("""
-                        INSERT INTO order_items
-                        (order_id, item_id, quantity, price, created_at)
-                        VALUES (?, ?, ?, ?, ?)
-                    """, (order_id, item['item_id'], item['quantity'], item['price'], current_time))
-
-                # Generate a random transaction ID
-                transaction_id = f"TXN{datetime.datetime.now().strftime('%Y%m%d%H%M%S')}{user_id}"
-
-                # Insert payment record
-                self.db.cursor.execute("""
-                    INSERT INTO payments
-                    (order_id, payment_method, transaction_id, amount, status, created_at)
-                    VALUES (?, ?, ?, ?, ?, ?)
-                """, (order_id, payment_method, transaction_id, restaurant_total + shipping_cost, 'completed', current_time))
-
-            # Clear the user's cart
-            self.db.cursor.execute("DELETE FROM cart_items WHERE user_id = ?", (user_id,))
-
-            # Commit the transaction
-            self.db.conn.commit()
-
-            # Show success message
-            self.show_order_confirmation(cart_window)
-
-        except Exception as e:
-            # Rollback in case of error
-            self.db.conn.rollback()
-            messagebox.showerror("Payment Error", f"Failed to process payment: {e}")
+        def place_orders():
+            # Orders, items, payments and the cart clear are committed together, or not at all
+            with self.db.transaction():
+                # Insert an order for each restaurant
+                for restaurant_id, restaurant_data in restaurants.items():
+                    # Calculate subtotal for this restaurant
+                    restaurant_total = sum(item['price'] * item['quantity'] for item in restaurant_data['items'])
+
+                    # Add shipping cost (fixed at 30 for this example)
+                    shipping_cost = 30.0
+
+                    # Insert order record
+                    current_time = datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+                    cursor = self.db.execute("""
+                        INSERT INTO orders
+                        (user_id, restaurant_id, total_amount, shipping_cost, status, order_type, created_at)
+                        VALUES (?, ?, ?, ?, ?, ?, ?)
+                    """, (user_id, restaurant_id, restaurant_total, shipping_cost, 'pending', 'delivery', current_time))
+
+                    # Get the order_id of the inserted order
+                    order_id = cursor.lastrowid
+
+                    # Insert order items in one batch
+                    success, result = self.db.add_order_items_many(
+                        (order_id, item['item_id'], item['quantity'], item['price'])
+                        for item in restaurant_data['items']
+                    )
+                    if not success:
+                        raise sqlite3.DatabaseError(result)
+
+                    # Generate a random transaction ID
+                    transaction_id = f"TXN{datetime.datetime.now().strftime('%Y%m%d%H%M%S')}{user_id}"
+
+                    # Insert payment record
+                    self.db.execute("""
+                        INSERT INTO payments
+                        (order_id, payment_method, transaction_id, amount, status, created_at)
+                        VALUES (?, ?, ?, ?, ?, ?)
+                    """, (order_id, payment_method, transaction_id, restaurant_total + shipping_cost, 'completed', current_time))
+
+                # Clear the user's cart
+                self.db.execute("DELETE FROM cart_items WHERE user_id = ?", (user_id,))
+
+        # The orders are written on a worker thread; the confirmation is shown once they are committed
+        self.executor.submit(
+            place_orders,
+            on_success=lambda result: self.show_order_confirmation(cart_window),
+            on_error=lambda e: messagebox.showerror("Payment Error", f"Failed to process payment: {e}")
+        )
 
     def show_order_confirmation(self, cart_window):
         # Clear the window
@@ -983,52 +988,57 @@ class FoodOrderingSystem:
             rating_window.destroy()
             return
 
-        # Get user_id from email
-        self.db.cursor.execute("SELECT user_id FROM users WHERE email = ?", (user_email,))
-        user_data = self.db.cursor.fetchone()
-        if not user_data:
-            messagebox.showinfo("Error", "User not found")
-            rating_window.destroy()
-            return
+        def save_rating():
+            # Runs on a worker thread; returns None when the user does not exist
+            cursor = self.db.execute("SELECT user_id FROM users WHERE email = ?", (user_email,))
+            user_data = cursor.fetchone()
+            if not user_data:
+                return None
 
-        user_id = user_data['user_id']
+            user_id = user_data['user_id']
 
-        try:
-            # Check if user has already rated this restaurant
-            self.db.cursor.execute("""
-                SELECT * FROM ratings
-                WHERE restaurant_id = ? AND user_id = ?
-            """, (restaurant_id, user_id))
-            existing_rating = self.db.cursor.fetchone()
+            with self.db.transaction():
+                # Check if user has already rated this restaurant
+                cursor = self.db.execute("""
+                    SELECT * FROM ratings
+                    WHERE restaurant_id = ? AND user_id = ?
+                """, (restaurant_id, user_id))
+                existing_rating = cursor.fetchone()
 
-            current_time = datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-            if existing_rating:
-                # Update existing rating
-                self.db.cursor.execute("""
-                    UPDATE ratings
-                    SET rating_value = ?, review = ?
-                    WHERE rating_id = ?
-                """, (rating_value, review, existing_rating['rating_id']))
-                messagebox.showinfo("Success", "Your rating has been updated!")
+                current_time = datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+                if existing_rating:
+                    # Update existing rating
+                    self.db.execute("""
+                        UPDATE ratings
+                        SET rating_value = ?, review = ?
+                        WHERE rating_id = ?
+                    """, (rating_value, review, existing_rating['rating_id']))
+                else:
+                    # Add new rating
+                    self.db.execute("""
+                        INSERT INTO ratings
+                        (restaurant_id, user_id, rating_value, review, created_at)
+                        VALUES (?, ?, ?, ?, ?)
+                    """, (restaurant_id, user_id, rating_value, review, current_time))
+            self.db.bump_table_versions("ratings")
+            return bool(existing_rating)
+
+        def rating_saved(updated):
+            if updated is None:
+                messagebox.showinfo("Error", "User not found")
             else:
-                # Add new rating
-                self.db.cursor.execute("""
-                    INSERT INTO ratings
-                    (restaurant_id, user_id, rating_value, review, created_at)
-                    VALUES (?, ?, ?, ?, ?)
-                """, (restaurant_id, user_id, rating_value, review, current_time))
-                messagebox.showinfo("Success", "Thank you for your rating!")
-
-            self.db.conn.commit()
-            # Refresh the restaurants display to show updated ratings
-            self.display_restaurants_in_main_window()
+                messagebox.showinfo("Success", "Your rating has been updated!" if updated else "Thank you for your rating!")
+                # Refresh the restaurants display to show updated ratings
+                self.display_restaurants_in_main_window()
             # Close the rating window
             rating_window.destroy()
-        except Exception as e:
-            self.db.conn.rollback()
+
+        def rating_failed(e):
             messagebox.showerror("Error", f"Failed to submit rating: {e}")
             rating_window.destroy()
 
+        self.executor.submit(save_rating, on_success=rating_saved, on_error=rating_failed)
+
     # New function to display user orders
     def display_user_orders(self):
         # Create a new window for orders
@@ -1071,28 +1081,39 @@ class FoodOrderingSystem:
             empty_label.pack(pady=50)
             return
 
-        # Get user_id from email
-        self.db.cursor.execute("SELECT user_id FROM users WHERE email = ?", (user_email,))
-        user_data = self.db.cursor.fetchone()
-        if not user_data:
+        def fetch_orders():
+            # Get user_id from email
+            cursor = self.db.execute("SELECT user_id FROM users WHERE email = ?", (user_email,))
+            user_data = cursor.fetchone()
+            if not user_data:
+                return None, []
+
+            # Fetch user orders with restaurant details
+            cursor = self.db.execute("""
+                SELECT o.order_id, o.created_at, o.total_amount, o.status, r.name as restaurant_name
+                FROM orders o
+                JOIN restaurants r ON o.restaurant_id = r.restaurant_id
+                WHERE o.user_id = ?
+                ORDER BY o.created_at DESC
+            """, (user_data['user_id'],))
+            return user_data['user_id'], cursor.fetchall()
+
+        self.executor.submit(
+            fetch_orders,
+            on_success=lambda result: self.show_user_orders(orders_window, orders_frame, *result),
+            on_error=lambda e: messagebox.showerror("Error", f"Failed to load orders: {e}")
+        )
+
+    def show_user_orders(self, orders_window, orders_frame, user_id, orders):
+        if not orders_window.winfo_exists():
+            return
+
+        if user_id is None:
             empty_label = tk.Label(orders_frame, text="User not found",
                                   font=("Arial", 14), bg="white", fg="#555")
             empty_label.pack(pady=50)
             return
 
-        user_id = user_data['user_id']
-
-        # Fetch user orders with restaurant details
-        self.db.cursor.execute("""
-            SELECT o.order_id, o.created_at, o.total_amount, o.status, r.name as restaurant_name
-            FROM orders o
-            JOIN restaurants r ON o.restaurant_id = r.restaurant_id
-            WHERE o.user_id = ?
-            ORDER BY o.created_at DESC
-        """, (user_id,))
-        
-        orders = self.db.cursor.fetchall()
-
         if not orders:
             empty_label = tk.Label(orders_frame, text="You haven't placed any orders yet",
                                   font=("Arial", 14), bg="white", fg="#555")
@@ -1184,32 +1205,68 @@ class FoodOrderingSystem:
         content_frame = tk.Frame(track_window, bg="white")
         content_frame.pack(fill="both", expand=True, padx=30, pady=20)
         
-        # Fetch order details
-        self.db.cursor.execute("""
-            SELECT o.*, r.name as restaurant_name
-            FROM orders o
-            JOIN restaurants r ON o.restaurant_id = r.restaurant_id
-            WHERE o.order_id = ?
-        """, (order_id,))
-        
-        order = self.db.cursor.fetchone()
-        
+        def load_order():
+            # Runs on a worker thread: fetch the order and move its status forward
+            cursor = self.db.execute("""
+                SELECT o.*, r.name as restaurant_name
+                FROM orders o
+                JOIN restaurants r ON o.restaurant_id = r.restaurant_id
+                WHERE o.order_id = ?
+            """, (order_id,))
+
+            row = cursor.fetchone()
+            if not row:
+                return None, False, None
+            order = dict(row)
+
+            # Update order status to "scheduled" if it's "pending"
+            if order['status'] == 'pending':
+                with self.db.transaction():
+                    self.db.execute("""
+                        UPDATE orders
+                        SET status = 'scheduled'
+                        WHERE order_id = ?
+                    """, (order_id,))
+                order['status'] = 'scheduled'
+
+            # Calculate delivery date based on current date (April 18, 2025)
+            current_date = datetime.datetime(2025, 4, 18, 0, 12)
+            order_date = datetime.datetime.strptime(order['created_at'], '%Y-%m-%d %H:%M:%S')
+            delivery_date = order_date + datetime.timedelta(days=1)
+
+            # If the delivery date is in the past compared to current date, the order has been delivered
+            delivered = delivery_date < current_date and order['status'] != 'delivered'
+            if delivered:
+                with self.db.transaction():
+                    self.db.execute("""
+                        UPDATE orders
+                        SET status = 'delivered'
+                        WHERE order_id = ?
+                    """, (order_id,))
+                order['status'] = 'delivered'
+
+            # Changes after this point are reported by the watcher
+            return order, delivered, self.db.get_latest_change_seq()
+
+        self.executor.submit(
+            load_order,
+            on_success=lambda result: self.show_tracked_order(track_window, content_frame, order_id, *result),
+            on_error=lambda e: messagebox.showerror("Error", f"Failed to load order: {e}")
+        )
+
+    def show_tracked_order(self, track_window, content_frame, order_id, order, delivered, seen_seq):
+        if not track_window.winfo_exists():
+            return
+
         if not order:
             error_label = tk.Label(content_frame, text="Order not found", 
                                   font=("Arial", 14), bg="white", fg="red")
             error_label.pack(pady=50)
             return
-        
-        # Update order status to "scheduled" if it's "pending"
-        if order['status'] == 'pending':
-            self.db.cursor.execute("""
-                UPDATE orders
-                SET status = 'scheduled'
-                WHERE order_id = ?
-            """, (order_id,))
-            self.db.conn.commit()
-            order['status'] = 'scheduled'
-        
+
+        if delivered:
+            messagebox.showinfo("Order Status", "Your order has been delivered!")
+
         # Order info
         order_date = datetime.datetime.strptime(order['created_at'], '%Y-%m-%d %H:%M:%S')
         info_label = tk.Label(content_frame, 
@@ -1262,25 +1319,7 @@ class FoodOrderingSystem:
                 line_canvas.create_line(0, 10, 50, 10, fill=line_color, width=2)
         
         # Estimated delivery info
-        # Calculate delivery date based on current date (April 18, 2025)
-        current_date = datetime.datetime(2025, 4, 18, 0, 12)
         delivery_date = order_date + datetime.timedelta(days=1)
-        
-        # If the delivery date is in the past compared to current date, show delivered status
-        if delivery_date < current_date and order['status'] != 'delivered':
-            self.db.cursor.execute("""
-                UPDATE orders
-                SET status = 'delivered'
-                WHERE order_id = ?
-            """, (order_id,))
-            self.db.conn.commit()
-            order['status'] = 'delivered'
-            messagebox.showinfo("Order Status", "Your order has been delivered!")
-            # Refresh the tracking window
-            track_window.destroy()
-            self.track_order(order_id)
-            return
-        
         delivery_label = tk.Label(content_frame, 
                                  text=f"Estimated Delivery: {delivery_date.strftime('%B %d, %Y by %I:%M %p')}", 
                                  font=("Arial", 12), bg="white")
@@ -1292,6 +1331,19 @@ class FoodOrderingSystem:
                             command=track_window.destroy)
         back_btn.pack(side="bottom", pady=20)
 
+        self.watch_tracked_order(track_window, order_id, seen_seq)
+
+    def watch_tracked_order(self, track_window, order_id, seen_seq):
+        # Reopen the tracking window when the order changes after seen_seq, e.g. the restaurant updates its status
+        def on_order_changed(changes):
+            if any(change['row_id'] == order_id and change['seq'] > seen_seq for change in changes):
+                track_window.destroy()
+                self.track_order(order_id)
+
+        token = self.watcher.subscribe(["orders"], on_order_changed)
+        track_window.bind("<Destroy>", lambda event: self.watcher.unsubscribe(token)
+                          if event.widget is track_window else None)
+
     def show_order_tracker(self):
         # Create a new window for order tracking
         tracker_window = tk.Toplevel(self.root)
@@ -1344,18 +1396,24 @@ class FoodOrderingSystem:
             
             try:
                 order_id = int(order_id)
-                # Check if order exists
-                self.db.cursor.execute("SELECT * FROM orders WHERE order_id = ?", (order_id,))
-                order = self.db.cursor.fetchone()
-                
+            except ValueError:
+                status_var.set("Please enter a valid order number")
+                return
+
+            def order_found(order):
                 if order:
                     # Close this window and open the detailed tracking
                     tracker_window.destroy()
                     self.track_order(order_id)
                 else:
                     status_var.set("Order not found. Please check the order number.")
-            except ValueError:
-                status_var.set("Please enter a valid order number")
+
+            # Check if order exists
+            self.executor.submit(
+                lambda: self.db.execute("SELECT * FROM orders WHERE order_id = ?", (order_id,)).fetchone(),
+                on_success=order_found,
+                on_error=lambda e: status_var.set(f"Failed to look up the order: {e}")
+            )
         
         # Track button
         track_btn = tk.Button(content_frame, text="Track Order", bg="#FF6347", fg="white",
@@ -1422,7 +1480,6 @@ class FoodOrderingSystem:
                 self.main_content.config(bg="#333")
                 self.resto_label.config(bg="#333", fg="white")
                 self.canvas.config(bg="#333")
-                self.restaurants_frame.config(bg="#333")
             else:
                 # Apply light mode
                 settings_window.config(bg="white")
@@ -1440,7 +1497,6 @@ class FoodOrderingSystem:
                 self.main_content.config(bg="white")
                 self.resto_label.config(bg="white", fg="#333")
                 self.canvas.config(bg="white")
-                self.restaurants_frame.config(bg="white")
         
         # Create toggle switch
         dark_mode_switch = tk.Checkbutton(dark_mode_frame, variable=self.dark_mode_var, 
@@ -1486,4 +1542,5 @@ def main(user_email=None):
     root.mainloop()  # This line is critical!
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    with shared_database():
+        main()
\ No newline at end of file
@@ -3,7 +3,8 @@ from tkinter import messagebox, font
 from PIL import Image, ImageTk, ImageDraw
 import os
 import time
-from database import DatabaseManager  # Import DatabaseManager
+from database import acquire_database, release_database, shared_database
+from gradient import GradientBackground
 from Admin_System import AdminLoginWindow  # Import AdminLoginWindow
 import HomePage #Import HomePage
 
@@ -14,8 +15,9 @@ class LoginSystem:
         self.root.geometry("800x600")
         self.root.state("zoomed")  # Start in maximized mode
 
-        # Initialize database connection
-        self.db = DatabaseManager()
+        # Initialize database connection (shared with the other windows)
+        self.db = acquire_database()
+        self.root.bind("<Destroy>", self.on_destroy, add="+")
 
         # Create gradient background
         self.create_gradient_background()
@@ -40,42 +42,9 @@ class LoginSystem:
         """Creates a gradient background canvas."""
         self.canvas = tk.Canvas(self.root, highlightthickness=0)
         self.canvas.pack(fill="both", expand=True)
-        
-        # Create gradient (blue to red)
-        width = self.root.winfo_screenwidth()
-        height = self.root.winfo_screenheight()
-        
-        # Create a smoother gradient
-        colors = [
-            (0, 0, 255),      # Blue
-            (75, 0, 230),     # Blue-purple
-            (150, 0, 180),    # Purple
-            (200, 0, 130),    # Purple-red
-            (255, 0, 0)       # Red
-        ]
-        
-        segments = len(colors) - 1
-        segment_width = width / segments
-        
-        for i in range(segments):
-            start_color = colors[i]
-            end_color = colors[i+1]
-            
-            for j in range(int(segment_width)):
-                # Position within this segment (0 to 1)
-                pos = j / segment_width
-                
-                # Calculate color for this position
-                r = int(start_color[0] + (end_color[0] - start_color[0]) * pos)
-                g = int(start_color[1] + (end_color[1] - start_color[1]) * pos)
-                b = int(start_color[2] + (end_color[2] - start_color[2]) * pos)
-                
-                # Calculate the x position
-                x = int(i * segment_width + j)
-                
-                # Draw the vertical line
-                color = f'#{r:02x}{g:02x}{b:02x}'
-                self.canvas.create_line(x, 0, x, height, fill=color)
+
+        # Gradient (blue to red) drawn as one image that follows the window size
+        self.background = GradientBackground(self.canvas)
 
     def load_icons(self):
         """Load user icon from file."""
@@ -271,6 +240,11 @@ class LoginSystem:
         else:
             messagebox.showerror("Error", f"Login failed for user with email: {email}. {result}")
 
+    def on_destroy(self, event):
+        """Release the shared database when the login window closes."""
+        if event.widget is self.root:
+            release_database(self.db)
+
     def login(self):
         """Handles login functionality."""
         email = self.email_entry.get()
@@ -402,6 +376,8 @@ class LoginSystem:
             messagebox.showerror("Error", f"Login failed for user with email: {email}. {result}")
 
 if __name__ == "__main__":
-    root = tk.Tk()
-    app = LoginSystem(root)
-    root.mainloop()
\ No newline at end of file
+    # Keep the shared database open across the login -> home page transition
+    with shared_database():
+        root = tk.Tk()
+        app = LoginSystem(root)
+        root.mainloop()
\ No newline at end of file
@@ -0,0 +1,70 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+from database import DatabaseManager
+
+
+class AsyncDatabaseManager:
+    """Awaitable versions of the DatabaseManager operations for asyncio code.
+
+    Calls run on a fixed set of worker threads, each call on a connection
+    borrowed from the pool, so the event loop never waits on SQLite and the
+    workers hold no connections between calls. At most max_pending
+    calls are queued or running at once; callers beyond that wait on an
+    asyncio semaphore instead of piling up work faster than the database can
+    take it.
+    """
+
+    def __init__(self, db_file="Database.db", max_connections=8, max_pending=256, db=None):
+        """Wrap db, or a new DatabaseManager for db_file, with max_connections worker threads."""
+        # A manager passed in belongs to the caller and is left open by close()
+        self.owns_db = db is None
+        self.db = DatabaseManager(db_file, max_connections=max_connections) if self.owns_db else db
+        self.workers = ThreadPoolExecutor(max_workers=max_connections, thread_name_prefix="async-db")
+        self.pending = asyncio.Semaphore(max_pending)
+
+    async def run(self, func, *args, **kwargs):
+        """Run func(*args, **kwargs) on a worker thread and return its result."""
+        async with self.pending:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self.workers, self.call, func, args, kwargs)
+
+    def call(self, func, args, kwargs):
+        """Worker side: run func on a connection borrowed from the pool for this call only."""
+        with self.db.borrowed_connection():
+            return func(*args, **kwargs)
+
+    async def register_user(self, username, password, email, phone_number=None):
+        """Register a new user with a salted password."""
+        return await self.run(self.db.register_user, username, password, email, phone_number)
+
+    async def add_cart_item(self, user_id, item_id, restaurant_id, quantity=1):
+        """Add a new cart item."""
+        return await self.run(self.db.add_cart_item, user_id, item_id, restaurant_id, quantity)
+
+    async def add_order(self, user_id, restaurant_id, total_amount, shipping_cost, status='pending', order_type=None):
+        """Add a new order."""
+        return await self.run(
+            self.db.add_order, user_id, restaurant_id, total_amount, shipping_cost, status, order_type
+        )
+
+    async def update_order_status(self, order_id, new_status):
+        """Update the status of an order."""
+        return await self.run(self.db.update_order_status, order_id, new_status)
+
+    async def get_order_items(self, order_id):
+        """Get items for a specific order."""
+        return await self.run(self.db.get_order_items, order_id)
+
+    async def close(self):
+        """Wait for running calls to finish, then close the database connections if this object opened them."""
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self.workers.shutdown)
+        if self.owns_db:
+            self.db.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
@@ -0,0 +1,77 @@
+import threading
+from collections import OrderedDict
+
+
+class CatalogCache:
+    """Serve the restaurant list and restaurant menus from memory.
+
+    Each entry remembers the versions of the tables it was read from.
+    DatabaseManager moves a table's version forward whenever a write to it
+    is committed, so a lookup whose tables have moved on is read again from
+    the database instead of returning stale rows. The least recently used
+    entries are evicted once there are more than max_entries.
+
+    Cached rows are shared between callers and must not be modified.
+    """
+
+    def __init__(self, db, max_entries=256):
+        """Cache reads of db (a DatabaseManager), keeping at most max_entries results."""
+        self.db = db
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def lookup(self, key, tables, load):
+        """
+        Return the cached result for key, or call load() and cache what it returns.
+
+        The result is reused until one of tables changes. Errors raised by
+        load() are passed on and nothing is cached.
+        """
+        versions = tuple(self.db.table_version(table) for table in tables)
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry is not None and entry[0] == versions:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+
+        # Read outside the lock; the versions were taken first, so a write
+        # that lands during the read leaves this entry out of date
+        value = load()
+        with self._lock:
+            self.entries[key] = (versions, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+        return value
+
+    def clear(self):
+        """Drop every cached result."""
+        with self._lock:
+            self.entries.clear()
+
+    def hit_ratio(self):
+        """Fraction of lookups served from memory, or None before the first lookup."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return self.hits / lookups if lookups else None
+
+    def get_restaurants_page(self, after_id=None, limit=100):
+        """Get up to limit restaurants after after_id, as returned by DatabaseManager.get_restaurants_page()."""
+        return self.lookup(
+            ("restaurants", after_id, limit),
+            ("restaurants",),
+            lambda: self.db.get_restaurants_page(after_id, limit)
+        )
+
+    def get_menu(self, restaurant_id):
+        """Get a restaurant's categories with their menu items, as returned by DatabaseManager.get_restaurant_menu()."""
+        return self.lookup(
+            ("menu", restaurant_id),
+            ("menu_categories", "menu_items"),
+            lambda: self.db.get_restaurant_menu(restaurant_id)
+        )
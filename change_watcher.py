@@ -0,0 +1,126 @@
+import sqlite3
+
+
+class ChangeWatcher:
+    """Notify open windows when another connection or process changes the database.
+
+    A dedicated connection polls PRAGMA data_version on the Tk after() loop.
+    The value only moves when some other connection has committed, so a poll
+    with nothing new costs one cheap pragma. When it moves, the changelog
+    entries written since the last poll are read on a worker of executor and
+    handed to the callbacks subscribed to the tables they touch. The new
+    data_version is only kept once that read succeeds, so a failed read is
+    tried again on the next poll.
+    """
+
+    def __init__(self, root, db, executor, interval=1000, batch_size=500):
+        """Watch db (a DatabaseManager) from the Tk root, polling every interval milliseconds and reading through executor."""
+        self.root = root
+        self.db = db
+        self.executor = executor
+        self.interval = interval
+        self.batch_size = batch_size
+        self.subscribers = {}
+        self.next_token = 0
+        self.after_id = None
+        self.conn = None
+        self.data_version = None
+        self.last_seq = 0
+
+    def subscribe(self, tables, callback):
+        """
+        Call callback(changes) whenever any of the given tables change.
+
+        changes is the list of changelog entries (dicts with 'seq',
+        'table_name', 'row_id', 'operation' and 'changed_at') for those
+        tables. Returns a token for unsubscribe().
+        """
+        self.next_token += 1
+        self.subscribers[self.next_token] = (set(tables), callback)
+        return self.next_token
+
+    def unsubscribe(self, token):
+        """Stop calling the callback registered under token."""
+        self.subscribers.pop(token, None)
+
+    def start(self):
+        """Start polling from the current end of the changelog."""
+        if self.after_id is not None:
+            return
+        try:
+            self.conn = sqlite3.connect(self.db.db_file, timeout=self.db.busy_timeout)
+            self.data_version = self.conn.execute("PRAGMA data_version").fetchone()[0]
+            self.last_seq = self.conn.execute("SELECT COALESCE(MAX(seq), 0) FROM changelog").fetchone()[0]
+        except sqlite3.Error as e:
+            print(f"Error starting change watcher: {e}")
+            return
+        self.after_id = self.root.after(self.interval, self.poll)
+
+    def stop(self):
+        """Stop polling and close the watcher's connection."""
+        if self.after_id is not None:
+            self.root.after_cancel(self.after_id)
+            self.after_id = None
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+
+    def poll(self):
+        """Check data_version and read any new changes, then schedule the next poll."""
+        self.after_id = None
+        try:
+            data_version = self.conn.execute("PRAGMA data_version").fetchone()[0]
+        except sqlite3.Error as e:
+            print(f"Error polling for database changes: {e}")
+            self.schedule_poll()
+            return
+        if data_version == self.data_version:
+            self.schedule_poll()
+            return
+
+        # The next poll is scheduled once the read has finished, so reads never overlap
+        self.executor.submit(
+            self.read_new_changes, self.last_seq,
+            on_success=lambda result: self.changes_read(data_version, *result),
+            on_error=self.read_failed
+        )
+
+    def schedule_poll(self):
+        if self.conn is not None:
+            self.after_id = self.root.after(self.interval, self.poll)
+
+    def read_new_changes(self, last_seq):
+        """Worker side: read every changelog entry after last_seq; returns (changes, new last_seq)."""
+        changes = []
+        while True:
+            batch = self.db.get_changes_since(last_seq, self.batch_size)
+            changes.extend(batch)
+            if batch:
+                last_seq = batch[-1]['seq']
+            if len(batch) < self.batch_size:
+                return changes, last_seq
+
+    def changes_read(self, data_version, changes, last_seq):
+        """Tk side: keep the new position and hand the changes to the subscribers."""
+        self.data_version = data_version
+        self.last_seq = last_seq
+        self.dispatch(changes)
+        self.schedule_poll()
+
+    def read_failed(self, error):
+        # data_version is left as it was, so the next poll reads the same changes again
+        print(f"Error reading database changes: {error}")
+        self.schedule_poll()
+
+    def dispatch(self, changes):
+        """Hand each subscriber the changes to the tables it watches."""
+        if not changes:
+            return
+        for tables, callback in list(self.subscribers.values()):
+            relevant = [change for change in changes if change['table_name'] in tables]
+            if not relevant:
+                continue
+            try:
+                callback(relevant)
+            except Exception as e:
+                print(f"Error in change watcher callback: {e}")
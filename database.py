@@ -1,39 +1,682 @@
+import argparse
 import sqlite3
 import hashlib
 import os
+import queue
+import threading
 import time
+from contextlib import contextmanager
 from datetime import datetime
+from functools import lru_cache
+from itertools import islice
+
+from catalog_cache import CatalogCache
+from query_stats import InstrumentedConnection, QueryStats
+
+
+class ConnectionPool:
+    """Hand out SQLite connections that can be used concurrently.
+
+    Every thread gets its own long-lived connection from connection(), so the
+    Tk thread and any worker threads never share a cursor or a transaction.
+    Short-lived work can instead borrow a connection with checkout(), which is
+    bounded by max_connections and returns the connection for reuse; worker
+    threads use borrow() so they never keep a connection of their own. All connections run in WAL mode so readers do
+    not block behind a writer, and wait up to busy_timeout seconds for a lock
+    instead of failing straight away with "database is locked". When
+    query_stats is given, every connection records its queries into it.
+    """
+
+    def __init__(self, db_file, max_connections=8, busy_timeout=5.0, query_stats=None):
+        self.db_file = db_file
+        self.max_connections = max_connections
+        self.busy_timeout = busy_timeout
+        self.query_stats = query_stats
+        self._local = threading.local()
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(max_connections)
+        self._lock = threading.Lock()
+        self._connections = set()
+        self._checked_out = 0
+        self._closed = False
+
+    def _open(self):
+        """Open and configure a new connection."""
+        if self._closed:
+            raise sqlite3.ProgrammingError("Connection pool is closed")
+        # Room for the generated update_* statements on top of the fixed queries
+        instrumented = self.query_stats is not None
+        conn = sqlite3.connect(
+            self.db_file, timeout=self.busy_timeout, check_same_thread=False, cached_statements=256,
+            factory=InstrumentedConnection if instrumented else sqlite3.Connection
+        )
+        # Plain connections cannot take new attributes
+        if instrumented:
+            conn.query_stats = self.query_stats
+        conn.row_factory = sqlite3.Row  # Return rows as dictionaries
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.execute("PRAGMA synchronous = NORMAL")
+        with self._lock:
+            self._connections.add(conn)
+        return conn
+
+    @property
+    def open_connections(self):
+        """Number of connections currently open in this pool, in use or not."""
+        return len(self._connections)
+
+    @property
+    def checked_out(self):
+        """Number of connections currently borrowed through checkout()."""
+        return self._checked_out
+
+    def connection(self):
+        """Return the calling thread's own connection, opening it on first use."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._closed:
+            conn = self._open()
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def checkout(self, timeout=None):
+        """Borrow a connection for the duration of a with-block."""
+        if not self._slots.acquire(timeout=timeout):
+            raise sqlite3.OperationalError("Timed out waiting for a pooled connection")
+        try:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                conn = self._open()
+            with self._lock:
+                self._checked_out += 1
+            try:
+                yield conn
+            finally:
+                with self._lock:
+                    self._checked_out -= 1
+                if conn.in_transaction:
+                    conn.rollback()
+                if self._closed:
+                    conn.close()
+                else:
+                    self._idle.put(conn)
+        finally:
+            self._slots.release()
+
+    @contextmanager
+    def borrow(self, timeout=None):
+        """Make a checked-out connection the calling thread's connection for the duration of a with-block."""
+        with self.checkout(timeout) as conn:
+            previous = getattr(self._local, "conn", None)
+            self._local.conn = conn
+            try:
+                yield conn
+            finally:
+                self._local.conn = previous
+
+    def close_all(self):
+        """Close every connection handed out by this pool."""
+        with self._lock:
+            self._closed = True
+            connections = list(self._connections)
+            self._connections.clear()
+        for conn in connections:
+            conn.close()
+        self._local = threading.local()
+
+
+# Secondary indexes for the lookups the screens run on every refresh:
+# (index name, table, indexed columns).
+HOT_PATH_INDEXES = [
+    ("idx_orders_restaurant_date", "orders", "restaurant_id, order_date"),
+    ("idx_orders_user_created", "orders", "user_id, created_at"),
+    ("idx_order_items_order", "order_items", "order_id"),
+    ("idx_cart_items_user", "cart_items", "user_id, item_id"),
+    ("idx_ratings_restaurant_user", "ratings", "restaurant_id, user_id"),
+    ("idx_menu_items_restaurant_category", "menu_items", "restaurant_id, category_id"),
+    ("idx_menu_categories_restaurant", "menu_categories", "restaurant_id"),
+    ("idx_payments_order", "payments", "order_id"),
+]
+
+# Queries the UI runs on its hot paths, checked by DatabaseManager.advise_indexes().
+# Every placeholder is bound to 1 when the plan is explained.
+HOT_QUERIES = {
+    "admin orders page (AdminPortal.load_next_orders_page)": """
+        SELECT o.*, u.username, u.email, u.phone_number
+        FROM orders o
+        JOIN users u ON o.user_id = u.user_id
+        WHERE o.restaurant_id = ? AND (o.order_date, o.order_id) < (?, ?)
+        ORDER BY o.order_date DESC, o.order_id DESC
+        LIMIT 50
+    """,
+    "order items (AdminPortal.load_next_orders_page)": """
+        SELECT oi.*, mi.name
+        FROM order_items oi
+        JOIN menu_items mi ON oi.item_id = mi.item_id
+        WHERE oi.order_id = ?
+    """,
+    "cart (FoodOrderingSystem.display_cart)": """
+        SELECT ci.cart_item_id, ci.quantity, mi.name, mi.price, r.name
+        FROM cart_items ci
+        JOIN menu_items mi ON ci.item_id = mi.item_id
+        JOIN restaurants r ON ci.restaurant_id = r.restaurant_id
+        WHERE ci.user_id = ?
+    """,
+    "cart line lookup (FoodOrderingSystem.add_item_to_cart)": """
+        SELECT * FROM cart_items
+        WHERE user_id = ? AND item_id = ? AND restaurant_id = ?
+    """,
+    "restaurant rating (rating triggers)": """
+        SELECT AVG(rating_value), COUNT(*) FROM ratings WHERE restaurant_id = ?
+    """,
+    "user rating lookup (FoodOrderingSystem.submit_rating)": """
+        SELECT * FROM ratings WHERE restaurant_id = ? AND user_id = ?
+    """,
+    "menu (FoodOrderingSystem.display_restaurant_menu)": """
+        SELECT c.category_id, c.name, i.item_id, i.name, i.description, i.price
+        FROM menu_categories c
+        LEFT JOIN menu_items i ON i.restaurant_id = c.restaurant_id AND i.category_id = c.category_id
+        WHERE c.restaurant_id = ?
+        ORDER BY c.category_id, i.item_id
+    """,
+    "order history (FoodOrderingSystem.display_user_orders)": """
+        SELECT o.order_id, o.created_at, o.total_amount, o.status, r.name
+        FROM orders o
+        JOIN restaurants r ON o.restaurant_id = r.restaurant_id
+        WHERE o.user_id = ?
+        ORDER BY o.created_at DESC
+    """,
+    "dashboard (AdminPortal.update_dashboard)": """
+        SELECT SUM(order_count), SUM(pending_count), SUM(delivered_count)
+        FROM daily_restaurant_stats
+        WHERE restaurant_id = ?
+    """,
+    "payments for order": """
+        SELECT * FROM payments WHERE order_id = ?
+    """,
+}
+
+
+def _rating_bucket(value):
+    """SQL expression for the 1-5 star histogram bucket of a rating value."""
+    return f"MIN(MAX(CAST(ROUND({value}) AS INTEGER), 1), 5)"
+
+
+def _rating_stats_delta(row, sign):
+    """SQL that adds (sign '+') or removes (sign '-') one rating row from its restaurant's totals."""
+    value = f"{row}.rating_value"
+    buckets = ",\n".join(
+        f"    count_{star} = count_{star} {sign} COALESCE({_rating_bucket(value)} = {star}, 0)"
+        for star in range(1, 6)
+    )
+    return f"""UPDATE restaurant_rating_stats
+    SET rating_sum = rating_sum {sign} COALESCE({value}, 0),
+        rating_count = rating_count {sign} ({value} IS NOT NULL),
+    {buckets}
+    WHERE restaurant_id = {row}.restaurant_id;"""
+
+
+def _restaurant_rating_refresh(restaurant_id, where=True):
+    """SQL that copies a restaurant's average and count from restaurant_rating_stats."""
+    stats = f"FROM restaurant_rating_stats s WHERE s.restaurant_id = {restaurant_id}"
+    query = f"""UPDATE restaurants
+    SET rating = COALESCE((SELECT s.rating_sum / s.rating_count {stats}), 0.0),
+        total_ratings = COALESCE((SELECT s.rating_count {stats}), 0)"""
+    if where:
+        query += f"\n    WHERE restaurant_id = {restaurant_id}"
+    return query + ";"
+
+
+# Tables whose writes are recorded in the changelog: table -> primary key column
+CHANGELOG_TABLES = {
+    "orders": "order_id",
+    "order_items": "order_item_id",
+    "payments": "payment_id",
+    "ratings": "rating_id",
+    "menu_items": "item_id",
+    "restaurants": "restaurant_id",
+    "menu_categories": "category_id",
+}
+
+# Tables that triggers write to when another table is written: table -> tables it also changes
+TRIGGER_WRITES = {
+    "ratings": ("restaurants",),
+}
+
+# Columns maintained by triggers; updates to them alone are not logged as changes
+CHANGELOG_IGNORED_COLUMNS = {"updated_at"}
+
+# SQL expression for the time an order was last written, with millisecond precision
+ORDER_TIMESTAMP_NOW = "strftime('%Y-%m-%d %H:%M:%f', 'now')"
+
+# Columns get_restaurant_orders() can sort by: sort key -> SQL expression.
+# order_id is always appended as the tie-breaker that makes the keyset unique.
+ORDER_SORT_COLUMNS = {
+    "order_date": "o.order_date",
+    "order_id": "o.order_id",
+    "customer": "u.username",
+    "total_amount": "o.total_amount",
+    "status": "COALESCE(o.status, '')",
+}
+
+
+def _daily_stats_delta(row, sign):
+    """SQL that adds (sign '+') or removes (sign '-') one order row from its restaurant's daily_restaurant_stats."""
+    return f"""INSERT INTO daily_restaurant_stats
+    (restaurant_id, day, order_count, revenue, pending_count, delivered_count)
+    VALUES (
+        {row}.restaurant_id,
+        date({row}.order_date),
+        {sign}1,
+        {sign}COALESCE({row}.total_amount, 0),
+        {sign}COALESCE({row}.status = 'pending', 0),
+        {sign}COALESCE({row}.status = 'delivered', 0)
+    )
+    ON CONFLICT (restaurant_id, day) DO UPDATE SET
+        order_count = order_count + excluded.order_count,
+        revenue = revenue + excluded.revenue,
+        pending_count = pending_count + excluded.pending_count,
+        delivered_count = delivered_count + excluded.delivered_count;"""
+
+
+# Schema migrations as (user_version, description, DatabaseManager method name),
+# applied in order to databases whose PRAGMA user_version is below the version.
+# Each step must be safe to re-run, since a step interrupted before its version
+# is recorded runs again on the next start.
+SCHEMA_MIGRATIONS = [
+    (1, "create the application tables", "create_tables"),
+    (2, "create the hot-path indexes", "create_indexes"),
+    (3, "maintain restaurant rating statistics", "migrate_rating_stats"),
+    (4, "maintain daily restaurant order statistics", "migrate_daily_stats"),
+    (5, "stamp orders.updated_at", "migrate_order_timestamps"),
+    (6, "record changes in the changelog", "migrate_changelog"),
+    (7, "record catalog changes in the changelog", "setup_changelog_triggers"),
+]
+
+SCHEMA_VERSION = SCHEMA_MIGRATIONS[-1][0]
+
+# Rows per executemany() call in the *_many bulk writers
+BULK_CHUNK_SIZE = 500
+
+# Application tables, in the order they are dumped by the command line: table -> primary key column
+TABLES = {
+    "admins": "admin_id",
+    "users": "user_id",
+    "restaurants": "restaurant_id",
+    "restaurant_locations": "location_id",
+    "menu_categories": "category_id",
+    "menu_items": "item_id",
+    "cart_items": "cart_item_id",
+    "orders": "order_id",
+    "order_items": "order_item_id",
+    "payments": "payment_id",
+    "ratings": "rating_id",
+}
+
+# Rows fetched per fetchmany() call by the iter_* readers
+FETCH_CHUNK_SIZE = 500
+
+# Default number of rows returned by the get_*_page readers
+PAGE_SIZE = 100
+
+
+@lru_cache(maxsize=None)
+def _update_statement(table, columns, stamped):
+    """The UPDATE statement setting columns (and updated_at when stamped) of one row of table."""
+    assignments = [f"{column} = ?" for column in columns]
+    if stamped:
+        assignments.append("updated_at = ?")
+    return f"UPDATE {table} SET {', '.join(assignments)} WHERE {TABLES[table]} = ?"
+
 
 class DatabaseManager:
-    def __init__(self, db_file="Database.db"):
-        """Initialize the database connection and create tables if they don't exist."""
+    def __init__(self, db_file="Database.db", max_connections=8, busy_timeout=5.0,
+                 instrument=True, slow_query_ms=100, slow_log=None):
+        """
+        Set up the manager without touching the database.
+
+        The connection pool is opened and the tables are created on first
+        use, so constructing a manager (or importing this module) does no I/O.
+        With instrument, every query is counted and timed in query_stats, and
+        calls slower than slow_query_ms are written to slow_log (or printed).
+        """
         self.db_file = db_file
-        self.conn = None
-        self.cursor = None
-        self.connect()
-        self.create_tables()
+        self.max_connections = max_connections
+        self.busy_timeout = busy_timeout
+        self.query_stats = QueryStats(slow_query_ms, slow_log) if instrument else None
+        self.pool = None
+        self._ready = False
+        self._init_lock = threading.RLock()
+        self._transactions = threading.local()
+        self._columns = {}
+        self._table_versions = {}
+        self._versions_lock = threading.Lock()
+        self.catalog = CatalogCache(self)
+    
+    def _ensure_initialized(self):
+        """Connect and bring the schema up to date, once, before the first query."""
+        with self._init_lock:
+            # Re-entered from migrate() once the pool exists
+            if self.pool is None:
+                self.connect()
+                try:
+                    self.migrate()
+                except sqlite3.Error:
+                    # Stay unready so the next query retries instead of running on a half-migrated schema
+                    self.pool.close_all()
+                    self.pool = None
+                    raise
+                self._ready = True
     
     def connect(self):
         """Connect to the SQLite database."""
         try:
-            self.conn = sqlite3.connect(self.db_file)
-            self.conn.row_factory = sqlite3.Row  # Return rows as dictionaries
-            self.cursor = self.conn.cursor()
+            self.pool = ConnectionPool(self.db_file, self.max_connections, self.busy_timeout, self.query_stats)
+            self.pool.connection()
             print(f"Connected to database: {self.db_file}")
         except sqlite3.Error as e:
             print(f"Database connection error: {e}")
     
+    @contextmanager
+    def borrowed_connection(self):
+        """
+        Run the with-block on a connection checked out from the pool instead of the thread's own.
+
+        Worker threads use this so that their connections go back to the pool
+        after each job rather than staying open for the life of the thread.
+        """
+        if not self._ready:
+            self._ensure_initialized()
+        with self.pool.borrow():
+            yield self
+    
     def close(self):
-        """Close the database connection."""
-        if self.conn:
-            self.conn.close()
+        """Close every connection in the pool."""
+        if self.pool:
+            self.pool.close_all()
             print("Database connection closed")
     
+    @property
+    def conn(self):
+        """The calling thread's connection, for callers that commit or roll back directly."""
+        if not self._ready:
+            self._ensure_initialized()
+        return self.pool.connection()
+    
+    def execute(self, query, params=()):
+        """Run a statement on a new cursor of the calling thread's connection and return the cursor."""
+        return self.conn.execute(query, params)
+    
+    def executemany(self, query, seq_of_params):
+        """Run a statement once per parameter set on a new cursor and return the cursor."""
+        return self.conn.executemany(query, seq_of_params)
+    
+    def _transaction_levels(self):
+        """The calling thread's open transaction() blocks, innermost last."""
+        levels = getattr(self._transactions, "levels", None)
+        if levels is None:
+            levels = self._transactions.levels = []
+        return levels
+    
+    def in_transaction(self):
+        """Whether the calling thread is inside a transaction() block."""
+        return bool(self._transaction_levels())
+    
+    def _commit(self):
+        """Commit, unless a transaction() block will commit the work when it ends."""
+        if not self.in_transaction():
+            self.conn.commit()
+            self._publish_writes()
+    
+    def _rollback(self):
+        """Roll back, or make the enclosing transaction() block roll back when it ends."""
+        levels = self._transaction_levels()
+        if levels:
+            levels[-1]["failed"] = True
+        else:
+            self.conn.rollback()
+            self._pending_writes().clear()
+    
+    def _pending_writes(self):
+        """Tables the calling thread has written since its last commit."""
+        pending = getattr(self._transactions, "pending", None)
+        if pending is None:
+            pending = self._transactions.pending = set()
+        return pending
+    
+    def _wrote(self, *tables):
+        """Note writes to tables; their versions move forward once the writes are committed."""
+        self._pending_writes().update(tables)
+    
+    def _publish_writes(self):
+        """Move the versions of the tables written by the commit that just happened."""
+        pending = self._pending_writes()
+        if pending:
+            self.bump_table_versions(*pending)
+            pending.clear()
+    
+    def table_version(self, table):
+        """A number that changes whenever a committed write to table is known to this manager."""
+        return self._table_versions.get(table, 0)
+    
+    def bump_table_versions(self, *tables):
+        """
+        Mark tables, and the tables their triggers write, as changed.
+
+        Writes made through this class do this themselves; call it after
+        committing raw SQL, or when another process has changed the tables.
+        """
+        with self._versions_lock:
+            for table in tables:
+                for changed in (table,) + TRIGGER_WRITES.get(table, ()):
+                    self._table_versions[changed] = self._table_versions.get(changed, 0) + 1
+    
+    @contextmanager
+    def transaction(self):
+        """
+        Group several writes into one unit of work on the calling thread's connection.
+
+        The methods of this class do not commit inside the block; everything is
+        committed once when the outermost block ends. Blocks can be nested: an
+        inner block is a savepoint, so it can be undone without losing the work
+        done before it. If the body raises, the block is rolled back and the
+        exception re-raised. If a method inside the block failed and returned
+        False, the block is rolled back and sqlite3.DatabaseError is raised.
+        Starting a block while the connection has uncommitted writes made
+        outside any block raises sqlite3.OperationalError.
+        """
+        conn = self.conn
+        levels = self._transaction_levels()
+        savepoint = f"unit_of_work_{len(levels)}" if levels else None
+        if not savepoint and conn.in_transaction:
+            # Writes made outside any block were neither committed nor rolled back;
+            # committing them as part of this block would be wrong, dropping them silently too
+            raise sqlite3.OperationalError(
+                "Cannot start a transaction: this thread's connection has uncommitted writes from outside a transaction block"
+            )
+        if savepoint:
+            conn.execute(f"SAVEPOINT {savepoint}")
+        else:
+            # Take the write lock up front so the block cannot fail half way with "database is locked"
+            conn.execute("BEGIN IMMEDIATE")
+        levels.append({"failed": False})
+        
+        try:
+            yield self
+        except BaseException:
+            levels.pop()
+            self._undo_transaction(conn, savepoint)
+            raise
+        
+        if levels.pop()["failed"]:
+            self._undo_transaction(conn, savepoint)
+            raise sqlite3.DatabaseError("Transaction rolled back because a write inside it failed")
+        if savepoint:
+            conn.execute(f"RELEASE SAVEPOINT {savepoint}")
+        else:
+            conn.commit()
+            self._publish_writes()
+    
+    def _insert_many(self, table, columns, rows, chunk_size=BULK_CHUNK_SIZE):
+        """
+        Insert rows (tuples in the order of columns) with executemany in one transaction.
+
+        Returns the generated ids in the order of rows. The transaction holds
+        the write lock, so each chunk gets consecutive ids ending at
+        last_insert_rowid().
+        """
+        query = f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})"
+        ids = []
+        rows = iter(rows)
+        self._wrote(table)
+        with self.transaction():
+            conn = self.conn
+            while True:
+                chunk = list(islice(rows, chunk_size))
+                if not chunk:
+                    break
+                conn.executemany(query, chunk)
+                last_id = conn.execute("SELECT last_insert_rowid()").fetchone()[0]
+                ids.extend(range(last_id - len(chunk) + 1, last_id + 1))
+        return ids
+    
+    def _bulk_rows(self, rows, fields, defaults, extra=()):
+        """
+        Turn rows given as tuples or dicts of the single-row method's arguments into insert tuples.
+
+        fields are the argument names in order, defaults the values of the
+        optional ones, and extra is appended to every row (e.g. created_at).
+        """
+        for row in rows:
+            if isinstance(row, dict):
+                values = [row[field] if field in row else defaults[field] for field in fields]
+            else:
+                values = list(row) + [defaults[field] for field in fields[len(row):]]
+            yield tuple(values) + tuple(extra)
+    
+    def _iter_table(self, table, chunk_size=FETCH_CHUNK_SIZE):
+        """
+        Yield every row of table as a dict, in primary key order, fetching chunk_size rows at a time.
+
+        Only one chunk is held in memory. Database errors are raised to the caller.
+        """
+        cursor = self.execute(f"SELECT * FROM {table} ORDER BY {TABLES[table]}")
+        try:
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                for row in rows:
+                    yield dict(row)
+        finally:
+            cursor.close()
+    
+    def _table_page(self, table, after_id=None, limit=PAGE_SIZE):
+        """
+        Get up to limit rows of table whose primary key is greater than after_id, in key order.
+
+        Database errors are raised to the caller, so a failed read is never
+        mistaken for the end of the table.
+        """
+        primary_key = TABLES[table]
+        if after_id is None:
+            cursor = self.execute(f"SELECT * FROM {table} ORDER BY {primary_key} LIMIT ?", (limit,))
+        else:
+            cursor = self.execute(
+                f"SELECT * FROM {table} WHERE {primary_key} > ? ORDER BY {primary_key} LIMIT ?",
+                (after_id, limit)
+            )
+        return [dict(row) for row in cursor.fetchall()]
+    
+    def _table_columns(self, table):
+        """The column names of table, read once from the schema."""
+        if table not in self._columns:
+            cursor = self.execute(f"PRAGMA table_info({table})")
+            self._columns[table] = {row["name"] for row in cursor.fetchall()}
+        return self._columns[table]
+    
+    def _provided_fields(self, **values):
+        """The keyword arguments that were given a value, in order; None, empty strings and 0 count as not given."""
+        return {column: value for column, value in values.items() if value}
+    
+    def _update_row(self, table, row_id, fields):
+        """
+        Set fields (a dict of column -> value) on one row of table and return the cursor.
+
+        Tables with an updated_at column have it stamped. The statement text
+        only depends on the set of columns, so SQLite reuses its prepared
+        statement across calls.
+        """
+        stamped = "updated_at" in self._table_columns(table)
+        params = list(fields.values())
+        if stamped:
+            params.append(datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
+        params.append(row_id)
+        self._wrote(table)
+        return self.execute(_update_statement(table, tuple(fields), stamped), params)
+    
+    def update_many(self, table, rows, chunk_size=BULK_CHUNK_SIZE):
+        """
+        Update many rows of table in one transaction.
+
+        Each row is a dict holding the table's primary key and the columns to
+        set; None sets a column to NULL. Rows that set the same columns share
+        one statement and are run through executemany in chunks, so updates of
+        the same row with different column sets may not apply in the order
+        given. Returns (True, number of rows updated) or (False, error message).
+        """
+        if table not in TABLES:
+            return False, f"Unknown table: {table}"
+        primary_key = TABLES[table]
+        
+        try:
+            known_columns = self._table_columns(table)
+            stamped = "updated_at" in known_columns
+            extra = (datetime.now().strftime('%Y-%m-%d %H:%M:%S'),) if stamped else ()
+            updated = 0
+            
+            self._wrote(table)
+            with self.transaction():
+                conn = self.conn
+                pending = {}
+                for row in rows:
+                    columns = tuple(sorted(column for column in row if column != primary_key))
+                    if not columns:
+                        raise ValueError(f"no columns to update for {primary_key} {row.get(primary_key)}")
+                    unknown = set(columns) - known_columns
+                    if unknown:
+                        raise ValueError(f"unknown columns for {table}: {', '.join(sorted(unknown))}")
+                    
+                    params = pending.setdefault(columns, [])
+                    params.append(tuple(row[column] for column in columns) + extra + (row[primary_key],))
+                    if len(params) >= chunk_size:
+                        updated += conn.executemany(_update_statement(table, columns, stamped), params).rowcount
+                        params.clear()
+                
+                for columns, params in pending.items():
+                    if params:
+                        updated += conn.executemany(_update_statement(table, columns, stamped), params).rowcount
+            
+            return True, updated
+        except (sqlite3.Error, KeyError, ValueError) as e:
+            self._rollback()
+            return False, f"Error updating {table}: {e}"
+    
+    def _undo_transaction(self, conn, savepoint):
+        """Roll back a transaction() block, or only its savepoint when it is nested."""
+        if savepoint:
+            conn.execute(f"ROLLBACK TO SAVEPOINT {savepoint}")
+            conn.execute(f"RELEASE SAVEPOINT {savepoint}")
+        else:
+            conn.rollback()
+            self._pending_writes().clear()
+    
     def create_tables(self):
         """Create tables if they don't exist."""
         try:
             # Create admins table
-            self.cursor.execute('''
+            self.execute('''
             CREATE TABLE IF NOT EXISTS admins (
                 admin_id INTEGER PRIMARY KEY AUTOINCREMENT,
                 username TEXT NOT NULL UNIQUE,
@@ -45,7 +688,7 @@ class DatabaseManager:
             ''')
             
             # Create users table
-            self.cursor.execute('''
+            self.execute('''
             CREATE TABLE IF NOT EXISTS users (
                 user_id INTEGER PRIMARY KEY AUTOINCREMENT,
                 username TEXT NOT NULL UNIQUE,
@@ -59,7 +702,7 @@ class DatabaseManager:
             ''')
             
             # Create restaurants table
-            self.cursor.execute('''
+            self.execute('''
             CREATE TABLE IF NOT EXISTS restaurants (
                 restaurant_id INTEGER PRIMARY KEY AUTOINCREMENT,
                 admin_id INTEGER,
@@ -76,7 +719,7 @@ class DatabaseManager:
             ''')
             
             # Create restaurant_locations table
-            self.cursor.execute('''
+            self.execute('''
             CREATE TABLE IF NOT EXISTS restaurant_locations (
                 location_id INTEGER PRIMARY KEY AUTOINCREMENT,
                 restaurant_id INTEGER NOT NULL,
@@ -89,7 +732,7 @@ class DatabaseManager:
             ''')
             
             # Create menu_categories table
-            self.cursor.execute('''
+            self.execute('''
             CREATE TABLE IF NOT EXISTS menu_categories (
                 category_id INTEGER PRIMARY KEY AUTOINCREMENT,
                 restaurant_id INTEGER NOT NULL,
@@ -100,7 +743,7 @@ class DatabaseManager:
             ''')
             
             # Create menu_items table
-            self.cursor.execute('''
+            self.execute('''
             CREATE TABLE IF NOT EXISTS menu_items (
                 item_id INTEGER PRIMARY KEY AUTOINCREMENT,
                 restaurant_id INTEGER NOT NULL,
@@ -115,7 +758,7 @@ class DatabaseManager:
             ''')
             
             # Create cart_items table
-            self.cursor.execute('''
+            self.execute('''
             CREATE TABLE IF NOT EXISTS cart_items (
                 cart_item_id INTEGER PRIMARY KEY AUTOINCREMENT,
                 user_id INTEGER NOT NULL,
@@ -130,7 +773,7 @@ class DatabaseManager:
             ''')
             
             # Create orders table
-            self.cursor.execute('''
+            self.execute('''
             CREATE TABLE IF NOT EXISTS orders (
                 order_id INTEGER PRIMARY KEY AUTOINCREMENT,
                 user_id INTEGER NOT NULL,
@@ -141,13 +784,14 @@ class DatabaseManager:
                 status TEXT DEFAULT 'pending',
                 order_type TEXT,
                 created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                updated_at TIMESTAMP,
                 FOREIGN KEY (user_id) REFERENCES users (user_id),
                 FOREIGN KEY (restaurant_id) REFERENCES restaurants (restaurant_id)
             )
             ''')
             
             # Create order_items table
-            self.cursor.execute('''
+            self.execute('''
             CREATE TABLE IF NOT EXISTS order_items (
                 order_item_id INTEGER PRIMARY KEY AUTOINCREMENT,
                 order_id INTEGER NOT NULL,
@@ -161,7 +805,7 @@ class DatabaseManager:
             ''')
             
             # Create payments table
-            self.cursor.execute('''
+            self.execute('''
             CREATE TABLE IF NOT EXISTS payments (
                 payment_id INTEGER PRIMARY KEY AUTOINCREMENT,
                 order_id INTEGER NOT NULL,
@@ -175,7 +819,7 @@ class DatabaseManager:
             ''')
             
             # Create ratings table
-            self.cursor.execute('''
+            self.execute('''
             CREATE TABLE IF NOT EXISTS ratings (
                 rating_id INTEGER PRIMARY KEY AUTOINCREMENT,
                 restaurant_id INTEGER NOT NULL,
@@ -187,11 +831,84 @@ class DatabaseManager:
                 FOREIGN KEY (user_id) REFERENCES users (user_id)
             )
             ''')
-            self.setup_rating_triggers()
-            self.conn.commit()
+            
+            self._commit()
             print("Tables created successfully")
         except sqlite3.Error as e:
             print(f"Error creating tables: {e}")
+            raise
+    
+    def migrate(self):
+        """
+        Apply the SCHEMA_MIGRATIONS the database has not had yet.
+
+        An up-to-date database costs a single PRAGMA user_version read. Each
+        applied step records its version, so an interrupted upgrade resumes
+        where it stopped. A failed step is rolled back and its error raised.
+        """
+        cursor = self.execute("PRAGMA user_version")
+        version = cursor.fetchone()[0]
+        if version >= SCHEMA_VERSION:
+            return
+        
+        for step, description, method in SCHEMA_MIGRATIONS:
+            if step <= version:
+                continue
+            try:
+                getattr(self, method)()
+                self.execute(f"PRAGMA user_version = {step}")
+                self._commit()
+                print(f"Applied schema migration {step}: {description}")
+            except sqlite3.Error as e:
+                self._rollback()
+                print(f"Error applying schema migration {step} ({description}): {e}")
+                raise
+    
+    def create_indexes(self):
+        """Create the secondary indexes listed in HOT_PATH_INDEXES."""
+        for index_name, table, columns in HOT_PATH_INDEXES:
+            self.execute(f"CREATE INDEX IF NOT EXISTS {index_name} ON {table} ({columns})")
+    
+    def advise_indexes(self, queries=None):
+        """
+        Explain the registered hot-path queries and report any full table scans.
+
+        Returns a list of (query name, plan detail) tuples, one per table that
+        the query plan reads without an index. An empty list means every hot
+        query is served by an index.
+        """
+        queries = queries or HOT_QUERIES
+        full_scans = []
+        for name, query in queries.items():
+            params = (1,) * query.count("?")
+            try:
+                plan = self.execute(f"EXPLAIN QUERY PLAN {query}", params).fetchall()
+            except sqlite3.Error as e:
+                print(f"Could not explain '{name}': {e}")
+                continue
+            # Subqueries and CTEs are scanned after being built; only flag real tables
+            materialized = {row[3].split()[-1] for row in plan
+                            if row[3].startswith(("MATERIALIZE", "CO-ROUTINE"))}
+            for row in plan:
+                detail = row[3]
+                # An automatic index is rebuilt from a full scan on every execution
+                if "AUTOMATIC" in detail:
+                    full_scans.append((name, detail))
+                    continue
+                if not detail.startswith("SCAN ") or "USING" in detail:
+                    continue
+                scanned = detail.split()[1]
+                if scanned in materialized or scanned.startswith("("):
+                    continue
+                full_scans.append((name, detail))
+        
+        if full_scans:
+            print(f"Index advisor found {len(full_scans)} full table scan(s):")
+            for name, detail in full_scans:
+                print(f"  {name}: {detail}")
+        else:
+            print("Index advisor: every hot query uses an index")
+        return full_scans
     
     def generate_salt(self):
         """Generate a random salt for password hashing."""
@@ -207,8 +924,8 @@ class DatabaseManager:
         """Register a new user with a salted password."""
         try:
             # Check if user already exists
-            self.cursor.execute("SELECT * FROM users WHERE username = ? OR email = ?", (username, email))
-            if self.cursor.fetchone():
+            cursor = self.execute("SELECT * FROM users WHERE username = ? OR email = ?", (username, email))
+            if cursor.fetchone():
                 return False, "Username or email already exists"
             
             # Generate salt and hash password
@@ -217,22 +934,22 @@ class DatabaseManager:
             
             # Insert user into database
             current_time = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-            self.cursor.execute(
+            cursor = self.execute(
                 "INSERT INTO users (username, password, salt, email, phone_number, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
                 (username, hashed_password, salt, email, phone_number, current_time, current_time)
             )
-            self.conn.commit()
+            self._commit()
             return True, "User registered successfully"
         except sqlite3.Error as e:
-            self.conn.rollback()
+            self._rollback()
             return False, f"Registration error: {e}"
     
     def register_admin(self, username, password, email):
         """Register a new admin with a salted password."""
         try:
             # Check if admin already exists
-            self.cursor.execute("SELECT * FROM admins WHERE username = ? OR email = ?", (username, email))
-            if self.cursor.fetchone():
+            cursor = self.execute("SELECT * FROM admins WHERE username = ? OR email = ?", (username, email))
+            if cursor.fetchone():
                 return False, "Admin username or email already exists"
             
             # Generate salt and hash password
@@ -241,21 +958,21 @@ class DatabaseManager:
             
             # Insert admin into database
             current_time = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-            self.cursor.execute(
+            cursor = self.execute(
                 "INSERT INTO admins (username, password, salt, email, created_at) VALUES (?, ?, ?, ?, ?)",
                 (username, hashed_password, salt, email, current_time)
             )
-            self.conn.commit()
+            self._commit()
             return True, "Admin registered successfully"
         except sqlite3.Error as e:
-            self.conn.rollback()
+            self._rollback()
             return False, f"Admin registration error: {e}"
     
     def verify_user_login(self, email, password):
         """Verify user login credentials."""
         try:
-            self.cursor.execute("SELECT * FROM users WHERE email = ?", (email,))
-            user = self.cursor.fetchone()
+            cursor = self.execute("SELECT * FROM users WHERE email = ?", (email,))
+            user = cursor.fetchone()
             
             if not user:
                 return False, "User not found"
@@ -278,8 +995,8 @@ class DatabaseManager:
     def verify_admin_login(self, email, password):
         """Verify admin login credentials."""
         try:
-            self.cursor.execute("SELECT * FROM admins WHERE email = ?", (email,))
-            admin = self.cursor.fetchone()
+            cursor = self.execute("SELECT * FROM admins WHERE email = ?", (email,))
+            admin = cursor.fetchone()
             
             if not admin:
                 return False, "Admin not found"
@@ -303,13 +1020,21 @@ class DatabaseManager:
     def get_all_admins(self):
         """Get all admins from the database."""
         try:
-            self.cursor.execute("SELECT * FROM admins")
-            admins = [dict(row) for row in self.cursor.fetchall()]
+            cursor = self.execute("SELECT * FROM admins")
+            admins = [dict(row) for row in cursor.fetchall()]
             return admins
         except sqlite3.Error as e:
             print(f"Error fetching admins: {e}")
             return []
     
+    def iter_admins(self, chunk_size=FETCH_CHUNK_SIZE):
+        """Yield all admins one at a time, reading chunk_size rows from the database at once."""
+        return self._iter_table("admins", chunk_size)
+    
+    def get_admins_page(self, after_id=None, limit=PAGE_SIZE):
+        """Get up to limit admins with admin_id greater than after_id, in admin_id order."""
+        return self._table_page("admins", after_id, limit)
+    
     def add_admin(self, username, password, email):
         """Add a new admin."""
         try:
@@ -317,77 +1042,68 @@ class DatabaseManager:
             salt = self.generate_salt()
             hashed_password = self.hash_password(password, salt)
             
-            self.cursor.execute(
+            cursor = self.execute(
                 "INSERT INTO admins (username, password, salt, email) VALUES (?, ?, ?, ?)",
                 (username, hashed_password, salt, email)
             )
-            self.conn.commit()
+            self._commit()
             return True, "Admin added successfully"
         except sqlite3.Error as e:
-            self.conn.rollback()
+            self._rollback()
             return False, f"Error adding admin: {e}"
     
     def update_admin(self, admin_id, username=None, email=None):
         """Update admin information."""
         try:
-            update_fields = []
-            params = []
-            
-            if username:
-                update_fields.append("username = ?")
-                params.append(username)
-            
-            if email:
-                update_fields.append("email = ?")
-                params.append(email)
+            fields = self._provided_fields(username=username, email=email)
             
-            if not update_fields:
+            if not fields:
                 return False, "No fields to update"
             
-            # Add updated_at timestamp
-            update_fields.append("updated_at = ?")
-            params.append(datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
-            
-            # Add admin_id to params
-            params.append(admin_id)
-            
-            query = f"UPDATE admins SET {', '.join(update_fields)} WHERE admin_id = ?"
-            self.cursor.execute(query, params)
-            self.conn.commit()
+            cursor = self._update_row("admins", admin_id, fields)
+            self._commit()
             
-            if self.cursor.rowcount > 0:
+            if cursor.rowcount > 0:
                 return True, "Admin updated successfully"
             else:
                 return False, "Admin not found or no changes made"
         except sqlite3.Error as e:
-            self.conn.rollback()
+            self._rollback()
             return False, f"Update error: {e}"
     
     def delete_admin(self, admin_id):
         """Delete an admin from the database."""
         try:
-            self.cursor.execute("DELETE FROM admins WHERE admin_id = ?", (admin_id,))
-            self.conn.commit()
+            cursor = self.execute("DELETE FROM admins WHERE admin_id = ?", (admin_id,))
+            self._commit()
             
-            if self.cursor.rowcount > 0:
+            if cursor.rowcount > 0:
                 return True, "Admin deleted successfully"
             else:
                 return False, "Admin not found"
         except sqlite3.Error as e:
-            self.conn.rollback()
+            self._rollback()
             return False, f"Delete error: {e}"
     
     # CRUD operations for users
     def get_all_users(self):
         """Get all users from the database."""
         try:
-            self.cursor.execute("SELECT * FROM users")
-            users = [dict(row) for row in self.cursor.fetchall()]
+            cursor = self.execute("SELECT * FROM users")
+            users = [dict(row) for row in cursor.fetchall()]
             return users
         except sqlite3.Error as e:
             print(f"Error fetching users: {e}")
             return []
     
+    def iter_users(self, chunk_size=FETCH_CHUNK_SIZE):
+        """Yield all users one at a time, reading chunk_size rows from the database at once."""
+        return self._iter_table("users", chunk_size)
+    
+    def get_users_page(self, after_id=None, limit=PAGE_SIZE):
+        """Get up to limit users with user_id greater than after_id, in user_id order."""
+        return self._table_page("users", after_id, limit)
+    
     def add_user(self, username, password, email, phone_number=None):
         """Add a new user."""
         try:
@@ -396,917 +1112,812 @@ class DatabaseManager:
             hashed_password = self.hash_password(password, salt)
             
             current_time = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-            self.cursor.execute(
+            cursor = self.execute(
                 "INSERT INTO users (username, password, salt, email, phone_number, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
                 (username, hashed_password, salt, email, phone_number, current_time, current_time)
             )
-            self.conn.commit()
+            self._commit()
             return True, "User added successfully"
         except sqlite3.Error as e:
-            self.conn.rollback()
+            self._rollback()
             return False, f"Error adding user: {e}"
     
     def update_user(self, user_id, username=None, email=None, phone_number=None):
         """Update user information."""
         try:
-            update_fields = []
-            params = []
+            fields = self._provided_fields(username=username, email=email, phone_number=phone_number)
             
-            if username:
-                update_fields.append("username = ?")
-                params.append(username)
-            
-            if email:
-                update_fields.append("email = ?")
-                params.append(email)
-            
-            if phone_number:
-                update_fields.append("phone_number = ?")
-                params.append(phone_number)
-            
-            if not update_fields:
+            if not fields:
                 return False, "No fields to update"
             
-            # Add updated_at timestamp
-            update_fields.append("updated_at = ?")
-            params.append(datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
-            
-            # Add user_id to params
-            params.append(user_id)
-            
-            query = f"UPDATE users SET {', '.join(update_fields)} WHERE user_id = ?"
-            self.cursor.execute(query, params)
-            self.conn.commit()
+            cursor = self._update_row("users", user_id, fields)
+            self._commit()
             
-            if self.cursor.rowcount > 0:
+            if cursor.rowcount > 0:
                 return True, "User updated successfully"
             else:
                 return False, "User not found or no changes made"
         except sqlite3.Error as e:
-            self.conn.rollback()
+            self._rollback()
             return False, f"Update error: {e}"
     
     def delete_user(self, user_id):
         """Delete a user from the database."""
         try:
-            self.cursor.execute("DELETE FROM users WHERE user_id = ?", (user_id,))
-            self.conn.commit()
+            cursor = self.execute("DELETE FROM users WHERE user_id = ?", (user_id,))
+            self._commit()
             
-            if self.cursor.rowcount > 0:
+            if cursor.rowcount > 0:
                 return True, "User deleted successfully"
             else:
                 return False, "User not found"
         except sqlite3.Error as e:
-            self.conn.rollback()
+            self._rollback()
             return False, f"Delete error: {e}"
     
     # CRUD operations for restaurants
     def get_all_restaurants(self):
         """Get all restaurants from the database."""
         try:
-            self.cursor.execute("SELECT * FROM restaurants")
-            restaurants = [dict(row) for row in self.cursor.fetchall()]
+            cursor = self.execute("SELECT * FROM restaurants")
+            restaurants = [dict(row) for row in cursor.fetchall()]
             return restaurants
         except sqlite3.Error as e:
             print(f"Error fetching restaurants: {e}")
             return []
     
+    def iter_restaurants(self, chunk_size=FETCH_CHUNK_SIZE):
+        """Yield all restaurants one at a time, reading chunk_size rows from the database at once."""
+        return self._iter_table("restaurants", chunk_size)
+    
+    def get_restaurants_page(self, after_id=None, limit=PAGE_SIZE):
+        """Get up to limit restaurants with restaurant_id greater than after_id, in restaurant_id order."""
+        return self._table_page("restaurants", after_id, limit)
+    
     def add_restaurant(self, admin_id, name, address, phone_number, email):
         """Add a new restaurant."""
         try:
             current_time = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-            self.cursor.execute(
+            cursor = self.execute(
                 "INSERT INTO restaurants (admin_id, name, address, phone_number, email, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
                 (admin_id, name, address, phone_number, email, current_time, current_time)
             )
-            self.conn.commit()
+            self._wrote("restaurants")
+            self._commit()
             return True, "Restaurant added successfully"
         except sqlite3.Error as e:
-            self.conn.rollback()
+            self._rollback()
             return False, f"Error adding restaurant: {e}"
     
     def update_restaurant(self, restaurant_id, admin_id=None, name=None, address=None, phone_number=None, email=None, rating=None, total_ratings=None):
         """Update restaurant information."""
         try:
-            update_fields = []
-            params = []
-            
-            if admin_id:
-                update_fields.append("admin_id = ?")
-                params.append(admin_id)
-            
-            if name:
-                update_fields.append("name = ?")
-                params.append(name)
+            fields = self._provided_fields(admin_id=admin_id, name=name, address=address, phone_number=phone_number, email=email)
+            if rating is not None:
+                fields["rating"] = rating
+            if total_ratings is not None:
+                fields["total_ratings"] = total_ratings
             
-            if address:
-                update_fields.append("address = ?")
-                params.append(address)
-            
-            if phone_number:
-                update_fields.append("phone_number = ?")
-                params.append(phone_number)
-            
-            if email:
-                update_fields.append("email = ?")
-                params.append(email)
-            
-            if rating is not None:  # Check if rating is provided
-                update_fields.append("rating = ?")
-                params.append(rating)
-            
-            if total_ratings is not None:  # Check if total_ratings is provided
-                update_fields.append("total_ratings = ?")
-                params.append(total_ratings)
-            
-            if not update_fields:
+            if not fields:
                 return False, "No fields to update"
             
-            # Add updated_at timestamp
-            update_fields.append("updated_at = ?")
-            params.append(datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
-            
-            # Add restaurant_id to params
-            params.append(restaurant_id)
+            cursor = self._update_row("restaurants", restaurant_id, fields)
+            self._commit()
             
-            query = f"UPDATE restaurants SET {', '.join(update_fields)} WHERE restaurant_id = ?"
-            self.cursor.execute(query, params)
-            self.conn.commit()
-            
-            if self.cursor.rowcount > 0:
+            if cursor.rowcount > 0:
                 return True, "Restaurant updated successfully"
             else:
                 return False, "Restaurant not found or no changes made"
         except sqlite3.Error as e:
-            self.conn.rollback()
+            self._rollback()
             return False, f"Update error: {e}"
     
     def delete_restaurant(self, restaurant_id):
         """Delete a restaurant from the database."""
         try:
-            self.cursor.execute("DELETE FROM restaurants WHERE restaurant_id = ?", (restaurant_id,))
-            self.conn.commit()
+            cursor = self.execute("DELETE FROM restaurants WHERE restaurant_id = ?", (restaurant_id,))
+            self._wrote("restaurants")
+            self._commit()
             
-            if self.cursor.rowcount > 0:
+            if cursor.rowcount > 0:
                 return True, "Restaurant deleted successfully"
             else:
                 return False, "Restaurant not found"
         except sqlite3.Error as e:
-            self.conn.rollback()
+            self._rollback()
             return False, f"Delete error: {e}"
     
     # CRUD operations for restaurant locations
     def get_all_restaurant_locations(self):
         """Get all restaurant locations from the database."""
         try:
-            self.cursor.execute("SELECT * FROM restaurant_locations")
-            locations = [dict(row) for row in self.cursor.fetchall()]
+            cursor = self.execute("SELECT * FROM restaurant_locations")
+            locations = [dict(row) for row in cursor.fetchall()]
             return locations
         except sqlite3.Error as e:
             print(f"Error fetching restaurant locations: {e}")
             return []
     
+    def iter_restaurant_locations(self, chunk_size=FETCH_CHUNK_SIZE):
+        """Yield all restaurant locations one at a time, reading chunk_size rows from the database at once."""
+        return self._iter_table("restaurant_locations", chunk_size)
+    
+    def get_restaurant_locations_page(self, after_id=None, limit=PAGE_SIZE):
+        """Get up to limit restaurant locations with location_id greater than after_id, in location_id order."""
+        return self._table_page("restaurant_locations", after_id, limit)
+    
     def add_restaurant_location(self, restaurant_id, address, opening_hours, latitude, longitude):
         """Add a new restaurant location."""
         try:
-            self.cursor.execute(
+            cursor = self.execute(
                 "INSERT INTO restaurant_locations (restaurant_id, address, opening_hours, latitude, longitude) VALUES (?, ?, ?, ?, ?)",
                 (restaurant_id, address, opening_hours, latitude, longitude)
             )
-            self.conn.commit()
+            self._commit()
             return True, "Restaurant location added successfully"
         except sqlite3.Error as e:
-            self.conn.rollback()
+            self._rollback()
             return False, f"Error adding restaurant location: {e}"
     
     def update_restaurant_location(self, location_id, restaurant_id=None, address=None, opening_hours=None, latitude=None, longitude=None):
         """Update restaurant location information."""
         try:
-            update_fields = []
-            params = []
-            
-            if restaurant_id:
-                update_fields.append("restaurant_id = ?")
-                params.append(restaurant_id)
-            
-            if address:
-                update_fields.append("address = ?")
-                params.append(address)
-            
-            if opening_hours:
-                update_fields.append("opening_hours = ?")
-                params.append(opening_hours)
+            fields = self._provided_fields(restaurant_id=restaurant_id, address=address, opening_hours=opening_hours, latitude=latitude, longitude=longitude)
             
-            if latitude:
-                update_fields.append("latitude = ?")
-                params.append(latitude)
-            
-            if longitude:
-                update_fields.append("longitude = ?")
-                params.append(longitude)
-            
-            if not update_fields:
+            if not fields:
                 return False, "No fields to update"
             
-            # Add location_id to params
-            params.append(location_id)
-            
-            query = f"UPDATE restaurant_locations SET {', '.join(update_fields)} WHERE location_id = ?"
-            self.cursor.execute(query, params)
-            self.conn.commit()
+            cursor = self._update_row("restaurant_locations", location_id, fields)
+            self._commit()
             
-            if self.cursor.rowcount > 0:
+            if cursor.rowcount > 0:
                 return True, "Restaurant location updated successfully"
             else:
                 return False, "Restaurant location not found or no changes made"
         except sqlite3.Error as e:
-            self.conn.rollback()
+            self._rollback()
             return False, f"Update error: {e}"
     
     def delete_restaurant_location(self, location_id):
         """Delete a restaurant location from the database."""
         try:
-            self.cursor.execute("DELETE FROM restaurant_locations WHERE location_id = ?", (location_id,))
-            self.conn.commit()
+            cursor = self.execute("DELETE FROM restaurant_locations WHERE location_id = ?", (location_id,))
+            self._commit()
             
-            if self.cursor.rowcount > 0:
+            if cursor.rowcount > 0:
                 return True, "Restaurant location deleted successfully"
             else:
                 return False, "Restaurant location not found"
         except sqlite3.Error as e:
-            self.conn.rollback()
+            self._rollback()
             return False, f"Delete error: {e}"
     
     # CRUD operations for menu categories
     def get_all_menu_categories(self):
         """Get all menu categories from the database."""
         try:
-            self.cursor.execute("SELECT * FROM menu_categories")
-            categories = [dict(row) for row in self.cursor.fetchall()]
+            cursor = self.execute("SELECT * FROM menu_categories")
+            categories = [dict(row) for row in cursor.fetchall()]
             return categories
         except sqlite3.Error as e:
             print(f"Error fetching menu categories: {e}")
             return []
     
+    def iter_menu_categories(self, chunk_size=FETCH_CHUNK_SIZE):
+        """Yield all menu categories one at a time, reading chunk_size rows from the database at once."""
+        return self._iter_table("menu_categories", chunk_size)
+    
+    def get_menu_categories_page(self, after_id=None, limit=PAGE_SIZE):
+        """Get up to limit menu categories with category_id greater than after_id, in category_id order."""
+        return self._table_page("menu_categories", after_id, limit)
+    
     def add_menu_category(self, restaurant_id, name):
         """Add a new menu category."""
         try:
-            self.cursor.execute(
+            cursor = self.execute(
                 "INSERT INTO menu_categories (restaurant_id, name) VALUES (?, ?)",
                 (restaurant_id, name)
             )
-            self.conn.commit()
+            self._wrote("menu_categories")
+            self._commit()
             return True, "Menu category added successfully"
         except sqlite3.Error as e:
-            self.conn.rollback()
+            self._rollback()
             return False, f"Error adding menu category: {e}"
     
     def update_menu_category(self, category_id, restaurant_id=None, name=None):
         """Update menu category information."""
         try:
-            update_fields = []
-            params = []
-            
-            if restaurant_id:
-                update_fields.append("restaurant_id = ?")
-                params.append(restaurant_id)
+            fields = self._provided_fields(restaurant_id=restaurant_id, name=name)
             
-            if name:
-                update_fields.append("name = ?")
-                params.append(name)
-            
-            if not update_fields:
+            if not fields:
                 return False, "No fields to update"
             
-            # Add category_id to params
-            params.append(category_id)
-            
-            query = f"UPDATE menu_categories SET {', '.join(update_fields)} WHERE category_id = ?"
-            self.cursor.execute(query, params)
-            self.conn.commit()
+            cursor = self._update_row("menu_categories", category_id, fields)
+            self._commit()
             
-            if self.cursor.rowcount > 0:
+            if cursor.rowcount > 0:
                 return True, "Menu category updated successfully"
             else:
                 return False, "Menu category not found or no changes made"
         except sqlite3.Error as e:
-            self.conn.rollback()
+            self._rollback()
             return False, f"Update error: {e}"
     
     def delete_menu_category(self, category_id):
         """Delete a menu category from the database."""
         try:
-            self.cursor.execute("DELETE FROM menu_categories WHERE category_id = ?", (category_id,))
-            self.conn.commit()
+            cursor = self.execute("DELETE FROM menu_categories WHERE category_id = ?", (category_id,))
+            self._wrote("menu_categories")
+            self._commit()
             
-            if self.cursor.rowcount > 0:
+            if cursor.rowcount > 0:
                 return True, "Menu category deleted successfully"
             else:
                 return False, "Menu category not found"
         except sqlite3.Error as e:
-            self.conn.rollback()
+            self._rollback()
             return False, f"Delete error: {e}"
     
     # CRUD operations for menu items
     def get_all_menu_items(self):
         """Get all menu items from the database."""
         try:
-            self.cursor.execute("SELECT * FROM menu_items")
-            items = [dict(row) for row in self.cursor.fetchall()]
+            cursor = self.execute("SELECT * FROM menu_items")
+            items = [dict(row) for row in cursor.fetchall()]
             return items
         except sqlite3.Error as e:
             print(f"Error fetching menu items: {e}")
             return []
     
+    def iter_menu_items(self, chunk_size=FETCH_CHUNK_SIZE):
+        """Yield all menu items one at a time, reading chunk_size rows from the database at once."""
+        return self._iter_table("menu_items", chunk_size)
+    
+    def get_menu_items_page(self, after_id=None, limit=PAGE_SIZE):
+        """Get up to limit menu items with item_id greater than after_id, in item_id order."""
+        return self._table_page("menu_items", after_id, limit)
+    
     def add_menu_item(self, restaurant_id, category_id, name, description, price):
         """Add a new menu item."""
         try:
             current_time = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-            self.cursor.execute(
-                "INSERT INTO menu_items (restaurant_id, category_id, name, description, price, created_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            cursor = self.execute(
+                "INSERT INTO menu_items (restaurant_id, category_id, name, description, price, created_at) VALUES (?, ?, ?, ?, ?, ?)",
                 (restaurant_id, category_id, name, description, price, current_time)
             )
-            self.conn.commit()
+            self._wrote("menu_items")
+            self._commit()
             return True, "Menu item added successfully"
         except sqlite3.Error as e:
-            self.conn.rollback()
+            self._rollback()
             return False, f"Error adding menu item: {e}"
     
+    def add_menu_items_many(self, items, chunk_size=BULK_CHUNK_SIZE):
+        """
+        Add many menu items in one transaction.
+
+        Each item is a tuple (restaurant_id, category_id, name, description,
+        price) or a dict with those keys. Returns (True, item_ids) with the
+        new ids in the order given, or (False, error message).
+        """
+        try:
+            current_time = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            rows = self._bulk_rows(
+                items, ("restaurant_id", "category_id", "name", "description", "price"), {}, (current_time,)
+            )
+            item_ids = self._insert_many(
+                "menu_items",
+                ("restaurant_id", "category_id", "name", "description", "price", "created_at"),
+                rows,
+                chunk_size,
+            )
+            return True, item_ids
+        except (sqlite3.Error, KeyError, ValueError) as e:
+            self._rollback()
+            return False, f"Error adding menu items: {e}"
+    
     def update_menu_item(self, item_id, restaurant_id=None, category_id=None, name=None, description=None, price=None):
         """Update menu item information."""
         try:
-            update_fields = []
-            params = []
-            
-            if restaurant_id:
-                update_fields.append("restaurant_id = ?")
-                params.append(restaurant_id)
-            
-            if category_id:
-                update_fields.append("category_id = ?")
-                params.append(category_id)
-            
-            if name:
-                update_fields.append("name = ?")
-                params.append(name)
-            
-            if description:
-                update_fields.append("description = ?")
-                params.append(description)
-            
-            if price:
-                update_fields.append("price = ?")
-                params.append(price)
+            fields = self._provided_fields(restaurant_id=restaurant_id, category_id=category_id, name=name, description=description, price=price)
             
-            
-            if not update_fields:
+            if not fields:
                 return False, "No fields to update"
             
-            # Add item_id to params
-            params.append(item_id)
-            
-            query = f"UPDATE menu_items SET {', '.join(update_fields)} WHERE item_id = ?"
-            self.cursor.execute(query, params)
-            self.conn.commit()
+            cursor = self._update_row("menu_items", item_id, fields)
+            self._commit()
             
-            if self.cursor.rowcount > 0:
+            if cursor.rowcount > 0:
                 return True, "Menu item updated successfully"
             else:
                 return False, "Menu item not found or no changes made"
         except sqlite3.Error as e:
-            self.conn.rollback()
+            self._rollback()
             return False, f"Update error: {e}"
     
     def delete_menu_item(self, item_id):
         """Delete a menu item from the database."""
         try:
-            self.cursor.execute("DELETE FROM menu_items WHERE item_id = ?", (item_id,))
-            self.conn.commit()
+            cursor = self.execute("DELETE FROM menu_items WHERE item_id = ?", (item_id,))
+            self._wrote("menu_items")
+            self._commit()
             
-            if self.cursor.rowcount > 0:
+            if cursor.rowcount > 0:
                 return True, "Menu item deleted successfully"
             else:
                 return False, "Menu item not found"
         except sqlite3.Error as e:
-            self.conn.rollback()
+            self._rollback()
             return False, f"Delete error: {e}"
     
+    def get_restaurant_menu(self, restaurant_id):
+        """
+        Get a restaurant's whole menu in one query.
+
+        Returns a list of categories in category_id order, each a dict with
+        'category_id', 'name' and 'items' (the category's menu items as
+        dicts, in item_id order). Categories sharing a name are listed once,
+        under the first of them. Database errors are raised to the caller.
+        """
+        cursor = self.execute("""
+            SELECT c.category_id, c.name AS category_name,
+                   i.item_id, i.restaurant_id, i.category_id AS item_category_id,
+                   i.name, i.description, i.price
+            FROM menu_categories c
+            LEFT JOIN menu_items i ON i.restaurant_id = c.restaurant_id AND i.category_id = c.category_id
+            WHERE c.restaurant_id = ?
+            ORDER BY c.category_id, i.item_id
+        """, (restaurant_id,))
+        
+        menu = []
+        categories = {}
+        names = set()
+        for row in cursor.fetchall():
+            category = categories.get(row['category_id'])
+            if category is None:
+                if row['category_name'] in names:
+                    continue
+                names.add(row['category_name'])
+                category = categories[row['category_id']] = {
+                    'category_id': row['category_id'],
+                    'name': row['category_name'],
+                    'items': [],
+                }
+                menu.append(category)
+            
+            # Categories without items come back once, with NULL item columns
+            if row['item_id'] is not None:
+                category['items'].append({
+                    'item_id': row['item_id'],
+                    'restaurant_id': row['restaurant_id'],
+                    'category_id': row['item_category_id'],
+                    'name': row['name'],
+                    'description': row['description'],
+                    'price': row['price'],
+                })
+        return menu
+    
     # CRUD operations for cart items
     def get_all_cart_items(self):
         """Get all cart items from the database."""
         try:
-            self.cursor.execute("SELECT * FROM cart_items")
-            cart_items = [dict(row) for row in self.cursor.fetchall()]
+            cursor = self.execute("SELECT * FROM cart_items")
+            cart_items = [dict(row) for row in cursor.fetchall()]
             return cart_items
         except sqlite3.Error as e:
             print(f"Error fetching cart items: {e}")
             return []
     
+    def iter_cart_items(self, chunk_size=FETCH_CHUNK_SIZE):
+        """Yield all cart items one at a time, reading chunk_size rows from the database at once."""
+        return self._iter_table("cart_items", chunk_size)
+    
+    def get_cart_items_page(self, after_id=None, limit=PAGE_SIZE):
+        """Get up to limit cart items with cart_item_id greater than after_id, in cart_item_id order."""
+        return self._table_page("cart_items", after_id, limit)
+    
     def add_cart_item(self, user_id, item_id, restaurant_id, quantity=1):
         """Add a new cart item."""
         try:
             current_time = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-            self.cursor.execute(
+            cursor = self.execute(
                 "INSERT INTO cart_items (user_id, item_id, restaurant_id, quantity, created_at) VALUES (?, ?, ?, ?, ?)",
                 (user_id, item_id, restaurant_id, quantity, current_time)
             )
-            self.conn.commit()
+            self._commit()
             return True, "Cart item added successfully"
         except sqlite3.Error as e:
-            self.conn.rollback()
+            self._rollback()
             return False, f"Error adding cart item: {e}"
     
     def update_cart_item(self, cart_item_id, user_id=None, item_id=None, restaurant_id=None, quantity=None):
         """Update cart item information."""
         try:
-            update_fields = []
-            params = []
+            fields = self._provided_fields(user_id=user_id, item_id=item_id, restaurant_id=restaurant_id, quantity=quantity)
             
-            if user_id:
-                update_fields.append("user_id = ?")
-                params.append(user_id)
-            
-            if item_id:
-                update_fields.append("item_id = ?")
-                params.append(item_id)
-            
-            if restaurant_id:
-                update_fields.append("restaurant_id = ?")
-                params.append(restaurant_id)
-            
-            if quantity:
-                update_fields.append("quantity = ?")
-                params.append(quantity)
-            
-            if not update_fields:
+            if not fields:
                 return False, "No fields to update"
             
-            # Add cart_item_id to params
-            params.append(cart_item_id)
+            cursor = self._update_row("cart_items", cart_item_id, fields)
+            self._commit()
             
-            query = f"UPDATE cart_items SET {', '.join(update_fields)} WHERE cart_item_id = ?"
-            self.cursor.execute(query, params)
-            self.conn.commit()
-            
-            if self.cursor.rowcount > 0:
+            if cursor.rowcount > 0:
                 return True, "Cart item updated successfully"
             else:
                 return False, "Cart item not found or no changes made"
         except sqlite3.Error as e:
-            self.conn.rollback()
+            self._rollback()
             return False, f"Update error: {e}"
     
     def delete_cart_item(self, cart_item_id):
         """Delete a cart item from the database."""
         try:
-            self.cursor.execute("DELETE FROM cart_items WHERE cart_item_id = ?", (cart_item_id,))
-            self.conn.commit()
+            cursor = self.execute("DELETE FROM cart_items WHERE cart_item_id = ?", (cart_item_id,))
+            self._commit()
             
-            if self.cursor.rowcount > 0:
+            if cursor.rowcount > 0:
                 return True, "Cart item deleted successfully"
             else:
                 return False, "Cart item not found"
         except sqlite3.Error as e:
-            self.conn.rollback()
+            self._rollback()
             return False, f"Delete error: {e}"
     
     # CRUD operations for orders
     def get_all_orders(self):
         """Get all orders from the database."""
         try:
-            self.cursor.execute("SELECT * FROM orders")
-            orders = [dict(row) for row in self.cursor.fetchall()]
+            cursor = self.execute("SELECT * FROM orders")
+            orders = [dict(row) for row in cursor.fetchall()]
             return orders
         except sqlite3.Error as e:
             print(f"Error fetching orders: {e}")
             return []
     
+    def iter_orders(self, chunk_size=FETCH_CHUNK_SIZE):
+        """Yield all orders one at a time, reading chunk_size rows from the database at once."""
+        return self._iter_table("orders", chunk_size)
+    
+    def get_orders_page(self, after_id=None, limit=PAGE_SIZE):
+        """Get up to limit orders with order_id greater than after_id, in order_id order."""
+        return self._table_page("orders", after_id, limit)
+    
     def add_order(self, user_id, restaurant_id, total_amount, shipping_cost, status='pending', order_type=None):
         """Add a new order."""
         try:
             current_time = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-            self.cursor.execute(
+            cursor = self.execute(
                 "INSERT INTO orders (user_id, restaurant_id, total_amount, shipping_cost, status, order_type, created_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
                 (user_id, restaurant_id, total_amount, shipping_cost, status, order_type, current_time)
             )
-            self.conn.commit()
+            self._commit()
             return True, "Order added successfully"
         except sqlite3.Error as e:
-            self.conn.rollback()
+            self._rollback()
             return False, f"Error adding order: {e}"
     
     def update_order(self, order_id, user_id=None, restaurant_id=None, total_amount=None, shipping_cost=None, status=None, order_type=None):
         """Update order information."""
         try:
-            update_fields = []
-            params = []
-            
-            if user_id:
-                update_fields.append("user_id = ?")
-                params.append(user_id)
-            
-            if restaurant_id:
-                update_fields.append("restaurant_id = ?")
-                params.append(restaurant_id)
+            fields = self._provided_fields(user_id=user_id, restaurant_id=restaurant_id, total_amount=total_amount, shipping_cost=shipping_cost, status=status, order_type=order_type)
             
-            if total_amount:
-                update_fields.append("total_amount = ?")
-                params.append(total_amount)
-            
-            if shipping_cost:
-                update_fields.append("shipping_cost = ?")
-                params.append(shipping_cost)
-            
-            if status:
-                update_fields.append("status = ?")
-                params.append(status)
-            
-            if order_type:
-                update_fields.append("order_type = ?")
-                params.append(order_type)
-            
-            if not update_fields:
+            if not fields:
                 return False, "No fields to update"
             
-            # Add updated_at timestamp
-            update_fields.append("updated_at = ?")
-            params.append(datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
-            
-            # Add order_id to params
-            params.append(order_id)
-            
-            query = f"UPDATE orders SET {', '.join(update_fields)} WHERE order_id = ?"
-            self.cursor.execute(query, params)
-            self.conn.commit()
+            cursor = self._update_row("orders", order_id, fields)
+            self._commit()
             
-            if self.cursor.rowcount > 0:
+            if cursor.rowcount > 0:
                 return True, "Order updated successfully"
             else:
                 return False, "Order not found or no changes made"
         except sqlite3.Error as e:
-            self.conn.rollback()
+            self._rollback()
             return False, f"Update error: {e}"
     
     def delete_order(self, order_id):
         """Delete an order from the database."""
         try:
-            self.cursor.execute("DELETE FROM orders WHERE order_id = ?", (order_id,))
-            self.conn.commit()
+            cursor = self.execute("DELETE FROM orders WHERE order_id = ?", (order_id,))
+            self._commit()
             
-            if self.cursor.rowcount > 0:
+            if cursor.rowcount > 0:
                 return True, "Order deleted successfully"
             else:
                 return False, "Order not found"
         except sqlite3.Error as e:
-            self.conn.rollback()
+            self._rollback()
             return False, f"Delete error: {e}"
     
     # CRUD operations for order items
     def get_all_order_items(self):
         """Get all order items from the database."""
         try:
-            self.cursor.execute("SELECT * FROM order_items")
-            order_items = [dict(row) for row in self.cursor.fetchall()]
+            cursor = self.execute("SELECT * FROM order_items")
+            order_items = [dict(row) for row in cursor.fetchall()]
             return order_items
         except sqlite3.Error as e:
             print(f"Error fetching order items: {e}")
             return []
     
+    def iter_order_items(self, chunk_size=FETCH_CHUNK_SIZE):
+        """Yield all order items one at a time, reading chunk_size rows from the database at once."""
+        return self._iter_table("order_items", chunk_size)
+    
+    def get_order_items_page(self, after_id=None, limit=PAGE_SIZE):
+        """Get up to limit order items with order_item_id greater than after_id, in order_item_id order."""
+        return self._table_page("order_items", after_id, limit)
+    
     def add_order_item(self, order_id, item_id, quantity=1, price=None):
         """Add a new order item."""
         try:
             current_time = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-            self.cursor.execute(
+            cursor = self.execute(
                 "INSERT INTO order_items (order_id, item_id, quantity, price, created_at) VALUES (?, ?, ?, ?, ?)",
                 (order_id, item_id, quantity, price, current_time)
             )
-            self.conn.commit()
+            self._commit()
             return True, "Order item added successfully"
         except sqlite3.Error as e:
-            self.conn.rollback()
+            self._rollback()
             return False, f"Error adding order item: {e}"
     
+    def add_order_items_many(self, order_items, chunk_size=BULK_CHUNK_SIZE):
+        """
+        Add many order items in one transaction.
+
+        Each order item is a tuple (order_id, item_id[, quantity[, price]])
+        or a dict with those keys; quantity defaults to 1 and price to None.
+        Returns (True, order_item_ids) with the new ids in the order given,
+        or (False, error message).
+        """
+        try:
+            current_time = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            rows = self._bulk_rows(
+                order_items, ("order_id", "item_id", "quantity", "price"), {"quantity": 1, "price": None}, (current_time,)
+            )
+            order_item_ids = self._insert_many(
+                "order_items", ("order_id", "item_id", "quantity", "price", "created_at"), rows, chunk_size
+            )
+            return True, order_item_ids
+        except (sqlite3.Error, KeyError, ValueError) as e:
+            self._rollback()
+            return False, f"Error adding order items: {e}"
+    
     def update_order_item(self, order_item_id, order_id=None, item_id=None, quantity=None, price=None):
         """Update order item information."""
         try:
-            update_fields = []
-            params = []
+            fields = self._provided_fields(order_id=order_id, item_id=item_id, quantity=quantity, price=price)
             
-            if order_id:
-                update_fields.append("order_id = ?")
-                params.append(order_id)
-            
-            if item_id:
-                update_fields.append("item_id = ?")
-                params.append(item_id)
-            
-            if quantity:
-                update_fields.append("quantity = ?")
-                params.append(quantity)
-            
-            if price:
-                update_fields.append("price = ?")
-                params.append(price)
-            
-            if not update_fields:
+            if not fields:
                 return False, "No fields to update"
             
-            # Add order_item_id to params
-            params.append(order_item_id)
+            cursor = self._update_row("order_items", order_item_id, fields)
+            self._commit()
             
-            query = f"UPDATE order_items SET {', '.join(update_fields)} WHERE order_item_id = ?"
-            self.cursor.execute(query, params)
-            self.conn.commit()
-            
-            if self.cursor.rowcount > 0:
+            if cursor.rowcount > 0:
                 return True, "Order item updated successfully"
             else:
                 return False, "Order item not found or no changes made"
         except sqlite3.Error as e:
-            self.conn.rollback()
+            self._rollback()
             return False, f"Update error: {e}"
     
     def delete_order_item(self, order_item_id):
         """Delete an order item from the database."""
         try:
-            self.cursor.execute("DELETE FROM order_items WHERE order_item_id = ?", (order_item_id,))
-            self.conn.commit()
+            cursor = self.execute("DELETE FROM order_items WHERE order_item_id = ?", (order_item_id,))
+            self._commit()
             
-            if self.cursor.rowcount > 0:
+            if cursor.rowcount > 0:
                 return True, "Order item deleted successfully"
             else:
                 return False, "Order item not found"
         except sqlite3.Error as e:
-            self.conn.rollback()
+            self._rollback()
             return False, f"Delete error: {e}"
     
     # CRUD operations for payments
     def get_all_payments(self):
         """Get all payments from the database."""
         try:
-            self.cursor.execute("SELECT * FROM payments")
-            payments = [dict(row) for row in self.cursor.fetchall()]
+            cursor = self.execute("SELECT * FROM payments")
+            payments = [dict(row) for row in cursor.fetchall()]
             return payments
         except sqlite3.Error as e:
             print(f"Error fetching payments: {e}")
             return []
     
+    def iter_payments(self, chunk_size=FETCH_CHUNK_SIZE):
+        """Yield all payments one at a time, reading chunk_size rows from the database at once."""
+        return self._iter_table("payments", chunk_size)
+    
+    def get_payments_page(self, after_id=None, limit=PAGE_SIZE):
+        """Get up to limit payments with payment_id greater than after_id, in payment_id order."""
+        return self._table_page("payments", after_id, limit)
+    
     def add_payment(self, order_id, payment_method, transaction_id, amount, status='pending'):
         """Add a new payment."""
         try:
             current_time = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-            self.cursor.execute(
+            cursor = self.execute(
                 "INSERT INTO payments (order_id, payment_method, transaction_id, amount, status, created_at) VALUES (?, ?, ?, ?, ?, ?)",
                 (order_id, payment_method, transaction_id, amount, status, current_time)
             )
-            self.conn.commit()
+            self._commit()
             return True, "Payment added successfully"
         except sqlite3.Error as e:
-            self.conn.rollback()
+            self._rollback()
             return False, f"Error adding payment: {e}"
     
     def update_payment(self, payment_id, order_id=None, payment_method=None, transaction_id=None, amount=None, status=None):
         """Update payment information."""
         try:
-            update_fields = []
-            params = []
-            
-            if order_id:
-                update_fields.append("order_id = ?")
-                params.append(order_id)
-            
-            if payment_method:
-                update_fields.append("payment_method = ?")
-                params.append(payment_method)
-            
-            if transaction_id:
-                update_fields.append("transaction_id = ?")
-                params.append(transaction_id)
+            fields = self._provided_fields(order_id=order_id, payment_method=payment_method, transaction_id=transaction_id, amount=amount, status=status)
             
-            if amount:
-                update_fields.append("amount = ?")
-                params.append(amount)
-            
-            if status:
-                update_fields.append("status = ?")
-                params.append(status)
-            
-            if not update_fields:
+            if not fields:
                 return False, "No fields to update"
             
-            # Add payment_id to params
-            params.append(payment_id)
-            
-            query = f"UPDATE payments SET {', '.join(update_fields)} WHERE payment_id = ?"
-            self.cursor.execute(query, params)
-            self.conn.commit()
+            cursor = self._update_row("payments", payment_id, fields)
+            self._commit()
             
-            if self.cursor.rowcount > 0:
+            if cursor.rowcount > 0:
                 return True, "Payment updated successfully"
             else:
                 return False, "Payment not found or no changes made"
         except sqlite3.Error as e:
-            self.conn.rollback()
+            self._rollback()
             return False, f"Update error: {e}"
     
     def delete_payment(self, payment_id):
         """Delete a payment from the database."""
         try:
-            self.cursor.execute("DELETE FROM payments WHERE payment_id = ?", (payment_id,))
-            self.conn.commit()
+            cursor = self.execute("DELETE FROM payments WHERE payment_id = ?", (payment_id,))
+            self._commit()
             
-            if self.cursor.rowcount > 0:
+            if cursor.rowcount > 0:
                 return True, "Payment deleted successfully"
             else:
                 return False, "Payment not found"
         except sqlite3.Error as e:
-            self.conn.rollback()
+            self._rollback()
             return False, f"Delete error: {e}"
     
     # CRUD operations for ratings
     def get_all_ratings(self):
         """Get all ratings from the database."""
         try:
-            self.cursor.execute("SELECT * FROM ratings")
-            ratings = [dict(row) for row in self.cursor.fetchall()]
+            cursor = self.execute("SELECT * FROM ratings")
+            ratings = [dict(row) for row in cursor.fetchall()]
             return ratings
         except sqlite3.Error as e:
             print(f"Error fetching ratings: {e}")
             return []
     
+    def iter_ratings(self, chunk_size=FETCH_CHUNK_SIZE):
+        """Yield all ratings one at a time, reading chunk_size rows from the database at once."""
+        return self._iter_table("ratings", chunk_size)
+    
+    def get_ratings_page(self, after_id=None, limit=PAGE_SIZE):
+        """Get up to limit ratings with rating_id greater than after_id, in rating_id order."""
+        return self._table_page("ratings", after_id, limit)
+    
     def add_rating(self, restaurant_id, user_id, rating_value, review=None):
         """Add a new rating."""
         try:
             current_time = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-            self.cursor.execute(
+            cursor = self.execute(
                 "INSERT INTO ratings (restaurant_id, user_id, rating_value, review, created_at) VALUES (?, ?, ?, ?, ?)",
                 (restaurant_id, user_id, rating_value, review, current_time)
             )
-            self.conn.commit()
+            self._wrote("ratings")
+            self._commit()
             return True, "Rating added successfully"
         except sqlite3.Error as e:
-            self.conn.rollback()
+            self._rollback()
             return False, f"Error adding rating: {e}"
     
+    def add_ratings_many(self, ratings, chunk_size=BULK_CHUNK_SIZE):
+        """
+        Add many ratings in one transaction.
+
+        Each rating is a tuple (restaurant_id, user_id, rating_value[, review])
+        or a dict with those keys. Returns (True, rating_ids) with the new ids
+        in the order given, or (False, error message).
+        """
+        try:
+            current_time = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            rows = self._bulk_rows(
+                ratings, ("restaurant_id", "user_id", "rating_value", "review"), {"review": None}, (current_time,)
+            )
+            rating_ids = self._insert_many(
+                "ratings", ("restaurant_id", "user_id", "rating_value", "review", "created_at"), rows, chunk_size
+            )
+            return True, rating_ids
+        except (sqlite3.Error, KeyError, ValueError) as e:
+            self._rollback()
+            return False, f"Error adding ratings: {e}"
+    
     def update_rating(self, rating_id, restaurant_id=None, user_id=None, rating_value=None, review=None):
         """Update rating information."""
         try:
-            update_fields = []
-            params = []
-            
-            if restaurant_id:
-                update_fields.append("restaurant_id = ?")
-                params.append(restaurant_id)
-            
-            if user_id:
-                update_fields.append("user_id = ?")
-                params.append(user_id)
-            
-            if rating_value:
-                update_fields.append("rating_value = ?")
-                params.append(rating_value)
-            
-            if review:
-                update_fields.append("review = ?")
-                params.append(review)
+            fields = self._provided_fields(restaurant_id=restaurant_id, user_id=user_id, rating_value=rating_value, review=review)
             
-            if not update_fields:
+            if not fields:
                 return False, "No fields to update"
             
-            # Add rating_id to params
-            params.append(rating_id)
+            cursor = self._update_row("ratings", rating_id, fields)
+            self._commit()
             
-            query = f"UPDATE ratings SET {', '.join(update_fields)} WHERE rating_id = ?"
-            self.cursor.execute(query, params)
-            self.conn.commit()
-            
-            if self.cursor.rowcount > 0:
+            if cursor.rowcount > 0:
                 return True, "Rating updated successfully"
             else:
                 return False, "Rating not found or no changes made"
         except sqlite3.Error as e:
-            self.conn.rollback()
+            self._rollback()
             return False, f"Update error: {e}"
     
     def delete_rating(self, rating_id):
         """Delete a rating from the database."""
         try:
-            self.cursor.execute("DELETE FROM ratings WHERE rating_id = ?", (rating_id,))
-            self.conn.commit()
+            cursor = self.execute("DELETE FROM ratings WHERE rating_id = ?", (rating_id,))
+            self._wrote("ratings")
+            self._commit()
             
-            if self.cursor.rowcount > 0:
+            if cursor.rowcount > 0:
                 return True, "Rating deleted successfully"
             else:
                 return False, "Rating not found"
         except sqlite3.Error as e:
-            self.conn.rollback()
+            self._rollback()
             return False, f"Delete error: {e}"
     
     # Function to print all data from a table
     def print_table_data(self, table_name):
         """Print all data from a specific table."""
         try:
-            self.cursor.execute(f"SELECT * FROM {table_name}")
-            rows = self.cursor.fetchall()
-            
-            if not rows:
-                print(f"No data found in {table_name}")
-                return
-            
-            # Get column names
-            columns = [description[0] for description in self.cursor.description]
-            
-            # Print column headers
-            print(f"\nData in {table_name}:")
-            print(", ".join(columns))
-            
-            # Print rows
-            for row in rows:
+            columns = None
+            
+            # Rows are streamed, so large tables are printed without loading them whole
+            for row in self._iter_table(table_name):
+                if columns is None:
+                    # Print column headers
+                    columns = list(row)
+                    print(f"\nData in {table_name}:")
+                    print(", ".join(columns))
+                
                 row_data = []
                 for column in columns:
                     row_data.append(str(row[column]))
                 print(", ".join(row_data))
             
+            if columns is None:
+                print(f"No data found in {table_name}")
+            
         except sqlite3.Error as e:
             print(f"Error fetching data from {table_name}: {e}")
     
     def get_restaurants_with_ratings(self):
         try:
-            conn = sqlite3.connect(self.db_name)
-            cursor = conn.cursor()
-            cursor.execute("SELECT name, rating FROM restaurants")  # Removed cuisine from the query
+            cursor = self.execute("SELECT name, rating FROM restaurants")  # Removed cuisine from the query
             rows = cursor.fetchall()
             restaurants = [{"name": row[0], "rating": row[1]} for row in rows]
             return restaurants
         except sqlite3.Error as e:
             print(f"Database error: {e}")
             return []
-        finally:
-            if conn:
-                conn.close()
 
-    def setup_rating_triggers(self):
-        """Set up triggers to automatically update restaurant ratings."""
-        try:
-            # Drop existing triggers if they exist
-            self.cursor.execute("DROP TRIGGER IF EXISTS after_rating_insert")
-            self.cursor.execute("DROP TRIGGER IF EXISTS after_rating_update")
-            self.cursor.execute("DROP TRIGGER IF EXISTS after_rating_delete")
-
-            # Create trigger for INSERT operation on ratings table
-            self.cursor.execute('''
-                CREATE TRIGGER after_rating_insert
-                AFTER INSERT ON ratings
-                BEGIN
-                    UPDATE restaurants
-                    SET rating = COALESCE((SELECT AVG(rating_value) FROM ratings WHERE restaurant_id = NEW.restaurant_id), 0.0)
-                    WHERE restaurant_id = NEW.restaurant_id;
-                END;
-            ''')
-
-            # Create trigger for UPDATE operation on ratings table
-            self.cursor.execute('''
-                CREATE TRIGGER after_rating_update
-                AFTER UPDATE ON ratings
-                BEGIN
-                    -- Update old restaurant's rating
-                    UPDATE restaurants
-                    SET rating = COALESCE((SELECT AVG(rating_value) FROM ratings WHERE restaurant_id = OLD.restaurant_id), 0.0)
-                    WHERE restaurant_id = OLD.restaurant_id;
-                    
-                    -- Update new restaurant's rating
-                    UPDATE restaurants
-                    SET rating = COALESCE((SELECT AVG(rating_value) FROM ratings WHERE restaurant_id = NEW.restaurant_id), 0.0)
-                    WHERE restaurant_id = NEW.restaurant_id;
-                END;
-            ''')
-
-            # Create trigger for DELETE operation on ratings table
-            self.cursor.execute('''
-                CREATE TRIGGER after_rating_delete
-                AFTER DELETE ON ratings
-                BEGIN
-                    UPDATE restaurants
-                    SET rating = COALESCE((SELECT AVG(rating_value) FROM ratings WHERE restaurant_id = OLD.restaurant_id), 0.0)
-                    WHERE restaurant_id = OLD.restaurant_id;
-                END;
-            ''')
-
-            self.conn.commit()
-            print("Rating triggers created successfully")
-        except sqlite3.Error as e:
-            self.conn.rollback()
-            print(f"Error creating rating triggers: {e}")
     def insert_ratings_to_match_restaurant_ratings(self):
         """Insert ratings into the ratings table such that the average matches the restaurant's rating."""
         try:
             # Fetch all restaurants
-            self.cursor.execute("SELECT * FROM restaurants")
-            restaurants = self.cursor.fetchall()
+            cursor = self.execute("SELECT * FROM restaurants")
+            restaurants = cursor.fetchall()
 
             # Fetch all users to use as raters
-            self.cursor.execute("SELECT user_id FROM users")
-            users = [row['user_id'] for row in self.cursor.fetchall()]
+            cursor = self.execute("SELECT user_id FROM users")
+            users = [row['user_id'] for row in cursor.fetchall()]
 
             for restaurant in restaurants:
                 restaurant_id = restaurant['restaurant_id']
@@ -1328,15 +1939,16 @@ class DatabaseManager:
                     ratings_to_insert.append((restaurant_id, user_id, rating_value, None))  # None for review
 
                 # Insert the generated ratings
-                self.cursor.executemany(
+                cursor = self.executemany(
                     "INSERT INTO ratings (restaurant_id, user_id, rating_value, review) VALUES (?, ?, ?, ?)",
                     ratings_to_insert
                 )
+                self._wrote("ratings")
 
-            self.conn.commit()
+            self._commit()
             print("Ratings inserted successfully to match restaurant ratings")
         except sqlite3.Error as e:
-            self.conn.rollback()
+            self._rollback()
             print(f"Error inserting ratings: {e}")
     def insert_restaurant_locations(self):
         """Insert sample data into the restaurant_locations table."""
@@ -1352,7 +1964,7 @@ class DatabaseManager:
             ]
 
             # Insert the data into the restaurant_locations table
-            self.cursor.executemany(
+            cursor = self.executemany(
                 """
                 INSERT INTO restaurant_locations 
                 (location_id, restaurant_id, address, opening_hours, latitude, longitude) 
@@ -1361,10 +1973,10 @@ class DatabaseManager:
                 locations_data,
             )
 
-            self.conn.commit()
+            self._commit()
             print("Restaurant locations inserted successfully")
         except sqlite3.Error as e:
-            self.conn.rollback()
+            self._rollback()
             print(f"Error inserting restaurant locations: {e}")
     def insert_menu_categories_and_items(self):
         """Insert sample data into menu_categories and menu_items tables."""
@@ -1392,10 +2004,11 @@ class DatabaseManager:
             ]
 
             # Insert menu categories
-            self.cursor.executemany(
+            cursor = self.executemany(
                 "INSERT INTO menu_categories (restaurant_id, name) VALUES (?, ?)",
                 categories_data,
             )
+            self._wrote("menu_categories", "menu_items")
 
             # Sample data for menu items
             items_data = [
@@ -1449,7 +2062,7 @@ class DatabaseManager:
                     current_time  # created_at
                 ))
 
-            self.cursor.executemany(
+            cursor = self.executemany(
                 """
                 INSERT INTO menu_items 
                 (restaurant_id, category_id, name, description, price, created_at) 
@@ -1458,10 +2071,10 @@ class DatabaseManager:
                 menu_items,
             )
 
-            self.conn.commit()
+            self._commit()
             print("Menu categories and items inserted successfully")
         except sqlite3.Error as e:
-            self.conn.rollback()
+            self._rollback()
             print(f"Error inserting menu categories and items: {e}")
     def insert_new_restaurant(self, admin_id, name, address, phone_number, email, categories_and_items):
         """
@@ -1478,96 +2091,469 @@ class DatabaseManager:
             (category_name, [(item_name, item_description, item_price), ...])
         """
         try:
-            # Insert restaurant
-            current_time = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-            self.cursor.execute(
-                """
-                INSERT INTO restaurants 
-                (admin_id, name, address, phone_number, email, created_at, updated_at) 
-                VALUES (?, ?, ?, ?, ?, ?, ?)
-                """,
-                (admin_id, name, address, phone_number, email, current_time, current_time)
-            )
-            restaurant_id = self.cursor.lastrowid
-
-            # Insert menu categories and items
-            for category_name, items in categories_and_items:
-                # Insert category
-                self.cursor.execute(
-                    "INSERT INTO menu_categories (restaurant_id, name) VALUES (?, ?)",
-                    (restaurant_id, category_name)
+            with self.transaction():
+                # Insert restaurant
+                current_time = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+                cursor = self.execute(
+                    """
+                    INSERT INTO restaurants 
+                    (admin_id, name, address, phone_number, email, created_at, updated_at) 
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                    """,
+                    (admin_id, name, address, phone_number, email, current_time, current_time)
                 )
-                category_id = self.cursor.lastrowid
-
-                # Insert items
-                for item_name, item_description, item_price in items:
-                    self.cursor.execute(
-                        """
-                        INSERT INTO menu_items 
-                        (restaurant_id, category_id, name, description, price, created_at) 
-                        VALUES (?, ?, ?, ?, ?, ?)
-                        """,
-                        (restaurant_id, category_id, item_name, item_description, item_price, current_time)
-                    )
+                restaurant_id = cursor.lastrowid
+                self._wrote("restaurants")
+
+                # Insert menu categories
+                category_ids = self._insert_many(
+                    "menu_categories",
+                    ("restaurant_id", "name"),
+                    ((restaurant_id, category_name) for category_name, items in categories_and_items),
+                )
+
+                # Insert all the items in one pass
+                success, result = self.add_menu_items_many(
+                    (restaurant_id, category_id, item_name, item_description, item_price)
+                    for category_id, (category_name, items) in zip(category_ids, categories_and_items)
+                    for item_name, item_description, item_price in items
+                )
+                if not success:
+                    raise sqlite3.DatabaseError(result)
 
-            self.conn.commit()
             print("New restaurant and menu items added successfully")
             return True
         except sqlite3.Error as e:
-            self.conn.rollback()
+            self._rollback()
             print(f"Error adding new restaurant: {e}")
             return False
         
+    def migrate_rating_stats(self):
+        """Migration 3: keep per-restaurant rating totals in restaurant_rating_stats."""
+        # Create restaurant_rating_stats table (maintained by the rating triggers)
+        self.execute('''
+        CREATE TABLE IF NOT EXISTS restaurant_rating_stats (
+            restaurant_id INTEGER PRIMARY KEY,
+            rating_sum REAL NOT NULL DEFAULT 0.0,
+            rating_count INTEGER NOT NULL DEFAULT 0,
+            count_1 INTEGER NOT NULL DEFAULT 0,
+            count_2 INTEGER NOT NULL DEFAULT 0,
+            count_3 INTEGER NOT NULL DEFAULT 0,
+            count_4 INTEGER NOT NULL DEFAULT 0,
+            count_5 INTEGER NOT NULL DEFAULT 0,
+            FOREIGN KEY (restaurant_id) REFERENCES restaurants (restaurant_id)
+        )
+        ''')
+        self.setup_rating_triggers()
+        success, message = self.rebuild_rating_stats()
+        if not success:
+            raise sqlite3.DatabaseError(message)
+
+    def migrate_daily_stats(self):
+        """Migration 4: keep per-restaurant, per-day order totals in daily_restaurant_stats."""
+        # Create daily_restaurant_stats table (maintained by the order triggers)
+        self.execute('''
+        CREATE TABLE IF NOT EXISTS daily_restaurant_stats (
+            restaurant_id INTEGER NOT NULL,
+            day TEXT NOT NULL,
+            order_count INTEGER NOT NULL DEFAULT 0,
+            revenue REAL NOT NULL DEFAULT 0.0,
+            pending_count INTEGER NOT NULL DEFAULT 0,
+            delivered_count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (restaurant_id, day),
+            FOREIGN KEY (restaurant_id) REFERENCES restaurants (restaurant_id)
+        )
+        ''')
+        self.setup_order_stats_triggers()
+        success, message = self.rebuild_daily_stats()
+        if not success:
+            raise sqlite3.DatabaseError(message)
+
+    def migrate_order_timestamps(self):
+        """Migration 5: add orders.updated_at and keep it stamped."""
+        # Databases created before this migration have no orders.updated_at
+        cursor = self.execute("PRAGMA table_info(orders)")
+        if 'updated_at' not in [column['name'] for column in cursor.fetchall()]:
+            self.execute("ALTER TABLE orders ADD COLUMN updated_at TIMESTAMP")
+            self.execute("UPDATE orders SET updated_at = order_date")
+        self.execute("CREATE INDEX IF NOT EXISTS idx_orders_restaurant_updated ON orders (restaurant_id, updated_at)")
+        self.setup_order_timestamp_triggers()
+
+    def migrate_changelog(self):
+        """Migration 6: record writes to the CHANGELOG_TABLES in the changelog."""
+        # Create changelog table (appended to by the changelog triggers)
+        self.execute('''
+        CREATE TABLE IF NOT EXISTS changelog (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            table_name TEXT NOT NULL,
+            row_id INTEGER NOT NULL,
+            operation TEXT NOT NULL CHECK (operation IN ('insert', 'update', 'delete')),
+            changed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        ''')
+        
+        # Create changelog_consumers table (last changelog seq each consumer has processed)
+        self.execute('''
+        CREATE TABLE IF NOT EXISTS changelog_consumers (
+            consumer TEXT PRIMARY KEY,
+            last_seq INTEGER NOT NULL DEFAULT 0,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        ''')
+        self.setup_changelog_triggers()
+
     def setup_rating_triggers(self):
-        """Set up triggers to automatically update restaurant ratings."""
+        """
+        Set up triggers that keep restaurant ratings up to date.
+
+        Each rating write applies its delta to the restaurant's row in
+        restaurant_rating_stats and copies the new average and count onto the
+        restaurant, so the cost does not depend on how many reviews exist.
+        """
         try:
             # Drop existing triggers if they exist
-            self.cursor.execute("DROP TRIGGER IF EXISTS after_rating_insert")
-            self.cursor.execute("DROP TRIGGER IF EXISTS after_rating_update")
-            self.cursor.execute("DROP TRIGGER IF EXISTS after_rating_delete")
+            self.execute("DROP TRIGGER IF EXISTS after_rating_insert")
+            self.execute("DROP TRIGGER IF EXISTS after_rating_update")
+            self.execute("DROP TRIGGER IF EXISTS after_rating_delete")
             
             # Create trigger for INSERT operation on ratings table
-            self.cursor.execute('''
+            self.execute(f'''
             CREATE TRIGGER after_rating_insert
             AFTER INSERT ON ratings
             BEGIN
-                UPDATE restaurants
-                SET rating = (SELECT AVG(rating_value) FROM ratings WHERE restaurant_id = NEW.restaurant_id),
-                    total_ratings = (SELECT COUNT(*) FROM ratings WHERE restaurant_id = NEW.restaurant_id)
-                WHERE restaurant_id = NEW.restaurant_id;
+                INSERT OR IGNORE INTO restaurant_rating_stats (restaurant_id) VALUES (NEW.restaurant_id);
+                {_rating_stats_delta("NEW", "+")}
+                {_restaurant_rating_refresh("NEW.restaurant_id")}
             END;
             ''')
             
             # Create trigger for UPDATE operation on ratings table
-            self.cursor.execute('''
+            self.execute(f'''
             CREATE TRIGGER after_rating_update
-            AFTER UPDATE ON ratings
+            AFTER UPDATE OF restaurant_id, rating_value ON ratings
             BEGIN
-                -- Update restaurant's rating
-                UPDATE restaurants
-                SET rating = (SELECT AVG(rating_value) FROM ratings WHERE restaurant_id = NEW.restaurant_id),
-                    total_ratings = (SELECT COUNT(*) FROM ratings WHERE restaurant_id = NEW.restaurant_id)
-                WHERE restaurant_id = NEW.restaurant_id;
+                -- Move the rating from the old restaurant's totals to the new one's
+                {_rating_stats_delta("OLD", "-")}
+                INSERT OR IGNORE INTO restaurant_rating_stats (restaurant_id) VALUES (NEW.restaurant_id);
+                {_rating_stats_delta("NEW", "+")}
+                {_restaurant_rating_refresh("OLD.restaurant_id")}
+                {_restaurant_rating_refresh("NEW.restaurant_id")}
             END;
             ''')
             
             # Create trigger for DELETE operation on ratings table
-            self.cursor.execute('''
+            self.execute(f'''
             CREATE TRIGGER after_rating_delete
             AFTER DELETE ON ratings
             BEGIN
-                UPDATE restaurants
-                SET rating = COALESCE((SELECT AVG(rating_value) FROM ratings WHERE restaurant_id = OLD.restaurant_id), 0.0),
-                    total_ratings = (SELECT COUNT(*) FROM ratings WHERE restaurant_id = OLD.restaurant_id)
-                WHERE restaurant_id = OLD.restaurant_id;
+                {_rating_stats_delta("OLD", "-")}
+                {_restaurant_rating_refresh("OLD.restaurant_id")}
             END;
             ''')
             
-            self.conn.commit()
+            self._commit()
             print("Rating triggers created successfully")
         except sqlite3.Error as e:
-            self.conn.rollback()
+            self._rollback()
             print(f"Error creating rating triggers: {e}")
+            raise
+
+    def rebuild_rating_stats(self):
+        """Recompute restaurant_rating_stats and every restaurant's rating from the ratings table."""
+        try:
+            self.execute("DELETE FROM restaurant_rating_stats")
+            bucket = _rating_bucket("rating_value")
+            self.execute(f"""
+                INSERT INTO restaurant_rating_stats
+                (restaurant_id, rating_sum, rating_count, count_1, count_2, count_3, count_4, count_5)
+                SELECT restaurant_id, TOTAL(rating_value), COUNT(rating_value),
+                       SUM({bucket} = 1), SUM({bucket} = 2), SUM({bucket} = 3),
+                       SUM({bucket} = 4), SUM({bucket} = 5)
+                FROM ratings
+                GROUP BY restaurant_id
+            """)
+            self.execute(_restaurant_rating_refresh("restaurants.restaurant_id", where=False))
+            self._wrote("restaurants")
+            self._commit()
+            return True, "Rating statistics rebuilt successfully"
+        except sqlite3.Error as e:
+            self._rollback()
+            return False, f"Error rebuilding rating statistics: {e}"
+
+    def get_rating_histogram(self, restaurant_id):
+        """Get the number of 1-5 star ratings, their sum and count for a restaurant."""
+        try:
+            cursor = self.execute(
+                "SELECT * FROM restaurant_rating_stats WHERE restaurant_id = ?",
+                (restaurant_id,)
+            )
+            stats = cursor.fetchone()
+            if not stats:
+                return {"rating_sum": 0.0, "rating_count": 0, "histogram": {star: 0 for star in range(1, 6)}}
+            return {
+                "rating_sum": stats['rating_sum'],
+                "rating_count": stats['rating_count'],
+                "histogram": {star: stats[f'count_{star}'] for star in range(1, 6)},
+            }
+        except sqlite3.Error as e:
+            print(f"Error fetching rating histogram: {e}")
+            return None
+
+    def setup_order_stats_triggers(self):
+        """
+        Set up triggers that keep daily_restaurant_stats up to date.
+
+        Every order insert, delete and change of restaurant, date, amount or
+        status moves the order between the per-restaurant, per-day counters,
+        so the admin dashboard never has to scan the orders table.
+        """
+        try:
+            # Drop existing triggers if they exist
+            self.execute("DROP TRIGGER IF EXISTS after_order_insert_stats")
+            self.execute("DROP TRIGGER IF EXISTS after_order_update_stats")
+            self.execute("DROP TRIGGER IF EXISTS after_order_delete_stats")
+            
+            # Create trigger for INSERT operation on orders table
+            self.execute(f'''
+            CREATE TRIGGER after_order_insert_stats
+            AFTER INSERT ON orders
+            BEGIN
+                {_daily_stats_delta("NEW", "+")}
+            END;
+            ''')
+            
+            # Create trigger for UPDATE operation on orders table
+            self.execute(f'''
+            CREATE TRIGGER after_order_update_stats
+            AFTER UPDATE OF restaurant_id, order_date, total_amount, status ON orders
+            BEGIN
+                {_daily_stats_delta("OLD", "-")}
+                {_daily_stats_delta("NEW", "+")}
+            END;
+            ''')
+            
+            # Create trigger for DELETE operation on orders table
+            self.execute(f'''
+            CREATE TRIGGER after_order_delete_stats
+            AFTER DELETE ON orders
+            BEGIN
+                {_daily_stats_delta("OLD", "-")}
+            END;
+            ''')
+            
+            self._commit()
+            print("Order statistics triggers created successfully")
+        except sqlite3.Error as e:
+            self._rollback()
+            print(f"Error creating order statistics triggers: {e}")
+            raise
+
+    def setup_order_timestamp_triggers(self):
+        """
+        Set up triggers that stamp orders.updated_at on every insert and change.
+
+        The stamp is taken by SQLite rather than the caller, so every process
+        writes comparable UTC times and get_restaurant_orders(changed_since=...)
+        can use it as a high-water mark.
+        """
+        try:
+            # Drop existing triggers if they exist
+            self.execute("DROP TRIGGER IF EXISTS after_order_insert_timestamp")
+            self.execute("DROP TRIGGER IF EXISTS after_order_update_timestamp")
+            
+            # Create trigger for INSERT operation on orders table
+            self.execute(f'''
+            CREATE TRIGGER after_order_insert_timestamp
+            AFTER INSERT ON orders
+            BEGIN
+                UPDATE orders SET updated_at = {ORDER_TIMESTAMP_NOW} WHERE order_id = NEW.order_id;
+            END;
+            ''')
+            
+            # Create trigger for UPDATE operation on orders table (not on updated_at itself)
+            self.execute(f'''
+            CREATE TRIGGER after_order_update_timestamp
+            AFTER UPDATE OF user_id, restaurant_id, total_amount, shipping_cost, order_date, status, order_type ON orders
+            BEGIN
+                UPDATE orders SET updated_at = {ORDER_TIMESTAMP_NOW} WHERE order_id = NEW.order_id;
+            END;
+            ''')
+            
+            self._commit()
+            print("Order timestamp triggers created successfully")
+        except sqlite3.Error as e:
+            self._rollback()
+            print(f"Error creating order timestamp triggers: {e}")
+            raise
+
+    def get_orders_high_water_mark(self, restaurant_id):
+        """Get the latest updated_at of a restaurant's orders, or the current time if it has no orders."""
+        cursor = self.execute(
+            f"SELECT COALESCE(MAX(updated_at), {ORDER_TIMESTAMP_NOW}) FROM orders WHERE restaurant_id = ?",
+            (restaurant_id,)
+        )
+        return cursor.fetchone()[0]
+
+    def rebuild_daily_stats(self):
+        """Recompute daily_restaurant_stats from the orders table."""
+        try:
+            self.execute("DELETE FROM daily_restaurant_stats")
+            self.execute("""
+                INSERT INTO daily_restaurant_stats
+                (restaurant_id, day, order_count, revenue, pending_count, delivered_count)
+                SELECT restaurant_id, date(order_date), COUNT(*), TOTAL(total_amount),
+                       SUM(COALESCE(status = 'pending', 0)), SUM(COALESCE(status = 'delivered', 0))
+                FROM orders
+                GROUP BY restaurant_id, date(order_date)
+            """)
+            self._commit()
+            return True, "Daily order statistics rebuilt successfully"
+        except sqlite3.Error as e:
+            self._rollback()
+            return False, f"Error rebuilding daily order statistics: {e}"
+
+    def get_dashboard_stats(self, restaurant_id, day=None):
+        """
+        Get the admin dashboard figures for a restaurant from daily_restaurant_stats.
+
+        Returns a dict with 'total_orders', 'pending_orders', 'completed_orders'
+        and 'day_revenue' (revenue of the given 'YYYY-MM-DD' day, today by default).
+        The cost grows with the number of days that have orders, not with the
+        number of orders.
+        """
+        if day is None:
+            day = datetime.now().strftime('%Y-%m-%d')
+        try:
+            cursor = self.execute("""
+                SELECT COALESCE(SUM(order_count), 0) AS total_orders,
+                       COALESCE(SUM(pending_count), 0) AS pending_orders,
+                       COALESCE(SUM(delivered_count), 0) AS completed_orders,
+                       TOTAL(CASE WHEN day = ? THEN revenue END) AS day_revenue
+                FROM daily_restaurant_stats
+                WHERE restaurant_id = ?
+            """, (day, restaurant_id))
+            return dict(cursor.fetchone())
+        except sqlite3.Error as e:
+            print(f"Error fetching dashboard statistics: {e}")
+            return None
+
+    def setup_changelog_triggers(self):
+        """
+        Set up triggers that append every write to the CHANGELOG_TABLES to the changelog.
+
+        Each insert, update and delete adds one row with an increasing seq, so
+        consumers can process what changed since the last seq they handled
+        instead of rescanning the tables.
+        """
+        try:
+            for table, primary_key in CHANGELOG_TABLES.items():
+                cursor = self.execute(f"PRAGMA table_info({table})")
+                columns = [
+                    column['name'] for column in cursor.fetchall()
+                    if column['name'] not in CHANGELOG_IGNORED_COLUMNS
+                ]
+                
+                for operation, event, row in (
+                    ("insert", "INSERT", "NEW"),
+                    ("update", f"UPDATE OF {', '.join(columns)}", "NEW"),
+                    ("delete", "DELETE", "OLD"),
+                ):
+                    trigger = f"changelog_{table}_{operation}"
+                    self.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+                    self.execute(f'''
+                    CREATE TRIGGER {trigger}
+                    AFTER {event} ON {table}
+                    BEGIN
+                        INSERT INTO changelog (table_name, row_id, operation)
+                        VALUES ('{table}', {row}.{primary_key}, '{operation}');
+                    END;
+                    ''')
+            
+            self._commit()
+            print("Changelog triggers created successfully")
+        except sqlite3.Error as e:
+            self._rollback()
+            print(f"Error creating changelog triggers: {e}")
+            raise
+
+    def get_latest_change_seq(self):
+        """Get the seq of the most recent changelog entry, or 0 if nothing has been logged."""
+        cursor = self.execute("SELECT COALESCE(MAX(seq), 0) FROM changelog")
+        return cursor.fetchone()[0]
+
+    def get_changes_since(self, seq, limit=500, tables=None):
+        """
+        Get up to `limit` changelog entries with a seq greater than `seq`, oldest first.
+
+        Each entry is a dict with 'seq', 'table_name', 'row_id', 'operation'
+        and 'changed_at'. Pass `tables` to only see changes to those tables.
+        Database errors are raised, so a failed read is never taken for "no
+        changes".
+        """
+        query = "SELECT * FROM changelog WHERE seq > ?"
+        params = [seq]
+        
+        if tables:
+            query += f" AND table_name IN ({', '.join('?' for _ in tables)})"
+            params.extend(tables)
+        
+        query += " ORDER BY seq LIMIT ?"
+        params.append(limit)
+        
+        cursor = self.execute(query, params)
+        return [dict(row) for row in cursor.fetchall()]
+
+    def get_consumer_position(self, consumer):
+        """Get the last changelog seq a consumer has acknowledged, or None for a new consumer."""
+        cursor = self.execute(
+            "SELECT last_seq FROM changelog_consumers WHERE consumer = ?",
+            (consumer,)
+        )
+        row = cursor.fetchone()
+        return row['last_seq'] if row else None
+
+    def read_changes(self, consumer, limit=500, tables=None):
+        """
+        Get the next batch of changes a consumer has not acknowledged yet.
+
+        A consumer seen for the first time starts from the current end of the
+        changelog rather than replaying its whole history. The position only
+        moves when the consumer calls ack_changes(), so a batch that fails to
+        process is read again.
+        """
+        position = self.get_consumer_position(consumer)
+        if position is None:
+            position = self.get_latest_change_seq()
+            self.ack_changes(consumer, position)
+        return self.get_changes_since(position, limit, tables)
+
+    def ack_changes(self, consumer, seq):
+        """Record that a consumer has processed every change up to and including seq."""
+        try:
+            self.execute("""
+                INSERT INTO changelog_consumers (consumer, last_seq) VALUES (?, ?)
+                ON CONFLICT (consumer) DO UPDATE SET
+                    last_seq = MAX(last_seq, excluded.last_seq),
+                    updated_at = CURRENT_TIMESTAMP
+            """, (consumer, seq))
+            self._commit()
+            return True, "Changelog position saved"
+        except sqlite3.Error as e:
+            self._rollback()
+            return False, f"Error saving changelog position: {e}"
+
+    def prune_changelog(self):
+        """Delete changelog entries that every registered consumer has acknowledged."""
+        try:
+            cursor = self.execute("""
+                DELETE FROM changelog
+                WHERE seq <= (SELECT MIN(last_seq) FROM changelog_consumers)
+            """)
+            self._commit()
+            return True, f"Pruned {cursor.rowcount} changelog entries"
+        except sqlite3.Error as e:
+            self._rollback()
+            return False, f"Error pruning changelog: {e}"
 
     def remove_duplicate_menu_data(self):
         """
@@ -1579,11 +2565,11 @@ class DatabaseManager:
             print("Starting duplicate removal process...")
             
             # Begin transaction
-            self.cursor.execute("BEGIN TRANSACTION")
+            self.execute("BEGIN TRANSACTION")
             
             # 1. First, identify and remove duplicate menu categories
             print("Removing duplicate menu categories...")
-            self.cursor.execute("""
+            cursor = self.execute("""
                 DELETE FROM menu_categories
                 WHERE category_id NOT IN (
                     SELECT MIN(category_id) 
@@ -1591,12 +2577,12 @@ class DatabaseManager:
                     GROUP BY restaurant_id, name
                 )
             """)
-            categories_removed = self.cursor.rowcount
+            categories_removed = cursor.rowcount
             print(f"Removed {categories_removed} duplicate menu categories")
             
             # 2. Then, identify and remove duplicate menu items
             print("Removing duplicate menu items...")
-            self.cursor.execute("""
+            cursor = self.execute("""
                 DELETE FROM menu_items
                 WHERE item_id NOT IN (
                     SELECT MIN(item_id) 
@@ -1604,12 +2590,12 @@ class DatabaseManager:
                     GROUP BY restaurant_id, category_id, name
                 )
             """)
-            items_removed = self.cursor.rowcount
+            items_removed = cursor.rowcount
             print(f"Removed {items_removed} duplicate menu items")
             
             # 3. Update item_count in menu_categories to reflect the current count
             print("Updating category item counts...")
-            self.cursor.execute("""
+            self.execute("""
                 UPDATE menu_categories
                 SET item_count = (
                     SELECT COUNT(*) 
@@ -1622,13 +2608,13 @@ class DatabaseManager:
             print("Adding unique constraints to prevent future duplicates...")
             try:
                 # Create unique index for menu_categories
-                self.cursor.execute("""
+                self.execute("""
                     CREATE UNIQUE INDEX IF NOT EXISTS idx_unique_restaurant_category
                     ON menu_categories (restaurant_id, name)
                 """)
                 
                 # Create unique index for menu_items
-                self.cursor.execute("""
+                self.execute("""
                     CREATE UNIQUE INDEX IF NOT EXISTS idx_unique_menu_item
                     ON menu_items (restaurant_id, category_id, name)
                 """)
@@ -1637,14 +2623,15 @@ class DatabaseManager:
                 # Continue execution even if we can't create the indexes
             
             # Commit the transaction
-            self.conn.commit()
+            self._wrote("menu_categories", "menu_items")
+            self._commit()
             
             print("Duplicate removal completed successfully")
             return True, f"Successfully removed {categories_removed} duplicate categories and {items_removed} duplicate menu items"
         
         except sqlite3.Error as e:
             # Rollback in case of error
-            self.conn.rollback()
+            self._rollback()
             print(f"Error removing duplicates: {e}")
             return False, f"Error removing duplicates: {e}"
         
@@ -1653,8 +2640,8 @@ class DatabaseManager:
     def get_order_by_id(self, order_id):
         """Get order details by order ID"""
         try:
-            self.cursor.execute("SELECT * FROM orders WHERE order_id = ?", (order_id,))
-            order = self.cursor.fetchone()
+            cursor = self.execute("SELECT * FROM orders WHERE order_id = ?", (order_id,))
+            order = cursor.fetchone()
             return dict(order) if order else None
         except Exception as e:
             print(f"Error getting order: {e}")
@@ -1663,8 +2650,8 @@ class DatabaseManager:
     def get_user_by_id(self, user_id):
         """Get user details by user ID"""
         try:
-            self.cursor.execute("SELECT * FROM users WHERE user_id = ?", (user_id,))
-            user = self.cursor.fetchone()
+            cursor = self.execute("SELECT * FROM users WHERE user_id = ?", (user_id,))
+            user = cursor.fetchone()
             return dict(user) if user else None
         except Exception as e:
             print(f"Error getting user: {e}")
@@ -1673,57 +2660,213 @@ class DatabaseManager:
     def get_order_items(self, order_id):
         """Get items for a specific order"""
         try:
-            self.cursor.execute("""
+            cursor = self.execute("""
                 SELECT oi.*, mi.name, mi.description, mi.price
                 FROM order_items oi
                 JOIN menu_items mi ON oi.item_id = mi.item_id
                 WHERE oi.order_id = ?
             """, (order_id,))
-            items = self.cursor.fetchall()
+            items = cursor.fetchall()
             return [dict(item) for item in items]
         except Exception as e:
             print(f"Error getting order items: {e}")
             return []
 
+    def get_restaurant_orders(self, restaurant_id, status=None, date_from=None, date_to=None, limit=None,
+                              sort_by="order_date", descending=True, after=None, changed_since=None):
+        """
+        Get a restaurant's orders, newest first, with customer details and an item summary.
+
+        The orders and the summaries of their items are fetched in a single
+        query. Each order dict gets 'customer_name', 'customer_email',
+        'phone_number', 'item_count', 'items_summary' (the first two items,
+        e.g. "Whopper (x2), Fanta (x1) and 3 more") and 'sort_key'.
+
+        Pages are fetched with keyset pagination: pass the (sort_key, order_id)
+        of the last order of one page as `after` to get the next page.
+
+        Parameters:
+        restaurant_id (int): Restaurant whose orders are loaded
+        status (str): Only orders with this status
+        date_from (str): Only orders placed on or after this 'YYYY-MM-DD' date
+        date_to (str): Only orders placed on or before this 'YYYY-MM-DD' date
+        limit (int): Maximum number of orders to return
+        sort_by (str): One of the keys of ORDER_SORT_COLUMNS
+        descending (bool): Sort direction
+        after (tuple): (sort_key, order_id) of the last order already loaded
+        changed_since (str): Only orders whose updated_at is at or after this
+            high-water mark (see get_orders_high_water_mark)
+
+        Raises sqlite3.Error so the caller can report the failure.
+        """
+        if sort_by not in ORDER_SORT_COLUMNS:
+            raise ValueError(f"Cannot sort orders by {sort_by!r}")
+        sort_expr = ORDER_SORT_COLUMNS[sort_by]
+        direction = "DESC" if descending else "ASC"
+        
+        filters = ["o.restaurant_id = ?"]
+        params = [restaurant_id]
+        
+        if status:
+            filters.append("o.status = ?")
+            params.append(status)
+        
+        if date_from:
+            filters.append("o.order_date >= ?")
+            params.append(date_from)
+        
+        if date_to:
+            # order_date carries a time, so compare against the start of the next day
+            filters.append("o.order_date < date(?, '+1 day')")
+            params.append(date_to)
+        
+        if changed_since is not None:
+            filters.append("o.updated_at >= ?")
+            params.append(changed_since)
+        
+        if after is not None:
+            filters.append(f"({sort_expr}, o.order_id) {'<' if descending else '>'} (?, ?)")
+            params.extend(after)
+        
+        params.append(limit if limit is not None else -1)
+        
+        cursor = self.execute(f"""
+            WITH page AS (
+                SELECT o.*, u.username AS customer_name, u.email AS customer_email, u.phone_number,
+                       {sort_expr} AS sort_key
+                FROM orders o
+                JOIN users u ON o.user_id = u.user_id
+                WHERE {' AND '.join(filters)}
+                ORDER BY {sort_expr} {direction}, o.order_id {direction}
+                LIMIT ?
+            ),
+            numbered_items AS (
+                SELECT oi.order_id,
+                       mi.name || ' (x' || oi.quantity || ')' AS label,
+                       ROW_NUMBER() OVER (PARTITION BY oi.order_id ORDER BY oi.order_item_id) AS position
+                FROM order_items oi
+                JOIN menu_items mi ON oi.item_id = mi.item_id
+                WHERE oi.order_id IN (SELECT order_id FROM page)
+            ),
+            item_summaries AS (
+                SELECT order_id,
+                       COUNT(*) AS item_count,
+                       GROUP_CONCAT(CASE WHEN position <= 2 THEN label END, ', ') AS items_preview
+                FROM numbered_items
+                GROUP BY order_id
+            )
+            SELECT page.*,
+                   COALESCE(s.item_count, 0) AS item_count,
+                   COALESCE(s.items_preview, '') AS items_summary
+            FROM page
+            LEFT JOIN item_summaries s ON s.order_id = page.order_id
+            ORDER BY page.sort_key {direction}, page.order_id {direction}
+        """, params)
+        
+        orders = [dict(row) for row in cursor.fetchall()]
+        for order in orders:
+            if order['item_count'] > 2:
+                order['items_summary'] += f" and {order['item_count'] - 2} more"
+        return orders
+
     def update_order_status(self, order_id, new_status):
         """Update the status of an order"""
         try:
-            self.cursor.execute(
+            cursor = self.execute(
                 "UPDATE orders SET status = ? WHERE order_id = ?",
                 (new_status, order_id)
             )
-            self.conn.commit()
+            self._commit()
             return True
         except Exception as e:
+            self._rollback()
             print(f"Error updating order status: {e}")
             return False
 
 
 
 
-# Create an instance of DatabaseManager
-db_manager = DatabaseManager()
+# Process-wide managers handed out by acquire_database(): absolute path -> [manager, references]
+_shared_databases = {}
+_shared_databases_lock = threading.Lock()
 
-tables = [
-    "admins",
-    "users",
-    "restaurants",
-    "restaurant_locations",
-    "menu_categories",
-    "menu_items",
-    "cart_items",
-    "orders",
-    "order_items",
-    "payments",
-    "ratings"
-]
 
-for table in tables:
-    print(f"\n{'='*50}\n")
-    db_manager.print_table_data(table)
+def acquire_database(db_file="Database.db"):
+    """
+    Get the process-wide DatabaseManager for db_file, creating it on first use.
+
+    Every window that calls this shares one manager, with its warm connections
+    and statement caches. Each call must be paired with release_database().
+    """
+    key = os.path.abspath(db_file)
+    with _shared_databases_lock:
+        entry = _shared_databases.get(key)
+        if entry is None:
+            entry = _shared_databases[key] = [DatabaseManager(db_file), 0]
+        entry[1] += 1
+        return entry[0]
 
 
+def release_database(db_manager):
+    """Drop one reference taken with acquire_database(); the last one closes the manager."""
+    key = os.path.abspath(db_manager.db_file)
+    with _shared_databases_lock:
+        entry = _shared_databases.get(key)
+        if entry is None or entry[0] is not db_manager:
+            print(f"Database manager for {db_manager.db_file} was not acquired")
+            return
+        entry[1] -= 1
+        if entry[1] > 0:
+            return
+        del _shared_databases[key]
+    db_manager.close()
 
 
+@contextmanager
+def shared_database(db_file="Database.db"):
+    """Hold a reference to the shared manager for db_file for the duration of a with-block."""
+    db_manager = acquire_database(db_file)
+    try:
+        yield db_manager
+    finally:
+        release_database(db_manager)
+
+
+def main(argv=None):
+    """Inspect and maintain the database from the command line."""
+    parser = argparse.ArgumentParser(description="Inspect and maintain the food ordering database.")
+    parser.add_argument("--db", default="Database.db", help="database file (default: Database.db)")
+    parser.add_argument("--query-stats", action="store_true", help="print the statements run and their timings at the end")
+    commands = parser.add_subparsers(dest="command", required=True)
+    
+    dump_parser = commands.add_parser("dump", help="print the rows of some or all tables")
+    dump_parser.add_argument("tables", nargs="*", choices=TABLES, metavar="table",
+                             help="tables to print (default: all)")
+    commands.add_parser("advise-indexes", help="report hot-path queries that scan a whole table")
+    commands.add_parser("rebuild-stats", help="recompute the rating and daily order statistics")
+    commands.add_parser("prune-changelog", help="delete changelog entries every consumer has read")
+    
+    args = parser.parse_args(argv)
+    db_manager = DatabaseManager(args.db)
+    
+    try:
+        if args.command == "dump":
+            for table in args.tables or TABLES:
+                print(f"\n{'='*50}\n")
+                db_manager.print_table_data(table)
+        elif args.command == "advise-indexes":
+            db_manager.advise_indexes()
+        elif args.command == "rebuild-stats":
+            print(db_manager.rebuild_rating_stats()[1])
+            print(db_manager.rebuild_daily_stats()[1])
+        elif args.command == "prune-changelog":
+            print(db_manager.prune_changelog()[1])
+        
+        if args.query_stats:
+            db_manager.query_stats.dump()
+    finally:
+        db_manager.close()
+
 
-db_manager.close()
\ No newline at end of file
+if __name__ == "__main__":
+    main()
\ No newline at end of file
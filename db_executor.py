@@ -0,0 +1,108 @@
+import queue
+from concurrent.futures import ThreadPoolExecutor
+
+
+class BackgroundExecutor:
+    """Run database work on worker threads and hand the results back to the Tk thread.
+
+    When db (a DatabaseManager) is given, each request runs on a connection
+    checked out from its pool, so a DatabaseManager method called from
+    submit() never blocks the event loop and the workers do not keep
+    connections open once they are idle. Results are queued and delivered to on_success or
+    on_error from the Tk after() loop, where it is safe to touch widgets.
+
+    Requests submitted under the same key supersede each other: only the
+    result of the latest one is delivered, and older ones that have not
+    started yet are not run at all.
+    """
+
+    def __init__(self, root, max_workers=4, poll_interval=15, db=None):
+        """Run work for the Tk root on up to max_workers threads, checking for results every poll_interval ms."""
+        self.root = root
+        self.db = db
+        self.poll_interval = poll_interval
+        self.workers = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="db-worker")
+        self.results = queue.Queue()
+        self.generations = {}
+        self.futures = {}
+        self.outstanding = 0
+        self.after_id = None
+
+    def submit(self, func, *args, on_success=None, on_error=None, key=None, **kwargs):
+        """
+        Run func(*args, **kwargs) on a worker thread.
+
+        on_success(result) or on_error(exception) is then called on the Tk
+        thread. When key is given, any earlier request with the same key is
+        cancelled and its result discarded.
+        """
+        generation = None
+        if key is not None:
+            self.cancel(key)
+            generation = self.generations[key] = self.generations.get(key, 0) + 1
+
+        future = self.workers.submit(self.run, func, args, kwargs, key, generation, on_success, on_error)
+        if key is not None:
+            self.futures[key] = future
+        self.outstanding += 1
+
+        if self.after_id is None:
+            self.after_id = self.root.after(self.poll_interval, self.deliver_results)
+        return future
+
+    def cancel(self, key):
+        """Discard the result of the pending request under key, and skip it if it has not started."""
+        if key not in self.generations:
+            return
+        self.generations[key] += 1
+        future = self.futures.pop(key, None)
+        if future is not None and future.cancel():
+            self.outstanding -= 1
+
+    def run(self, func, args, kwargs, key, generation, on_success, on_error):
+        """Worker side: call func and queue its result or exception for the Tk thread."""
+        try:
+            if self.db is None:
+                result = func(*args, **kwargs)
+            else:
+                with self.db.borrowed_connection():
+                    result = func(*args, **kwargs)
+        except Exception as e:
+            self.results.put((key, generation, on_error, e, False))
+        else:
+            self.results.put((key, generation, on_success, result, True))
+
+    def deliver_results(self):
+        """Tk side: call the callbacks of finished requests that have not been superseded."""
+        self.after_id = None
+        while True:
+            try:
+                key, generation, callback, value, succeeded = self.results.get_nowait()
+            except queue.Empty:
+                break
+
+            self.outstanding -= 1
+            if key is not None:
+                if self.generations.get(key) != generation:
+                    continue
+                self.futures.pop(key, None)
+
+            try:
+                if callback is not None:
+                    callback(value)
+                elif not succeeded:
+                    print(f"Error in background database request: {value}")
+            except Exception as e:
+                print(f"Error handling background database result: {e}")
+
+        if self.outstanding > 0:
+            self.after_id = self.root.after(self.poll_interval, self.deliver_results)
+
+    def shutdown(self):
+        """Stop delivering results and let the workers finish their current requests."""
+        if self.after_id is not None:
+            self.root.after_cancel(self.after_id)
+            self.after_id = None
+        for key in list(self.generations):
+            self.cancel(key)
+        self.workers.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,93 @@
+from collections import OrderedDict
+from functools import lru_cache
+from PIL import Image, ImageTk
+
+# Colour stops of the login screens' background, from left to right
+GRADIENT_COLORS = (
+    (0, 0, 255),      # Blue
+    (75, 0, 230),     # Blue-purple
+    (150, 0, 180),    # Purple
+    (200, 0, 130),    # Purple-red
+    (255, 0, 0)       # Red
+)
+
+# Milliseconds a resize has to settle before the gradient is redrawn
+RESIZE_DELAY = 100
+
+# Number of sizes whose PhotoImage a GradientBackground keeps for redraws
+PHOTO_CACHE_SIZE = 4
+
+# Pillow before 9.1 has the resampling filters on Image itself
+NEAREST = getattr(Image, "Resampling", Image).NEAREST
+
+
+@lru_cache(maxsize=8)
+def render_gradient(width, height, colors=GRADIENT_COLORS):
+    """
+    Render a horizontal gradient through colors as a width x height PIL image.
+
+    Only one row of pixels is computed; it is stretched to the full height.
+    The last few sizes are kept, so reopening or resizing a window back to
+    a size it had before costs nothing.
+    """
+    segments = len(colors) - 1
+    segment_width = width / segments
+    row = bytearray()
+    for x in range(width):
+        # Colour stop this column starts from, and its position (0 to 1) towards the next one
+        i = min(int(x / segment_width), segments - 1)
+        pos = (x - i * segment_width) / segment_width
+        start_color, end_color = colors[i], colors[i + 1]
+        row.extend(int(start + (end - start) * pos) for start, end in zip(start_color, end_color))
+    return Image.frombytes("RGB", (width, 1), bytes(row)).resize((width, height), NEAREST)
+
+
+class GradientBackground:
+    """Fill a canvas with a gradient drawn as a single image item.
+
+    The gradient follows the size of the canvas. While a window is being
+    resized it is redrawn once the size has stopped changing for delay ms,
+    not on every <Configure> event.
+    """
+
+    def __init__(self, canvas, colors=GRADIENT_COLORS, delay=RESIZE_DELAY):
+        self.canvas = canvas
+        self.colors = colors
+        self.delay = delay
+        self.item = None
+        # PhotoImages of the last few sizes, least recently shown first; they also keep Tk from dropping the picture
+        self.photos = OrderedDict()
+        self.size = None
+        self.after_id = None
+        canvas.bind("<Configure>", self.on_configure, add="+")
+
+    def draw(self, width, height):
+        """Show the gradient at width x height, unless it is already that size."""
+        self.after_id = None
+        if width <= 1 or height <= 1 or (width, height) == self.size:
+            return
+
+        size = (width, height)
+        photo = self.photos.pop(size, None)
+        if photo is None:
+            photo = ImageTk.PhotoImage(render_gradient(width, height, self.colors), master=self.canvas)
+        self.photos[size] = photo
+        # The shown image is the newest, so it is never the one dropped
+        while len(self.photos) > PHOTO_CACHE_SIZE:
+            self.photos.popitem(last=False)
+
+        if self.item is None:
+            self.item = self.canvas.create_image(0, 0, anchor="nw", image=photo)
+            self.canvas.tag_lower(self.item)
+        else:
+            self.canvas.itemconfigure(self.item, image=photo)
+        self.size = size
+
+    def on_configure(self, event):
+        # The first size is drawn straight away; later ones wait for the resize to settle
+        if self.item is None:
+            self.draw(event.width, event.height)
+            return
+        if self.after_id is not None:
+            self.canvas.after_cancel(self.after_id)
+        self.after_id = self.canvas.after(self.delay, self.draw, event.width, event.height)
@@ -0,0 +1,232 @@
+import re
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from functools import lru_cache
+
+# Upper bounds, in milliseconds, of the latency histogram buckets
+LATENCY_BUCKETS_MS = (0.1, 0.5, 1, 5, 10, 50, 100, 500, 1000, float("inf"))
+
+_COMMENT = re.compile(r"--[^\n]*")
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+
+@lru_cache(maxsize=1024)
+def normalize_sql(sql):
+    """
+    Reduce a statement to its shape, so calls that differ only in their values are counted together.
+
+    Comments are dropped, literals become ?, lists of placeholders become
+    (?, ...) and whitespace is collapsed.
+    """
+    sql = _COMMENT.sub("", sql)
+    sql = _STRING_LITERAL.sub("?", sql)
+    sql = _NUMBER_LITERAL.sub("?", sql)
+    sql = _PLACEHOLDER_LIST.sub("(?, ...)", sql)
+    return _WHITESPACE.sub(" ", sql).strip()
+
+
+class StatementStats:
+    """Counters for one normalized statement."""
+
+    def __init__(self, sql):
+        self.sql = sql
+        self.calls = 0
+        self.rows = 0
+        self.execute_ms = 0.0
+        self.fetch_ms = 0.0
+        self.max_ms = 0.0
+        self.histogram = [0] * len(LATENCY_BUCKETS_MS)
+
+    def as_dict(self):
+        return {
+            "sql": self.sql,
+            "calls": self.calls,
+            "rows": self.rows,
+            "execute_ms": self.execute_ms,
+            "fetch_ms": self.fetch_ms,
+            "total_ms": self.execute_ms + self.fetch_ms,
+            "mean_ms": self.execute_ms / self.calls if self.calls else 0.0,
+            "max_ms": self.max_ms,
+            "histogram": list(self.histogram),
+        }
+
+
+class QueryStats:
+    """Per-statement counts, rows returned and latency histograms for every query a DatabaseManager runs.
+
+    Connections opened by the pool record into this object through
+    InstrumentedCursor. The latency of a call is the time execute() took,
+    which covers preparing the statement and producing its first row; the
+    time spent fetching the remaining rows is counted separately. Calls slower than slow_query_ms are written to the slow-query
+    log, or printed when no log file is set.
+    """
+
+    def __init__(self, slow_query_ms=100, slow_log=None):
+        self.slow_query_ms = slow_query_ms
+        self.slow_log = slow_log
+        self.statements = {}
+        self.histogram = [0] * len(LATENCY_BUCKETS_MS)
+        self.calls = 0
+        self.started = time.time()
+        self._lock = threading.Lock()
+
+    def _statement(self, sql):
+        stats = self.statements.get(sql)
+        if stats is None:
+            stats = self.statements[sql] = StatementStats(sql)
+        return stats
+
+    def record_call(self, sql, elapsed):
+        """Count one execution of sql that took elapsed seconds; returns the normalized statement."""
+        sql = normalize_sql(sql)
+        elapsed_ms = elapsed * 1000
+        bucket = next(index for index, bound in enumerate(LATENCY_BUCKETS_MS) if elapsed_ms <= bound)
+        with self._lock:
+            stats = self._statement(sql)
+            stats.calls += 1
+            stats.execute_ms += elapsed_ms
+            stats.max_ms = max(stats.max_ms, elapsed_ms)
+            stats.histogram[bucket] += 1
+            self.histogram[bucket] += 1
+            self.calls += 1
+        if self.slow_query_ms is not None and elapsed_ms >= self.slow_query_ms:
+            self.log_slow_query(sql, elapsed_ms)
+        return sql
+
+    def record_rows(self, sql, rows, elapsed):
+        """Add rows fetched from an earlier execution of the normalized statement sql."""
+        with self._lock:
+            stats = self._statement(sql)
+            stats.rows += rows
+            stats.fetch_ms += elapsed * 1000
+
+    def log_slow_query(self, sql, elapsed_ms):
+        """Write one slow call to the slow-query log."""
+        line = f"{datetime.now().strftime('%Y-%m-%d %H:%M:%S')} {elapsed_ms:.1f} ms {sql}"
+        if self.slow_log is None:
+            print(f"Slow query: {line}")
+            return
+        try:
+            with open(self.slow_log, "a") as log:
+                log.write(line + "\n")
+        except OSError as e:
+            print(f"Error writing slow query log: {e}")
+
+    def histogram_copy(self):
+        """A copy of the overall latency histogram, to pass to percentile() later as since."""
+        with self._lock:
+            return list(self.histogram)
+
+    def percentile(self, fraction, since=None):
+        """
+        Estimate the latency, in ms, below which fraction of the calls finished (the bucket's upper bound).
+
+        With since, a histogram_copy() taken earlier, only the calls made after
+        that copy are counted.
+        """
+        histogram = self.histogram_copy()
+        if since is not None:
+            histogram = [count - earlier for count, earlier in zip(histogram, since)]
+        calls = sum(histogram)
+        if not calls:
+            return 0.0
+        wanted = fraction * calls
+        seen = 0
+        for bound, count in zip(LATENCY_BUCKETS_MS, histogram):
+            seen += count
+            if seen >= wanted:
+                return bound
+        return LATENCY_BUCKETS_MS[-1]
+
+    def snapshot(self):
+        """The counters of every statement as dicts, most total time first."""
+        with self._lock:
+            statements = [stats.as_dict() for stats in self.statements.values()]
+        return sorted(statements, key=lambda stats: stats["total_ms"], reverse=True)
+
+    def reset(self):
+        """Forget everything recorded so far."""
+        with self._lock:
+            self.statements = {}
+            self.histogram = [0] * len(LATENCY_BUCKETS_MS)
+            self.calls = 0
+            self.started = time.time()
+
+    def dump(self, limit=20):
+        """Print the limit statements with the most total time; mean and max are execute() latencies."""
+        statements = self.snapshot()
+        print(f"\nQuery statistics: {self.calls} calls to {len(statements)} statements "
+              f"in {time.time() - self.started:.0f} s (p50 {self.percentile(0.5)} ms, p95 {self.percentile(0.95)} ms)")
+        print(f"{'calls':>8} {'rows':>8} {'exec ms':>10} {'fetch ms':>10} {'mean ms':>8} {'max ms':>8}  statement")
+        for stats in statements[:limit]:
+            print(f"{stats['calls']:>8} {stats['rows']:>8} {stats['execute_ms']:>10.1f} {stats['fetch_ms']:>10.1f} "
+                  f"{stats['mean_ms']:>8.2f} {stats['max_ms']:>8.1f}  {stats['sql']}")
+
+
+class InstrumentedCursor(sqlite3.Cursor):
+    """A cursor that records its executions and fetched rows in the connection's QueryStats."""
+
+    statement = None
+
+    def execute(self, sql, parameters=()):
+        start = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            self.statement = self.connection.query_stats.record_call(sql, time.perf_counter() - start)
+
+    def executemany(self, sql, seq_of_parameters):
+        start = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            self.statement = self.connection.query_stats.record_call(sql, time.perf_counter() - start)
+
+    def _fetched(self, rows, start):
+        if self.statement is not None and rows:
+            self.connection.query_stats.record_rows(self.statement, rows, time.perf_counter() - start)
+
+    def fetchone(self):
+        start = time.perf_counter()
+        row = super().fetchone()
+        self._fetched(0 if row is None else 1, start)
+        return row
+
+    def fetchmany(self, size=None):
+        start = time.perf_counter()
+        rows = super().fetchmany(self.arraysize if size is None else size)
+        self._fetched(len(rows), start)
+        return rows
+
+    def fetchall(self):
+        start = time.perf_counter()
+        rows = super().fetchall()
+        self._fetched(len(rows), start)
+        return rows
+
+    def __next__(self):
+        start = time.perf_counter()
+        row = super().__next__()
+        self._fetched(1, start)
+        return row
+
+
+class InstrumentedConnection(sqlite3.Connection):
+    """A connection whose cursors, including those made by execute(), record into query_stats."""
+
+    query_stats = None
+
+    def cursor(self, factory=InstrumentedCursor):
+        return super().cursor(factory)
+
+    # The built-in shortcuts create a plain cursor without going through cursor()
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
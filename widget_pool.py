@@ -0,0 +1,190 @@
+import tkinter as tk
+
+
+class CardPool:
+    """Reuse the widgets of a list of cards instead of rebuilding them on every refresh.
+
+    build_card(parent) creates one card and returns a dict of its widgets
+    with the outer frame under 'frame'; fill_card(card, item) points an
+    existing card at an item by reconfiguring its text and commands. show() only builds cards
+    when the list grows past every earlier size, and hides the cards it no
+    longer needs instead of destroying them.
+
+    The cards live in their own frame inside parent, so messages packed
+    next to them can be cleared with clear_messages() without touching the
+    pooled cards.
+    """
+
+    def __init__(self, parent, build_card, fill_card, bg="white", **pack_options):
+        """Keep cards in a frame packed into parent; each card is packed with pack_options (fill, pady, ...)."""
+        self.parent = parent
+        self.build = build_card
+        self.fill = fill_card
+        self.pack_options = pack_options
+        self.frame = tk.Frame(parent, bg=bg)
+        self.frame.pack(fill="x")
+        self.cards = []
+        self.visible = 0
+
+    def show(self, items):
+        """Show one card per item, in order, reusing the cards already built."""
+        items = list(items)
+        while len(self.cards) < len(items):
+            self.cards.append(self.build(self.frame))
+
+        for card, item in zip(self.cards, items):
+            self.fill(card, item)
+
+        # Only cards whose visibility changes are packed or unpacked; hidden
+        # cards are always the tail, so re-packing keeps the order
+        for card in self.cards[self.visible:len(items)]:
+            card['frame'].pack(**self.pack_options)
+        for card in self.cards[len(items):self.visible]:
+            card['frame'].pack_forget()
+        self.visible = len(items)
+
+    def clear_messages(self):
+        """Destroy the widgets in parent other than the pooled cards."""
+        for widget in self.parent.winfo_children():
+            if widget is not self.frame:
+                widget.destroy()
+
+
+class VirtualCardList:
+    """Show a long, paged list of cards on a canvas, building widgets only for the rows in view.
+
+    Only the rows that intersect the visible part of the canvas, plus
+    overscan rows above and below, have a card; cards that scroll out of
+    view are taken off the canvas and refilled for the rows scrolling in.
+    All cards must be the same height, which is measured from the first one.
+
+    Rows are read a page at a time: load_page(last_row, limit) returns up to
+    limit rows following last_row (None for the first page) and is run
+    through executor, a BackgroundExecutor. The next page is requested when
+    the user scrolls near the end of the rows loaded so far.
+    """
+
+    def __init__(self, canvas, scrollbar, build, fill, load_page, executor,
+                 page_size=50, overscan=2, gap=8):
+        """List rows on canvas, which scrollbar scrolls; build and fill work as for CardPool."""
+        self.canvas = canvas
+        self.scrollbar = scrollbar
+        self.build = build
+        self.fill = fill
+        self.load_page = load_page
+        self.executor = executor
+        self.page_size = page_size
+        self.overscan = overscan
+        self.gap = gap
+        self.rows = []
+        self.exhausted = False
+        self.loading = False
+        self.row_height = None
+        self.shown = {}
+        self.free = []
+        self.render_id = None
+
+        canvas.configure(yscrollcommand=self.on_scroll)
+        canvas.bind("<Configure>", self.on_configure)
+
+    def reload(self):
+        """Read the rows again from the start, keeping as many as are loaded now."""
+        self.load(None, max(self.page_size, len(self.rows)), replace=True)
+
+    def load_more(self):
+        """Request the page after the last loaded row, unless a request is running or the end was reached."""
+        if self.loading or self.exhausted:
+            return
+        self.load(self.rows[-1] if self.rows else None, self.page_size, replace=False)
+
+    def load(self, last_row, limit, replace):
+        # Requests share a key, so a reload supersedes a page still being read
+        self.loading = True
+        self.executor.submit(
+            self.load_page, last_row, limit,
+            on_success=lambda rows: self.add_rows(rows, limit, replace),
+            on_error=self.load_failed,
+            key=("virtual list", id(self))
+        )
+
+    def add_rows(self, rows, limit, replace):
+        self.loading = False
+        if replace:
+            for index in list(self.shown):
+                self.release(index)
+            self.rows = list(rows)
+        else:
+            self.rows.extend(rows)
+        self.exhausted = len(rows) < limit
+        self.render()
+
+    def load_failed(self, error):
+        self.loading = False
+        print(f"Error loading list rows: {error}")
+
+    def on_scroll(self, first, last):
+        self.scrollbar.set(first, last)
+        self.schedule_render()
+
+    def on_configure(self, event):
+        # Cards follow the width of the canvas
+        for card in self.shown.values():
+            self.canvas.itemconfigure(card['item'], width=event.width)
+        self.schedule_render()
+
+    def schedule_render(self):
+        # Scroll and resize events come in bursts; lay the cards out once they settle
+        if self.render_id is None:
+            self.render_id = self.canvas.after_idle(self.render)
+
+    def release(self, index):
+        """Take the card of row index off the canvas and keep it for reuse."""
+        card = self.shown.pop(index)
+        self.canvas.delete(card['item'])
+        self.free.append(card)
+
+    def take_card(self, row):
+        card = self.free.pop() if self.free else self.build(self.canvas)
+        self.fill(card, row)
+        if self.row_height is None:
+            card['frame'].update_idletasks()
+            self.row_height = card['frame'].winfo_reqheight() + self.gap
+        return card
+
+    def render(self):
+        """Put cards on the rows in view and take them off the rows that are not."""
+        if self.render_id is not None:
+            self.canvas.after_cancel(self.render_id)
+            self.render_id = None
+
+        if not self.rows:
+            for index in list(self.shown):
+                self.release(index)
+            self.canvas.configure(scrollregion=(0, 0, 0, 0))
+            if not self.exhausted:
+                self.load_more()
+            return
+
+        if self.row_height is None:
+            self.free.append(self.take_card(self.rows[0]))
+
+        width = self.canvas.winfo_width()
+        self.canvas.configure(scrollregion=(0, 0, width, len(self.rows) * self.row_height))
+
+        top = self.canvas.canvasy(0)
+        first = max(0, int(top // self.row_height) - self.overscan)
+        last = min(len(self.rows), int((top + self.canvas.winfo_height()) // self.row_height) + 1 + self.overscan)
+
+        for index in list(self.shown):
+            if not first <= index < last:
+                self.release(index)
+        for index in range(first, last):
+            if index not in self.shown:
+                card = self.take_card(self.rows[index])
+                card['item'] = self.canvas.create_window(0, index * self.row_height, window=card['frame'],
+                                                         anchor="nw", width=width)
+                self.shown[index] = card
+
+        # Read ahead once the rows in view come close to the end of what is loaded
+        if last + self.overscan >= len(self.rows):
+            self.load_more()